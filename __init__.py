@@ -44,9 +44,10 @@ from limit_valuation import LimitValuation, MacLaneLimitValuation, LimitValuatio
 from mapped_valuation import MappedValuation_base, FiniteExtensionFromLimitValuation, FiniteExtensionFromInfiniteValuation, MappedValuation_base
 from augmented_valuation import FiniteAugmentedValuation, InfiniteAugmentedValuation
 from gauss_valuation import GaussValuation_generic
-from valuation import DiscretePseudoValuation, DiscreteValuation, InfiniteDiscretePseudoValuation
-from padic_valuation import pAdicValuation_base, pAdicValuation_int, pAdicValuation_padic, pAdicFromLimitValuation
-from developing_valuation import DevelopingValuation
+from valuation import DiscretePseudoValuation, DiscreteValuation, InfiniteDiscretePseudoValuation, check_level, set_check_level, SimplificationPolicy, simplification_policy, set_simplification_policy, CancellationToken, ComputationCancelled
+from padic_valuation import pAdicValuation_base, pAdicValuation_int, pAdicValuation_padic, pAdicFromLimitValuation, integral_basis, prime_decomposition, CompletionEmbedding
+from developing_valuation import DevelopingValuation, PhiAdicExpansion, LowerConvexHull
+from valuation_pool import ValuationPool, AsyncComputation, default_pool
 from augmented_valuation import AugmentedValuation_base, FinalAugmentedValuation, NonFinalAugmentedValuation, FinalFiniteAugmentedValuation, NonFinalFiniteAugmentedValuation
 from inductive_valuation import FiniteInductiveValuation, FinalInductiveValuation, InfiniteInductiveValuation, NonFinalInductiveValuation
 from scaled_valuation import ScaledValuation_generic
@@ -749,6 +750,7 @@ sage.rings.valuation.gauss_valuation = sys.modules['sage.rings.valuation.gauss_v
 sage.rings.valuation.valuation = sys.modules['sage.rings.valuation.valuation'] = valuation
 sage.rings.valuation.valuation_space = sys.modules['sage.rings.valuation.valuation_space'] = valuation_space
 sage.rings.valuation.augmented_valuation = sys.modules['sage.rings.valuation.augmented_valuation'] = augmented_valuation
+sage.rings.valuation.inductive_valuation = sys.modules['sage.rings.valuation.inductive_valuation'] = inductive_valuation
 sage.rings.function_field.function_field_valuation = sys.modules['sage.rings.function_field.function_field_valuation'] = function_field_valuation
 
 # fix unpickling of factories
@@ -156,7 +156,7 @@ AUTHORS:
 #*****************************************************************************
 from inductive_valuation import _lift_to_maximal_precision
 from inductive_valuation import FinalInductiveValuation, NonFinalInductiveValuation, FiniteInductiveValuation, InfiniteInductiveValuation, InductiveValuation
-from valuation import InfiniteDiscretePseudoValuation, DiscreteValuation
+from valuation import InfiniteDiscretePseudoValuation, DiscreteValuation, _checks, simplification_policy
 
 from sage.misc.cachefunc import cached_method
 from sage.rings.all import infinity, QQ, ZZ
@@ -185,11 +185,15 @@ class AugmentedValuationFactory(UniqueFactory):
         True
 
     """
-    def create_key(self, base_valuation, phi, mu, check=True):
+    def create_key(self, base_valuation, phi, mu, check=True, flatten_residue_field=False):
         r"""
         Create a key which uniquely identifies the valuation over
         ``base_valuation`` which sends ``phi`` to ``mu``.
 
+        Valuations which only differ in ``flatten_residue_field`` are distinct
+        objects since their residue rings differ, see
+        :meth:`AugmentedValuation_base._residue_field_extension`.
+
         .. NOTE::
 
             The uniqueness that this factory provides is not why we chose to
@@ -207,6 +211,8 @@ class AugmentedValuationFactory(UniqueFactory):
             sage: ww = v.augmentation(x, 1)
             sage: w is ww
             True
+            sage: v.augmentation(x, 1, flatten_residue_field=True) is w
+            False
 
         """
         if check:
@@ -225,9 +231,9 @@ class AugmentedValuationFactory(UniqueFactory):
         if isinstance(base_valuation, AugmentedValuation_base):
             if phi.degree() == base_valuation.phi().degree():
                 # drop base_valuation and extend base_valuation._base_valuation instead
-                return self.create_key(base_valuation._base_valuation, phi, mu, check=check)
+                return self.create_key(base_valuation._base_valuation, phi, mu, check=check, flatten_residue_field=flatten_residue_field)
 
-        return base_valuation, phi, mu
+        return base_valuation, phi, mu, bool(flatten_residue_field)
 
     def create_object(self, version, key):
         r"""
@@ -241,17 +247,17 @@ class AugmentedValuationFactory(UniqueFactory):
             sage: w = v.augmentation(x^2 + x + 1, 1) # indirect doctest
 
         """
-        base_valuation, phi, mu = key
+        base_valuation, phi, mu, flatten_residue_field = key
 
         from valuation_space import DiscretePseudoValuationSpace
         parent = DiscretePseudoValuationSpace(base_valuation.domain())
         if mu is not infinity:
             if base_valuation.is_trivial():
-                return parent.__make_element_class__(FinalFiniteAugmentedValuation)(parent, base_valuation, phi, mu)
+                return parent.__make_element_class__(FinalFiniteAugmentedValuation)(parent, base_valuation, phi, mu, flatten_residue_field)
             else:
-                return parent.__make_element_class__(NonFinalFiniteAugmentedValuation)(parent, base_valuation, phi, mu)
+                return parent.__make_element_class__(NonFinalFiniteAugmentedValuation)(parent, base_valuation, phi, mu, flatten_residue_field)
         else:
-            return parent.__make_element_class__(InfiniteAugmentedValuation)(parent, base_valuation, phi, mu)
+            return parent.__make_element_class__(InfiniteAugmentedValuation)(parent, base_valuation, phi, mu, flatten_residue_field)
 
 AugmentedValuation = AugmentedValuationFactory("AugmentedValuation")
 
@@ -270,6 +276,10 @@ class AugmentedValuation_base(InductiveValuation):
 
     - ``mu`` -- a rational number such that ``mu > v(phi)`` or ``infinity``
 
+    - ``flatten_residue_field`` -- a boolean (default: ``False``), whether to
+      represent the residue field as an absolute field if it is a finite
+      field, see :meth:`_residue_field_extension`
+
     EXAMPLES::
 
         sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
@@ -287,7 +297,7 @@ class AugmentedValuation_base(InductiveValuation):
         sage: TestSuite(ww).run() # long time
 
     """
-    def __init__(self, parent, v, phi, mu):
+    def __init__(self, parent, v, phi, mu, flatten_residue_field=False):
         """
         TESTS::
 
@@ -306,6 +316,7 @@ class AugmentedValuation_base(InductiveValuation):
 
         self._base_valuation = v
         self._mu = mu
+        self._flatten_residue_field = flatten_residue_field
 
     @cached_method
     def equivalence_unit(self, s, reciprocal=False):
@@ -369,8 +380,10 @@ class AugmentedValuation_base(InductiveValuation):
         else:
             ret = self._base_valuation.element_with_valuation(s)
 
-        assert self.is_equivalence_unit(ret)
-        assert self(ret) == s
+        if _checks('paranoid'):
+            assert self.is_equivalence_unit(ret)
+        if _checks('cheap'):
+            assert self(ret) == s
         return ret
 
     @cached_method
@@ -495,7 +508,8 @@ class AugmentedValuation_base(InductiveValuation):
         """
         R = self._base_valuation.equivalence_unit(-self._base_valuation(self._phi))
         F = self._base_valuation.reduce(self._phi*R, check=False).monic()
-        assert F.is_irreducible()
+        if _checks('paranoid'):
+            assert F.is_irreducible()
         return F
 
     @cached_method
@@ -574,7 +588,7 @@ class AugmentedValuation_base(InductiveValuation):
             ret = []
             for v in base_valuations:
                 if v.is_key(phi):
-                    ret.append(AugmentedValuation(v, phi, self._mu))
+                    ret.append(AugmentedValuation(v, phi, self._mu, flatten_residue_field=self._flatten_residue_field))
                 else:
                     F = v.equivalence_decomposition(phi)
                     mu0 = v(phi)
@@ -584,7 +598,7 @@ class AugmentedValuation_base(InductiveValuation):
                         # the sum runs over all the factors in the equivalence decomposition of phi
                         # Solving for mu gives
                         mu = (self._mu - v(F.unit()) - sum([ee*v(ff) for ff,ee in F if ff != f])) / e
-                        ret.append(AugmentedValuation(v, f, mu))
+                        ret.append(AugmentedValuation(v, f, mu, flatten_residue_field=self._flatten_residue_field))
             return ret
 
         return super(AugmentedValuation_base, self).extensions(ring)
@@ -611,7 +625,7 @@ class AugmentedValuation_base(InductiveValuation):
                 return base
             from sage.rings.polynomial.polynomial_ring import is_PolynomialRing
             if is_PolynomialRing(ring) and ring.ngens() == 1:
-                return base.augmentation(self.phi().change_ring(ring.base()), self._mu)
+                return base.augmentation(self.phi().change_ring(ring.base()), self._mu, flatten_residue_field=self._flatten_residue_field)
         return super(AugmentedValuation_base, self).restriction(ring)
 
     def uniformizer(self):
@@ -742,7 +756,7 @@ class AugmentedValuation_base(InductiveValuation):
 
         """
         if scalar in QQ and scalar > 0 and scalar != 1:
-            return self._base_valuation.scale(scalar).augmentation(self.phi(), scalar*self._mu)
+            return self._base_valuation.scale(scalar).augmentation(self.phi(), scalar*self._mu, flatten_residue_field=self._flatten_residue_field)
         return super(AugmentedValuation_base, self).scale(scalar)
 
     def _residue_ring_generator_name(self):
@@ -777,6 +791,166 @@ class AugmentedValuation_base(InductiveValuation):
                 # there are no variable names (such as in QQ or GF(p))
                 return generator
 
+    @cached_method
+    def _residue_field_extension(self):
+        r"""
+        Return the field obtained by adjoining a root of :meth:`psi` to the
+        residue field of the base valuation.
+
+        OUTPUT:
+
+        A pair ``(field, flattening)``. If this valuation was created with
+        ``flatten_residue_field`` and the residue field of the base valuation
+        is a non-prime finite field, then ``field`` is an absolute finite
+        field and ``flattening`` is a pair consisting of the embedding of the
+        base residue field into ``field`` and the image of the root of
+        :meth:`psi`. Otherwise, ``field`` is the relative extension and
+        ``flattening`` is ``None``.
+
+        By default, the residue field of an augmentation is obtained by
+        adjoining a root of :meth:`psi` to the residue field of the base
+        valuation, which leads to towers of extensions for deep augmentation
+        chains. Arithmetic and factorization in such towers are much slower
+        than in an absolute finite field.
+
+        Note that elements of the base residue field must be mapped into
+        ``field`` through the embedding, see
+        :meth:`_residue_field_evaluation`; coercion into ``field`` might not
+        be defined or might not be compatible with the embedding.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<u> = Qq(4, 10)
+            sage: S.<x> = R[]
+            sage: v = GaussValuation(S)
+            sage: w = v.augmentation(x^2 + x + u, 1/2, flatten_residue_field=True)
+            sage: field, (embedding, root) = w._residue_field_extension()
+            sage: field
+            Finite Field in u1 of size 2^4
+            sage: w.psi().map_coefficients(embedding, field)(root)
+            0
+            sage: w.residue_ring()
+            Univariate Polynomial Ring in x over Finite Field in u1 of size 2^4
+
+        Without ``flatten_residue_field``, the residue field is a relative
+        extension::
+
+            sage: v.augmentation(x^2 + x + u, 1/2)._residue_field_extension()[1] is None
+            True
+
+        TESTS:
+
+        Reduction and lift, which go through the embedding and its section,
+        are inverse to each other on a flattened residue field::
+
+            sage: k = w.residue_ring().base()
+            sage: y = w.residue_ring().gen()
+            sage: F = y^2 + k.gen()*y + k.gen()^5
+            sage: w.reduce(w.lift(F)) == F
+            True
+            sage: f = w.lift(F) + 2*x^5
+            sage: w.reduce(w.lift(w.reduce(f))) == w.reduce(f)
+            True
+            sage: f = w.lift_to_key(y + k.gen()^3)
+            sage: w.is_key(f)
+            True
+
+        The flattening is inherited by further augmentations::
+
+            sage: ww = w.augmentation(f, w(f) + 1)
+            sage: ww._flatten_residue_field
+            True
+            sage: ww.reduce(ww.lift(ww.residue_ring().gen())) == ww.residue_ring().gen()
+            True
+
+        """
+        base = self._base_valuation.residue_ring().base()
+        if self.psi().degree() == 1:
+            # Do not call extension() if self.psi().degree() == 1:
+            # In that case the resulting field appears to be the same as the original field,
+            # however, it is not == to the original field (for finite fields at
+            # least) but a distinct copy (this is a bug in finite field's
+            # extension() implementation.)
+            return base, None
+
+        generator = self._residue_ring_generator_name()
+
+        from sage.rings.finite_rings.finite_field_base import is_FiniteField
+        if not self._flatten_residue_field or not is_FiniteField(base) or base.is_prime_field():
+            # extensions of prime fields are absolute fields already
+            return base.extension(self.psi(), names=generator), None
+
+        from sage.rings.all import GF
+        field = GF(base.cardinality()**self.psi().degree(), names=(generator,))
+        embedding = base.hom([base.modulus().change_ring(field).any_root()], field)
+        root = self.psi().map_coefficients(embedding, field).any_root()
+        return field, (embedding, root)
+
+    @cached_method
+    def _residue_field_section(self):
+        r"""
+        Return a function which writes an element of a flattened residue field
+        (see :meth:`_residue_field_extension`) as a polynomial in the root of
+        :meth:`psi` with coefficients in the residue field of the base
+        valuation.
+
+        The function returns the list of coefficients of this polynomial.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<u> = Qq(4, 5)
+            sage: S.<x> = R[]
+            sage: v = GaussValuation(S)
+            sage: w = v.augmentation(x^2 + x + u, 1/2, flatten_residue_field=True)
+            sage: field, (embedding, root) = w._residue_field_extension()
+            sage: w._residue_field_section()(root + 1)
+            [1, 1]
+
+        """
+        field, (embedding, root) = self._residue_field_extension()
+        base = embedding.domain()
+        d = self.psi().degree()
+        m = base.degree()
+
+        # express the coordinates over the prime field in terms of the basis
+        # root^i * gen^j of field over the prime field
+        basis = [root**i * embedding(base.gen()**j) for i in range(d) for j in range(m)]
+        from sage.matrix.constructor import matrix
+        A = matrix(field.prime_subfield(), [b._vector_() for b in basis])
+        A_inverse = ~A
+
+        def section(x):
+            coordinates = list(field(x)._vector_() * A_inverse)
+            return [base(coordinates[i*m:(i+1)*m]) for i in range(d)]
+        return section
+
+    def _residue_field_evaluation(self, F, generator=None):
+        r"""
+        Return the image of ``F``, a polynomial over the residue field of the
+        base valuation, when evaluated at ``generator`` (default: the
+        :meth:`_residue_field_generator`.)
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<u> = Qq(4, 5)
+            sage: S.<x> = R[]
+            sage: v = GaussValuation(S)
+            sage: w = v.augmentation(x^2 + x + u, 1/2)
+            sage: w._residue_field_evaluation(w.psi())
+            0
+
+        """
+        if generator is None:
+            generator = self._residue_field_generator()
+        field, flattening = self._residue_field_extension()
+        if flattening is None:
+            return F(generator)
+        embedding, _ = flattening
+        return F.map_coefficients(embedding, field)(generator)
+
     def _relative_size(self, f):
         r"""
         Return an estimate on the coefficient size of ``f``.
@@ -803,6 +977,7 @@ class AugmentedValuation_base(InductiveValuation):
             21
 
         """
+        f, _, _ = self._unpack_expansion(f)
         return self._base_valuation._relative_size(f)
 
     def is_negative_pseudo_valuation(self):
@@ -842,7 +1017,7 @@ class AugmentedValuation_base(InductiveValuation):
         """
         from sage.rings.polynomial.polynomial_ring import is_PolynomialRing
         if is_PolynomialRing(ring) and ring.ngens() == 1 and ring.variable_name() == self.domain().variable_name():
-            return self._base_valuation.change_domain(ring).augmentation(self.phi().change_ring(ring.base_ring()), self._mu, check=False)
+            return self._base_valuation.change_domain(ring).augmentation(self.phi().change_ring(ring.base_ring()), self._mu, check=False, flatten_residue_field=self._flatten_residue_field)
         return super(AugmentedValuation_base, self).change_domain(ring)
 
 
@@ -859,7 +1034,7 @@ class FinalAugmentedValuation(AugmentedValuation_base, FinalInductiveValuation):
         sage: w = v.augmentation(x, 1)
 
     """
-    def __init__(self, parent, v, phi, mu):
+    def __init__(self, parent, v, phi, mu, flatten_residue_field=False):
         r"""
         TESTS::
 
@@ -871,7 +1046,7 @@ class FinalAugmentedValuation(AugmentedValuation_base, FinalInductiveValuation):
             True
 
         """
-        AugmentedValuation_base.__init__(self, parent, v, phi, mu)
+        AugmentedValuation_base.__init__(self, parent, v, phi, mu, flatten_residue_field)
         FinalInductiveValuation.__init__(self, parent, phi)
 
     @cached_method
@@ -925,18 +1100,7 @@ class FinalAugmentedValuation(AugmentedValuation_base, FinalInductiveValuation):
 
         """
         # the following is correct, even if the polynomial ring is not over a field
-
-        base = self._base_valuation.residue_ring().base()
-        if self.psi().degree() > 1:
-            generator = self._residue_ring_generator_name()
-            return base.extension(self.psi(), names=generator)
-        else:
-            # Do not call extension() if self.psi().degree() == 1:
-            # In that case the resulting field appears to be the same as the original field,
-            # however, it is not == to the original field (for finite fields at
-            # least) but a distinct copy (this is a bug in finite field's
-            # extension() implementation.)
-            return base
+        return self._residue_field_extension()[0]
 
     def reduce(self, f, check=True, degree_bound=None, coefficients=None, valuations=None):
         r"""
@@ -944,7 +1108,8 @@ class FinalAugmentedValuation(AugmentedValuation_base, FinalInductiveValuation):
 
         INPUT:
 
-        - ``f`` -- an element in the domain of this valuation
+        - ``f`` -- an element in the domain of this valuation or its
+          :meth:`expansion`
 
         - ``check`` -- whether or not to check whether ``f`` has non-negative
           valuation (default: ``True``)
@@ -1020,7 +1185,7 @@ class FinalAugmentedValuation(AugmentedValuation_base, FinalInductiveValuation):
             x + 1
 
         """
-        f = self.domain().coerce(f)
+        f, coefficients, _ = self._unpack_expansion(f, coefficients=coefficients)
 
         if check:
             v = self(f)
@@ -1034,7 +1199,45 @@ class FinalAugmentedValuation(AugmentedValuation_base, FinalInductiveValuation):
         else:
             constant_term = coefficients[0]
         constant_term_reduced = self._base_valuation.reduce(constant_term)
-        return constant_term_reduced(self._residue_field_generator())
+        return self._residue_field_evaluation(constant_term_reduced)
+
+    def valuation_and_reduction(self, f):
+        r"""
+        Return the valuation of ``f`` and the reduction of `f\phi^{-i}c`,
+        where `i` is the index of the term of minimal valuation in the
+        expansion of ``f`` and `c` has valuation `-v(f_i)` for the base
+        valuation.
+
+        Only the single term of minimal valuation needs to be reduced; both
+        values are read off one :meth:`expansion` of ``f``.
+
+        INPUT:
+
+        - ``f`` -- an element of the domain of this valuation or its
+          :meth:`expansion`
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, TrivialValuation(QQ))
+            sage: w = v.augmentation(x - 1, 1)
+            sage: w.valuation_and_reduction((x - 1)^2 * (x + 1))
+            (2, 2)
+            sage: w.valuation_and_reduction(x + 1) == (0, w.reduce(x + 1))
+            True
+
+        """
+        from sage.rings.all import infinity
+        f = self.expansion(f)
+        valuations = f.valuations()
+        v = min(valuations + [infinity])
+        if v is infinity:
+            return v, self.residue_ring().zero()
+        # the terms of a final valuation have distinct valuations
+        i = valuations.index(v)
+        _, F = self._base_valuation.valuation_and_reduction(f.coefficients()[i])
+        return v, self._residue_field_evaluation(F)
 
     @cached_method
     def _residue_field_generator(self):
@@ -1065,12 +1268,16 @@ class FinalAugmentedValuation(AugmentedValuation_base, FinalInductiveValuation):
             u1
 
         """
+        flattening = self._residue_field_extension()[1]
         if self.psi().degree() == 1:
             ret = self.residue_ring()(-self.psi()[0])
+        elif flattening is not None:
+            ret = flattening[1]
         else:
             ret = self.residue_ring().gen()
 
-        assert self.psi()(ret).is_zero()
+        if _checks('cheap'):
+            assert self._residue_field_evaluation(self.psi(), ret).is_zero()
         return ret
 
     def lift(self, F):
@@ -1122,7 +1329,9 @@ class FinalAugmentedValuation(AugmentedValuation_base, FinalInductiveValuation):
 
         # Write F as a polynomial in self._residue_field_generator()
         # We only have to do that if psi is non-trivial
-        if self.psi().degree() > 1:
+        if self.psi().degree() > 1 and self._residue_field_extension()[1] is not None:
+            F = self._base_valuation.residue_ring()(self._residue_field_section()(F))
+        elif self.psi().degree() > 1:
             from sage.rings.polynomial.polynomial_quotient_ring_element import PolynomialQuotientRingElement
             from sage.rings.function_field.function_field_element import FunctionFieldElement_polymod
             if isinstance(F, PolynomialQuotientRingElement):
@@ -1131,7 +1340,8 @@ class FinalAugmentedValuation(AugmentedValuation_base, FinalInductiveValuation):
                 G = F.element()
             else:
                 G = F.polynomial()
-            assert(G(self._residue_field_generator()) == F)
+            if _checks('cheap'):
+                assert(G(self._residue_field_generator()) == F)
             F = G.change_variable_name(self._base_valuation.residue_ring().variable_name())
 
         H = self._base_valuation.lift(F)
@@ -1150,7 +1360,7 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
         sage: w = v.augmentation(x^2 + x + 1, 1)
 
     """
-    def __init__(self, parent, v, phi, mu):
+    def __init__(self, parent, v, phi, mu, flatten_residue_field=False):
         r"""
         TESTS::
 
@@ -1162,7 +1372,7 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
             True
 
         """
-        AugmentedValuation_base.__init__(self, parent, v, phi, mu)
+        AugmentedValuation_base.__init__(self, parent, v, phi, mu, flatten_residue_field)
         NonFinalInductiveValuation.__init__(self, parent, phi)
 
     @cached_method
@@ -1194,18 +1404,7 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
         if self.domain().base() not in Fields():
             raise NotImplementedError("only implemented for polynomial rings over fields")
 
-        base = self._base_valuation.residue_ring().base()
-        if self.psi().degree() > 1:
-            generator = self._residue_ring_generator_name()
-            base = base.extension(self.psi(), names=generator)
-        else:
-            # Do not call extension() if self.psi().degree() == 1:
-            # In that case the resulting field appears to be the same as the original field,
-            # however, it is not == to the original field (for finite fields at
-            # least) but a distinct copy (this is a bug in finite field's
-            # extension() implementation.)
-            pass
-        return base[self.domain().variable_name()]
+        return self._residue_field_extension()[0][self.domain().variable_name()]
 
     def reduce(self, f, check=True, degree_bound=None, coefficients=None, valuations=None):
         r"""
@@ -1213,7 +1412,8 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
 
         INPUT:
 
-        - ``f`` -- an element in the domain of this valuation
+        - ``f`` -- an element in the domain of this valuation or its
+          :meth:`expansion`
 
         - ``check`` -- whether or not to check whether ``f`` has non-negative
           valuation (default: ``True``)
@@ -1289,7 +1489,7 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
             x + 1
 
         """
-        f = self.domain().coerce(f)
+        f, coefficients, valuations = self._unpack_expansion(f, coefficients=coefficients, valuations=valuations)
 
         if self.lower_bound(f) > 0:
             return self.residue_ring().zero()
@@ -1336,11 +1536,63 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
         coefficients = coefficients[::tau]
 
         # recursively reduce the f_i Q^{i tau}
-        C = [self._base_valuation.reduce(c, check=False)(self._residue_field_generator()) if valuations[i] is not infinity else self._base_valuation.residue_ring().zero() for i,c in enumerate(coefficients)]
+        C = [self._residue_field_evaluation(self._base_valuation.reduce(c, check=False)) if valuations[i] is not infinity else self.residue_ring().base().zero() for i,c in enumerate(coefficients)]
 
         # reduce the Q'^i phi^i
         return self.residue_ring()(C)
 
+    def valuation_and_reduction(self, f):
+        r"""
+        Return the valuation of ``f`` and the reduction of `f\phi^{-i}c`,
+        where `0\le i<\tau` and `c` is such that `f\phi^{-i}c` has valuation
+        zero.
+
+        Here, `\tau` is the index of the value group of the base valuation in
+        the value group of this valuation. The terms of minimal valuation
+        `f_j\phi^j` in the expansion of ``f`` all have `j\equiv i` modulo
+        `\tau`. As in :meth:`reduce`, their coefficients are rewritten as
+        `f_jQ^{(j-i)/\tau}`, which all have the same valuation with respect to
+        the base valuation, and reduced recursively. So both values are read
+        off one :meth:`expansion` of ``f``.
+
+        INPUT:
+
+        - ``f`` -- an element of the domain of this valuation or its
+          :meth:`expansion`
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: w = v.augmentation(x^2 + x + 1, 1)
+            sage: f = 4*(x^2 + x + 1) + 8*x
+            sage: val, F = w.valuation_and_reduction(f); val
+            3
+            sage: F == w.reduce(f/8)
+            True
+            sage: w.valuation_and_reduction(x + 1) == (0, w.reduce(x + 1))
+            True
+
+        """
+        from sage.rings.all import infinity
+        f = self.expansion(f)
+        coefficients = f.coefficients()
+        valuations = f.valuations()
+        v = min(valuations + [infinity])
+        if v is infinity:
+            return v, self.residue_ring().zero()
+
+        tau = self.value_group().index(self._base_valuation.value_group())
+        indices = [j for j, w in enumerate(valuations) if w == v]
+        i = indices[0] % tau
+        C = [0] * ((indices[-1] - i)//tau + 1)
+        for j in indices:
+            assert (j - i) % tau == 0
+            _, F = self._base_valuation.valuation_and_reduction(coefficients[j] * self._Q((j - i)//tau))
+            C[(j - i)//tau] = self._residue_field_evaluation(F)
+        return v, self.residue_ring()(C)
+
     @cached_method
     def _residue_field_generator(self):
         r"""
@@ -1357,14 +1609,18 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
             u1
             
         """
+        flattening = self._residue_field_extension()[1]
         if self.residue_ring() == self._base_valuation.residue_ring():
             assert self.psi().degree() == 1
             ret = self.residue_ring().base()(-self.psi()[0])
+        elif flattening is not None:
+            ret = flattening[1]
         else:
             ret = self.residue_ring().base().gen()
 
         assert ret.parent() is self.residue_ring().base()
-        assert self.psi()(ret).is_zero()
+        if _checks('cheap'):
+            assert self._residue_field_evaluation(self.psi(), ret).is_zero()
         return ret
 
     def lift(self, F, report_coefficients=False):
@@ -1454,7 +1710,11 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
         # in the last step of reduce, the f_iQ^i are reduced, and evaluated at
         # the generator of the residue field
         # here, we undo this:
-        coeffs = [ R0(c if self.psi().degree()==1 else list(c._vector_() if hasattr(c, '_vector_') else c.list())) for c in F.coefficients(sparse=False) ]
+        if self._residue_field_extension()[1] is not None:
+            section = self._residue_field_section()
+            coeffs = [ R0(section(c)) for c in F.coefficients(sparse=False) ]
+        else:
+            coeffs = [ R0(c if self.psi().degree()==1 else list(c._vector_() if hasattr(c, '_vector_') else c.list())) for c in F.coefficients(sparse=False) ]
         coeffs = [ self._base_valuation.lift(c) for c in coeffs ]
         # now the coefficients correspond to the expansion with (f_iQ^i)(Q^{-1} phi)^i
 
@@ -1464,10 +1724,8 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
         if report_coefficients:
             return coeffs
 
-        RR = self.domain().change_ring(self.domain())
-
         tau = self.value_group().index(self._base_valuation.value_group())
-        ret = RR(coeffs)(self.phi()**tau)
+        ret = self._recompose(coeffs, tau)
         ret = ret.map_coefficients(lambda c:_lift_to_maximal_precision(c))
         return ret
 
@@ -1554,11 +1812,12 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
             coefficients[-2] %= self.phi()
         tau = self.value_group().index(self._base_valuation.value_group())
         vf = self._mu * tau * F.degree()
-        ret = self.domain().change_ring(self.domain())([c for c in coefficients])(self.phi()**tau)
+        ret = self._recompose(coefficients, tau)
         ret = self.simplify(ret, error=vf, force=True)
         ret = ret.map_coefficients(lambda c:_lift_to_maximal_precision(c))
         assert (ret == self.phi()) == (F == F.parent().gen())
-        assert self.is_key(ret)
+        if _checks('paranoid'):
+            assert self.is_key(ret)
         return ret
 
     @cached_method
@@ -1606,10 +1865,11 @@ class NonFinalAugmentedValuation(AugmentedValuation_base, NonFinalInductiveValua
         v = -self._mu * tau
         ret = self._pow(self._Q_reciprocal(1), e, error=v*e, effective_degree=0)
 
-        assert self.is_equivalence_unit(ret)
-        # esentially this checks that the reduction of Q'*phi^tau is the
-        # generator of the residue field
-        assert self._base_valuation.reduce(self._Q(e)*ret)(self._residue_field_generator()).is_one()
+        if _checks('paranoid'):
+            assert self.is_equivalence_unit(ret)
+            # esentially this checks that the reduction of Q'*phi^tau is the
+            # generator of the residue field
+            assert self._residue_field_evaluation(self._base_valuation.reduce(self._Q(e)*ret)).is_one()
 
         return ret
 
@@ -1629,7 +1889,7 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
         sage: w = v.augmentation(x^2 + x + u, 1/2)
 
     """
-    def __init__(self, parent, v, phi, mu):
+    def __init__(self, parent, v, phi, mu, flatten_residue_field=False):
         r"""
         EXAMPLES::
 
@@ -1642,7 +1902,7 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
             True
 
         """
-        AugmentedValuation_base.__init__(self, parent, v, phi, mu)
+        AugmentedValuation_base.__init__(self, parent, v, phi, mu, flatten_residue_field)
         FiniteInductiveValuation.__init__(self, parent, phi)
 
     @cached_method
@@ -1697,7 +1957,8 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
 
         INPUT:
 
-        - ``f`` -- a polynomial in the domain of this valuation
+        - ``f`` -- a polynomial in the domain of this valuation or its
+          :meth:`expansion`
 
         - ``coefficients`` -- the coefficients of ``f`` as produced by
           :meth:`coefficients` or ``None`` (default: ``None``); this can be
@@ -1728,7 +1989,11 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
             [+Infinity, +Infinity, +Infinity, 5]
 
         """
-        f = self.domain().coerce(f)
+        f, coefficients, valuations = self._unpack_expansion(f, coefficients=coefficients)
+        if valuations is not None:
+            for ret in valuations:
+                yield ret
+            return
 
         if call_error:
             lowest_valuation = infinity
@@ -1749,7 +2014,7 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
                         lowest_valuation = ret
                 yield ret
 
-    def simplify(self, f, error=None, force=False, effective_degree=None, size_heuristic_bound=32):
+    def simplify(self, f, error=None, force=False, effective_degree=None, size_heuristic_bound=None):
         r"""
         Return a simplified version of ``f``.
 
@@ -1759,7 +2024,8 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
 
         INPUT:
 
-        - ``f`` -- an element in the domain of this valuation
+        - ``f`` -- an element in the domain of this valuation or its
+          :meth:`expansion`
 
         - ``error`` -- a rational, infinity, or ``None`` (default: ``None``),
           the error allowed to introduce through the simplification
@@ -1774,7 +2040,8 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
 
         - ``size_heuristic_bound` -- when ``force`` is not set, the expected
           factor by which the coefficients need to shrink to perform an actual
-          simplification (default: 32)
+          simplification (default: ``None``, i.e., the bound of the current
+          :func:`simplification_policy`)
 
         EXAMPLES::
 
@@ -1787,20 +2054,36 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
             (u + 1)*2^-1 + O(2^4)
 
         """
-        f = self.domain().coerce(f)
+        f, coefficients, _ = self._unpack_expansion(f)
 
         if effective_degree is not None:
             if (QQ(f.degree())/self.phi().degree()).ceil() > effective_degree:
                 from itertools import islice
-                f = self.domain().change_ring(self.domain())(list(islice(self.coefficients(f), 0, effective_degree + 1, 1)))(self.phi())
+                if coefficients is None:
+                    coefficients = self.coefficients(f)
+                f = self._recompose(islice(coefficients, 0, effective_degree + 1, 1))
 
-        if not force and self._relative_size(f) < size_heuristic_bound:
-            return f
+        policy = simplification_policy()
+        if size_heuristic_bound is None:
+            size_heuristic_bound = policy.bound()
+
+        if not force:
+            size = self._relative_size(f)
+            policy.observe(size)
+            if size < size_heuristic_bound:
+                return f
 
         if error is None:
             error = self.upper_bound(f)
 
-        return self._base_valuation.simplify(f, error=error, force=force)
+        from time import time
+        start = time()
+        # we already decided to simplify, so the base valuation must not
+        # apply its own heuristic (and record the element a second time)
+        ret = self._base_valuation.simplify(f, error=error, force=True)
+        if not force:
+            policy.observe_simplification(size, self._relative_size(ret), time() - start)
+        return ret
 
     def lower_bound(self, f):
         r"""
@@ -1828,7 +2111,7 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
             0
 
         """
-        f = self.domain().coerce(f)
+        f, _, _ = self._unpack_expansion(f)
 
         if self.phi() == self.domain().gen():
             constant_valuation = self.restriction(f.base_ring())
@@ -1870,7 +2153,7 @@ class FiniteAugmentedValuation(AugmentedValuation_base, FiniteInductiveValuation
             1/2
 
         """
-        f = self.domain().coerce(f)
+        f, _, _ = self._unpack_expansion(f)
 
         len_coefficients_bound = (QQ(f.degree()) / self.phi().degree()).ceil()
         return self.restriction(f.base_ring())(f.leading_coefficient()) + len_coefficients_bound * self._mu
@@ -1890,7 +2173,7 @@ class FinalFiniteAugmentedValuation(FiniteAugmentedValuation, FinalAugmentedValu
         sage: w = v.augmentation(x, 1)
 
     """
-    def __init__(self, parent, v, phi, mu):
+    def __init__(self, parent, v, phi, mu, flatten_residue_field=False):
         r"""
         TESTS::
 
@@ -1902,8 +2185,8 @@ class FinalFiniteAugmentedValuation(FiniteAugmentedValuation, FinalAugmentedValu
             True
 
         """
-        FiniteAugmentedValuation.__init__(self, parent, v, phi, mu)
-        FinalAugmentedValuation.__init__(self, parent, v, phi, mu)
+        FiniteAugmentedValuation.__init__(self, parent, v, phi, mu, flatten_residue_field)
+        FinalAugmentedValuation.__init__(self, parent, v, phi, mu, flatten_residue_field)
 
 
 class NonFinalFiniteAugmentedValuation(FiniteAugmentedValuation, NonFinalAugmentedValuation):
@@ -1919,7 +2202,7 @@ class NonFinalFiniteAugmentedValuation(FiniteAugmentedValuation, NonFinalAugment
         sage: w = v.augmentation(x, 1)
 
     """
-    def __init__(self, parent, v, phi, mu):
+    def __init__(self, parent, v, phi, mu, flatten_residue_field=False):
         r"""
         TESTS::
     
@@ -1931,8 +2214,8 @@ class NonFinalFiniteAugmentedValuation(FiniteAugmentedValuation, NonFinalAugment
             True
     
         """
-        FiniteAugmentedValuation.__init__(self, parent, v, phi, mu)
-        NonFinalAugmentedValuation.__init__(self, parent, v, phi, mu)
+        FiniteAugmentedValuation.__init__(self, parent, v, phi, mu, flatten_residue_field)
+        NonFinalAugmentedValuation.__init__(self, parent, v, phi, mu, flatten_residue_field)
 
 
 class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValuation):
@@ -1949,7 +2232,7 @@ class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValua
         sage: w = v.augmentation(x, infinity)
 
     """
-    def __init__(self, parent, v, phi, mu):
+    def __init__(self, parent, v, phi, mu, flatten_residue_field=False):
         r"""
         TESTS::
 
@@ -1961,7 +2244,7 @@ class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValua
             True
 
         """
-        FinalAugmentedValuation.__init__(self, parent, v, phi, mu)
+        FinalAugmentedValuation.__init__(self, parent, v, phi, mu, flatten_residue_field)
         InfiniteInductiveValuation.__init__(self, parent, phi)
 
     @cached_method
@@ -2007,7 +2290,8 @@ class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValua
 
         INPUT:
 
-        - ``f`` -- a polynomial in the domain of this valuation
+        - ``f`` -- a polynomial in the domain of this valuation or its
+          :meth:`expansion`
 
         - ``coefficients`` -- the coefficients of ``f`` as produced by
           :meth:`coefficients` or ``None`` (default: ``None``); this can be
@@ -2033,7 +2317,7 @@ class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValua
             [0, +Infinity, +Infinity]
 
         """
-        f = self.domain().coerce(f)
+        f, coefficients, _ = self._unpack_expansion(f, coefficients=coefficients)
 
         num_infty_coefficients = f.degree() // self.phi().degree()
         if coefficients is not None:
@@ -2054,7 +2338,8 @@ class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValua
 
         INPUT:
 
-        - ``f`` -- an element in the domain of this valuation
+        - ``f`` -- an element in the domain of this valuation or its
+          :meth:`expansion`
 
         - ``error`` -- a rational, infinity, or ``None`` (default: ``None``),
           the error allowed to introduce through the simplification
@@ -2077,7 +2362,7 @@ class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValua
             (u + 1)*2^-1 + O(2^4)
 
         """
-        f = self.domain().coerce(f)
+        f, coefficients, _ = self._unpack_expansion(f)
 
         if error is None:
             error = self.upper_bound(f)
@@ -2085,7 +2370,8 @@ class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValua
         if error is infinity:
             return f
 
-        return self.domain()(self._base_valuation.simplify(self.coefficients(f).next(), error, force=force))
+        constant_coefficient = self.coefficients(f).next() if coefficients is None else coefficients[0]
+        return self.domain()(self._base_valuation.simplify(constant_coefficient, error, force=force))
 
     def lower_bound(self, f):
         r"""
@@ -2105,7 +2391,9 @@ class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValua
             +Infinity
 
         """
-        return self._base_valuation.lower_bound(self.coefficients(f).next())
+        f, coefficients, _ = self._unpack_expansion(f)
+        constant_coefficient = self.coefficients(f).next() if coefficients is None else coefficients[0]
+        return self._base_valuation.lower_bound(constant_coefficient)
 
     def upper_bound(self, f):
         r"""
@@ -2125,4 +2413,6 @@ class InfiniteAugmentedValuation(FinalAugmentedValuation, InfiniteInductiveValua
             +Infinity
 
         """
-        return self._base_valuation.upper_bound(self.coefficients(f).next())
+        f, coefficients, _ = self._unpack_expansion(f)
+        constant_coefficient = self.coefficients(f).next() if coefficients is None else coefficients[0]
+        return self._base_valuation.upper_bound(constant_coefficient)
@@ -20,6 +20,7 @@ AUTHORS:
 #*****************************************************************************
 from valuation import DiscretePseudoValuation
 from sage.misc.abstract_method import abstract_method
+from sage.structure.sage_object import SageObject
 
 from sage.misc.cachefunc import cached_method
 
@@ -79,6 +80,120 @@ class DevelopingValuation(DiscretePseudoValuation):
         """
         return self._phi
 
+    def expansion(self, f, coefficients=None, valuations=None, truncation=None):
+        r"""
+        Return the `\phi`-adic expansion of ``f`` as a
+        :class:`PhiAdicExpansion` which caches the coefficients of the
+        expansion, their valuations, the :meth:`newton_polygon`, and the
+        :meth:`effective_degree`.
+
+        All methods which take a polynomial ``f`` accept such an expansion
+        instead. Passing the same expansion to several methods avoids
+        computing the expansion of ``f`` repeatedly.
+
+        INPUT:
+
+        - ``f`` -- a polynomial in the domain of this valuation or a
+          :class:`PhiAdicExpansion`
+
+        - ``coefficients`` -- the coefficients of ``f`` in the :meth:`phi`-adic
+          expansion if known (default: ``None``)
+
+        - ``valuations`` -- the valuations of ``coefficients`` if known
+          (default: ``None``)
+
+        - ``truncation`` -- an integer or ``None`` (default: ``None``); if set,
+          ``coefficients`` and ``valuations`` only describe the expansion up to
+          the coefficient of `\phi^{\text{truncation}}`, see
+          :class:`PhiAdicExpansion`
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: w = v.augmentation(x^2 + x + 1, 1)
+            sage: f = w.expansion(x^4 + 2*x + 3); f
+            (x^2 + x + 1)-adic expansion of x^4 + 2*x + 3
+            sage: f.coefficients()
+            [3*x + 3, -2*x - 1, 1]
+            sage: f.valuations()
+            [0, 1, 2]
+            sage: w.effective_degree(f)
+            0
+            sage: w.expansion(f) is f
+            True
+
+        An expansion with respect to a valuation with the same key polynomial
+        shares the coefficients::
+
+            sage: ww = v.augmentation(x^2 + x + 1, 2)
+            sage: ww.expansion(f).valuations()
+            [0, 2, 4]
+
+        A truncated expansion is not shared::
+
+            sage: g = w.expansion(x^4 + 2*x + 3, coefficients=[3*x + 3], truncation=0)
+            sage: g.coefficients()
+            [3*x + 3]
+            sage: ww.expansion(g).coefficients()
+            [3*x + 3, -2*x - 1, 1]
+
+        An existing expansion is not modified when more information is
+        passed in::
+
+            sage: h = w.expansion(x^4 + 2*x + 3)
+            sage: w.expansion(h, valuations=[0, 1, 2]) is h
+            False
+            sage: h._valuations is None
+            True
+
+        """
+        if isinstance(f, PhiAdicExpansion):
+            if f.valuation() is self and truncation is None and (coefficients is None or f._coefficients is not None) and (valuations is None or f._valuations is not None):
+                return f
+            if f._truncation is None:
+                if coefficients is None and f.valuation().phi() == self.phi():
+                    coefficients = f._coefficients
+                if valuations is None and f.valuation() is self:
+                    valuations = f._valuations
+            f = f.polynomial()
+        return PhiAdicExpansion(self, f, coefficients=coefficients, valuations=valuations, truncation=truncation)
+
+    def _unpack_expansion(self, f, coefficients=None, valuations=None):
+        r"""
+        Return the polynomial underlying ``f`` together with the coefficients
+        and valuations of its :meth:`phi`-adic expansion as far as they are
+        already known.
+
+        This is a helper method for the methods which accept a polynomial or
+        its :meth:`expansion`.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: f = v.expansion(x + 2)
+            sage: f.valuations()
+            [1, 0]
+            sage: v._unpack_expansion(f)
+            (x + 2, [2, 1], [1, 0])
+            sage: v._unpack_expansion(x)
+            (x, None, None)
+
+        """
+        if isinstance(f, PhiAdicExpansion):
+            # a truncated expansion only describes f for the valuation that
+            # it was created for
+            if f.valuation() is self or f._truncation is None:
+                if coefficients is None and f.valuation().phi() == self.phi():
+                    coefficients = f._coefficients
+                if valuations is None and f.valuation() is self:
+                    valuations = f._valuations
+            f = f.polynomial()
+        return self.domain().coerce(f), coefficients, valuations
+
     def effective_degree(self, f, valuations=None):
         r"""
         Return the effective degree of ``f`` with respect to this valuation.
@@ -89,7 +204,8 @@ class DevelopingValuation(DiscretePseudoValuation):
 
         INPUT:
 
-        - ``f`` -- a non-zero polynomial in the domain of this valuation
+        - ``f`` -- a non-zero polynomial in the domain of this valuation or
+          its :meth:`expansion`
 
         EXAMPLES::
 
@@ -103,15 +219,7 @@ class DevelopingValuation(DiscretePseudoValuation):
             0
 
         """
-        f = self.domain().coerce(f)
-
-        if f.is_zero():
-            raise ValueError("the effective degree is only defined for non-zero polynomials")
-
-        if valuations is None:
-            valuations = list(self.valuations(f))
-        v = min(valuations)
-        return [i for i,w in enumerate(valuations) if w == v][-1]
+        return self.expansion(f, valuations=valuations).effective_degree()
 
     @cached_method
     def _pow(self, x, e, error, effective_degree):
@@ -142,13 +250,76 @@ class DevelopingValuation(DiscretePseudoValuation):
         else:
             return self.simplify(x*self._pow(x, e-1, error=error*(e-1)/e, effective_degree=effective_degree*(e-1)/e), error=error, effective_degree=effective_degree)
 
+    @cached_method
+    def _phi_power(self, k, tau=1):
+        r"""
+        Return `\phi^{\tau 2^k}` where `\phi` is :meth:`phi`.
+
+        These powers are used by :meth:`_recompose`.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: v._phi_power(2)
+            x^4
+            sage: v._phi_power(1, tau=3)
+            x^6
+
+        """
+        if k == 0:
+            return self.phi()**tau
+        ret = self._phi_power(k - 1, tau)
+        return ret * ret
+
+    def _recompose(self, coefficients, tau=1):
+        r"""
+        Return `\sum_i f_i\phi^{\tau i}` where the `f_i` are the
+        ``coefficients``.
+
+        This inverts :meth:`coefficients` (for ``tau`` one.) Instead of
+        evaluating a polynomial at `\phi^\tau` with Horner's scheme, we split
+        the coefficients at a power of two `m` and use that
+        `f = f_\text{low} + \phi^{\tau m} f_\text{high}`. The powers
+        `\phi^{\tau m}` are cached, so repeated recompositions only multiply
+        polynomials of balanced degrees.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: w = v.augmentation(x^2 + x + 1, 1)
+            sage: f = x^7 + 3*x^5 + 2*x + 1
+            sage: w._recompose(list(w.coefficients(f))) == f
+            True
+            sage: w._recompose([1, x], tau=2)
+            x^5 + 2*x^4 + 3*x^3 + 2*x^2 + x + 1
+
+        """
+        coefficients = [self.domain()(c) for c in coefficients]
+        if not coefficients:
+            return self.domain().zero()
+
+        def recompose(coefficients):
+            n = len(coefficients)
+            if n == 1:
+                return coefficients[0]
+            k = (n - 1).bit_length() - 1
+            m = 1 << k
+            return recompose(coefficients[:m]) + self._phi_power(k, tau) * recompose(coefficients[m:])
+
+        return recompose(coefficients)
+
     def coefficients(self, f):
         r"""
         Return the `\phi`-adic expansion of ``f``.
 
         INPUT:
 
-        - ``f`` -- a monic polynomial in the domain of this valuation
+        - ``f`` -- a monic polynomial in the domain of this valuation or its
+          :meth:`expansion`
 
         OUTPUT:
 
@@ -170,6 +341,12 @@ class DevelopingValuation(DiscretePseudoValuation):
 
         """
         domain = self.domain()
+        if isinstance(f, PhiAdicExpansion):
+            if f.valuation().phi() == self.phi() and (f.valuation() is self or f._truncation is None):
+                for c in f.coefficients():
+                    yield c
+                return
+            f = f.polynomial()
         f = domain.coerce(f)
 
         if f.degree() < self.phi().degree():
@@ -207,7 +384,8 @@ class DevelopingValuation(DiscretePseudoValuation):
 
         INPUT::
 
-        - ``f`` -- a polynomial in the domain of this valuation
+        - ``f`` -- a polynomial in the domain of this valuation or its
+          :meth:`expansion`
 
         EXAMPLES::
 
@@ -226,12 +404,7 @@ class DevelopingValuation(DiscretePseudoValuation):
             Finite Newton polygon with 2 vertices: (3, 3), (4, 4)
 
         """
-        f = self.domain().coerce(f)
-
-        from sage.geometry.newton_polygon import NewtonPolygon
-        if valuations is None:
-            valuations = self.valuations(f)
-        return NewtonPolygon(list(enumerate(valuations)))
+        return self.expansion(f, valuations=valuations).newton_polygon()
 
     def _call_(self, f):
         r"""
@@ -280,7 +453,8 @@ class DevelopingValuation(DiscretePseudoValuation):
 
         INPUT:
 
-        - ``f`` -- a polynomial in the domain of this valuation
+        - ``f`` -- a polynomial in the domain of this valuation or its
+          :meth:`expansion`
 
         OUTPUT:
 
@@ -318,3 +492,397 @@ class DevelopingValuation(DiscretePseudoValuation):
             if x == 0:
                 continue
             tester.assertEqual(self.effective_degree(x), 0)
+
+
+class PhiAdicExpansion(SageObject):
+    r"""
+    The `\phi`-adic expansion `f=\sum_i f_i\phi^i` of a polynomial `f` with
+    respect to a :class:`DevelopingValuation`.
+
+    The coefficients `f_i`, their valuations, the Newton polygon, and the
+    effective degree are computed when they are needed for the first time and
+    cached afterwards.
+
+    This class is not meant to be instantiated directly. Use
+    :meth:`DevelopingValuation.expansion` instead.
+
+    INPUT:
+
+    - ``valuation`` -- a :class:`DevelopingValuation`
+
+    - ``f`` -- a polynomial in the domain of ``valuation``
+
+    - ``coefficients`` -- the coefficients of ``f`` in the `\phi`-adic
+      expansion if known (default: ``None``)
+
+    - ``valuations`` -- the valuations of ``coefficients`` if known (default:
+      ``None``)
+
+    - ``truncation`` -- an integer or ``None`` (default: ``None``); if set,
+      ``coefficients`` and ``valuations`` describe only the expansion up to
+      the coefficient of `\phi^{\text{truncation}}`
+
+    .. NOTE::
+
+        Some algorithms only need the first few coefficients of an expansion.
+        If ``coefficients`` and ``valuations`` describe only such a truncated
+        expansion, then the methods of this class refer to that truncated
+        expansion. Such an expansion must be created with ``truncation`` so
+        that its coefficients are not reused by other valuations.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: R.<x> = QQ[]
+        sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+        sage: f = v.expansion(x^2 + 2*x + 4); f
+        x-adic expansion of x^2 + 2*x + 4
+
+    TESTS::
+
+        sage: isinstance(f, PhiAdicExpansion)
+        True
+
+    """
+    def __init__(self, valuation, f, coefficients=None, valuations=None, truncation=None):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: f = PhiAdicExpansion(v, x, [0, 1], [infinity, 0])
+            sage: f.valuations()
+            [+Infinity, 0]
+            sage: f.truncation() is None
+            True
+
+        """
+        self._valuation = valuation
+        self._f = valuation.domain().coerce(f)
+        self._coefficients = None if coefficients is None else list(coefficients)
+        self._valuations = None if valuations is None else list(valuations)
+        self._truncation = truncation
+
+    def _repr_(self):
+        r"""
+        Return a printable representation of this expansion.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: v.expansion(x + 1) # indirect doctest
+            x-adic expansion of x + 1
+
+        """
+        phi = self._valuation.phi()
+        if phi != phi.parent().gen():
+            phi = "(%s)"%(phi,)
+        return "%s-adic expansion of %s"%(phi, self._f)
+
+    def valuation(self):
+        r"""
+        Return the valuation with respect to which this expansion was
+        computed.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: v.expansion(x).valuation() is v
+            True
+
+        """
+        return self._valuation
+
+    def polynomial(self):
+        r"""
+        Return the polynomial `f` which this is an expansion of.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: v.expansion(x + 1).polynomial()
+            x + 1
+
+        """
+        return self._f
+
+    def truncation(self):
+        r"""
+        Return the index of the last coefficient that this expansion
+        describes, or ``None`` if it is not truncated.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: v.expansion(x^2 + 1, coefficients=[1, 0], truncation=1).truncation()
+            1
+
+        """
+        return self._truncation
+
+    def coefficients(self):
+        r"""
+        Return the coefficients `f_0, f_1, \dots` of this expansion.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2)).augmentation(x + 1, 1)
+            sage: v.expansion(x^2).coefficients()
+            [1, -2, 1]
+
+        """
+        if self._coefficients is None:
+            self._coefficients = list(self._valuation.coefficients(self._f))
+        return self._coefficients
+
+    def constant_coefficient(self):
+        r"""
+        Return the coefficient `f_0` of this expansion.
+
+        Unlike :meth:`coefficients`, this does not compute the full expansion
+        if it is not known yet.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2)).augmentation(x + 1, 1)
+            sage: v.expansion(x^2).constant_coefficient()
+            1
+
+        """
+        if self._coefficients is None:
+            return self._valuation.coefficients(self._f).next()
+        return self._coefficients[0]
+
+    def valuations(self):
+        r"""
+        Return the valuations of the `f_i\phi^i` of this expansion.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2)).augmentation(x + 1, 1)
+            sage: v.expansion(x^2).valuations()
+            [0, 2, 2]
+
+        """
+        if self._valuations is None:
+            self._valuations = list(self._valuation.valuations(self._f, coefficients=self.coefficients()))
+        return self._valuations
+
+    @cached_method
+    def newton_polygon(self):
+        r"""
+        Return the Newton polygon of this expansion.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2)).augmentation(x + 1, 1)
+            sage: v.expansion(x^2).newton_polygon()
+            Finite Newton polygon with 2 vertices: (0, 0), (2, 2)
+
+        """
+        from sage.geometry.newton_polygon import NewtonPolygon
+        return NewtonPolygon(list(enumerate(self.valuations())))
+
+    @cached_method
+    def lower_convex_hull(self):
+        r"""
+        Return the Newton polygon of this expansion as a
+        :class:`LowerConvexHull`.
+
+        Unlike :meth:`newton_polygon`, this does not construct a polyhedral
+        object. Use this when only the vertices and slopes of the polygon are
+        needed.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2)).augmentation(x + 1, 1)
+            sage: v.expansion(x^2).lower_convex_hull()
+            Lower convex hull with vertices (0, 0), (2, 2)
+
+        """
+        return LowerConvexHull(enumerate(self.valuations()))
+
+    @cached_method
+    def effective_degree(self):
+        r"""
+        Return the effective degree of this expansion, i.e., the largest `i`
+        such that `f_i\phi^i` has minimal valuation.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2)).augmentation(x + 1, 1)
+            sage: v.expansion(x^2).effective_degree()
+            0
+
+        """
+        if self._f.is_zero():
+            raise ValueError("the effective degree is only defined for non-zero polynomials")
+
+        valuations = self.valuations()
+        v = min(valuations)
+        return [i for i,w in enumerate(valuations) if w == v][-1]
+
+
+class LowerConvexHull(SageObject):
+    r"""
+    The lower convex hull of a finite set of points `(i, v_i)` with rational
+    `v_i`, i.e., a Newton polygon.
+
+    This is a lightweight replacement for
+    :class:`sage.geometry.newton_polygon.NewtonPolygon` which is used in the
+    inner loops of the Mac Lane algorithm. Since the points are sorted by
+    their first coordinate, the hull is computed in a single linear pass.
+
+    INPUT:
+
+    - ``points`` -- an iterable of pairs `(i, v_i)` with strictly increasing
+      integers `i`; points with `v_i` infinity are ignored
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: NP = LowerConvexHull(enumerate([infinity, 3, 1, 1, 0, 2])); NP
+        Lower convex hull with vertices (1, 3), (2, 1), (4, 0), (5, 2)
+        sage: NP.sides()
+        [(-2, 1), (-1/2, 2), (2, 1)]
+        sage: NP.principal_part()
+        Lower convex hull with vertices (1, 3), (2, 1), (4, 0)
+
+    TESTS::
+
+        sage: from sage.geometry.newton_polygon import NewtonPolygon
+        sage: points = [(0, 5), (1, 4), (2, 1), (3, 2), (4, 0), (6, 0), (7, 1)]
+        sage: LowerConvexHull(points).vertices() == [tuple(v) for v in NewtonPolygon(points).vertices()]
+        True
+        sage: LowerConvexHull(points).slopes() == NewtonPolygon(points).slopes()
+        True
+
+    """
+    def __init__(self, points):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: LowerConvexHull([(0, infinity)]).vertices()
+            []
+
+        """
+        from sage.rings.all import infinity, QQ
+        vertices = []
+        for i, v in points:
+            if v is infinity:
+                continue
+            v = QQ(v)
+            while len(vertices) >= 2:
+                (i0, v0), (i1, v1) = vertices[-2], vertices[-1]
+                # drop (i1, v1) if it is not strictly below the segment from
+                # (i0, v0) to (i, v)
+                if (v1 - v0) * (i - i0) >= (v - v0) * (i1 - i0):
+                    vertices.pop()
+                else:
+                    break
+            vertices.append((i, v))
+        self._vertices = vertices
+
+    def _repr_(self):
+        r"""
+        Return a printable representation of this polygon.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: LowerConvexHull([(0, 1), (1, 0)]) # indirect doctest
+            Lower convex hull with vertices (0, 1), (1, 0)
+
+        """
+        return "Lower convex hull with vertices %s"%(", ".join(["(%s, %s)"%(i, v) for i, v in self._vertices]),)
+
+    def vertices(self):
+        r"""
+        Return the vertices of this polygon ordered by their first coordinate.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: LowerConvexHull([(0, 1), (1, 1), (2, 1)]).vertices()
+            [(0, 1), (2, 1)]
+
+        """
+        return self._vertices
+
+    def sides(self):
+        r"""
+        Return the sides of this polygon from left to right as pairs of slope
+        and length (of the projection to the first coordinate.)
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: LowerConvexHull([(0, 2), (1, 1), (2, 0), (3, 1)]).sides()
+            [(-1, 2), (1, 1)]
+
+        """
+        return [((v1 - v0) / (i1 - i0), i1 - i0) for (i0, v0), (i1, v1) in zip(self._vertices, self._vertices[1:])]
+
+    def slopes(self, repetition=True):
+        r"""
+        Return the slopes of this polygon from left to right.
+
+        INPUT:
+
+        - ``repetition`` -- whether to repeat each slope by the length of its
+          side (default: ``True``)
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: NP = LowerConvexHull([(0, 2), (1, 1), (2, 0), (3, 1)])
+            sage: NP.slopes()
+            [-1, -1, 1]
+            sage: NP.slopes(repetition=False)
+            [-1, 1]
+
+        """
+        if repetition:
+            return [slope for slope, length in self.sides() for _ in range(length)]
+        return [slope for slope, length in self.sides()]
+
+    def principal_part(self):
+        r"""
+        Return the principal part of this polygon, i.e., the part made up by
+        the sides of negative slope.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: LowerConvexHull([(0, 2), (1, 1), (2, 1), (3, 1)]).principal_part()
+            Lower convex hull with vertices (0, 2), (1, 1)
+
+        """
+        vertices = self._vertices[:1]
+        for (i0, v0), (i1, v1) in zip(self._vertices, self._vertices[1:]):
+            if v1 >= v0:
+                break
+            vertices.append((i1, v1))
+        return LowerConvexHull(vertices)
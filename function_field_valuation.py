@@ -798,25 +798,43 @@ class InducedFunctionFieldValuation_base(FunctionFieldValuation_base):
             u1
 
         """
-        f = self.domain().coerce(f)
-
-        if self(f) > 0:
+        v, F = self.valuation_and_reduction(f)
+        if v > 0:
             return self.residue_field().zero()
-        if self(f) < 0:
+        if v < 0:
             raise ValueError
+        return F
 
-        base = self._base_valuation
+    def valuation_and_reduction(self, f):
+        r"""
+        Return the valuation of ``f`` and the reduction of ``f`` multiplied
+        by an element of valuation `-v(f)`.
 
-        num = f.numerator()
-        den = f.denominator()
+        The numerator and the denominator of ``f`` are each evaluated once
+        by the underlying valuation.
 
-        assert base(num) == base(den)
-        shift = base.element_with_valuation(-base(num))
-        num *= shift
-        den *= shift
-        ret = base.reduce(num) / base.reduce(den)
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: K.<x> = FunctionField(QQ)
+            sage: v = FunctionFieldValuation(K, x - 1)
+            sage: v.valuation_and_reduction((x - 1)^2 / x)
+            (2, 1)
+            sage: v.valuation_and_reduction(K.zero())
+            (+Infinity, 0)
+
+        """
+        from sage.rings.all import infinity
+        f = self.domain().coerce(f)
+        if f.is_zero():
+            return infinity, self.residue_field().zero()
+
+        base = self._base_valuation
+        v, num = base.valuation_and_reduction(f.numerator())
+        w, den = base.valuation_and_reduction(f.denominator())
+        ret = self.residue_field()(num) / self.residue_field()(den)
         assert not ret.is_zero()
-        return self.residue_field()(ret)
+        return v - w, ret
 
     def _repr_(self):
         r"""
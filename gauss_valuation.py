@@ -43,6 +43,7 @@ polynomial rings::
 #                  http://www.gnu.org/licenses/
 #*****************************************************************************
 from inductive_valuation import NonFinalInductiveValuation
+from valuation import simplification_policy
 
 from sage.misc.cachefunc import cached_method
 from sage.structure.unique_representation import UniqueRepresentation
@@ -241,7 +242,8 @@ class GaussValuation_generic(NonFinalInductiveValuation):
 
         INPUT:
 
-        - ``f`` -- a polynomial in the domain of this valuation
+        - ``f`` -- a polynomial in the domain of this valuation or its
+          :meth:`expansion`
 
         - ``coefficients`` -- the coefficients of ``f`` as produced by
           :meth:`coefficients` or ``None`` (default: ``None``); this can be
@@ -267,7 +269,11 @@ class GaussValuation_generic(NonFinalInductiveValuation):
             [4, 1, 0]
 
         """
-        f = self.domain().coerce(f)
+        f, coefficients, valuations = self._unpack_expansion(f, coefficients=coefficients)
+        if valuations is not None:
+            for ret in valuations:
+                yield ret
+            return
 
         if f.is_constant():
             yield self._base_valuation(f[0])
@@ -279,19 +285,7 @@ class GaussValuation_generic(NonFinalInductiveValuation):
             yield QQ(0)
             return
 
-        if call_error:
-            lowest_valuation = infinity
-        for c in coefficients or f.coefficients(sparse=False):
-            if call_error:
-                if lowest_valuation is not infinity:
-                    v = self._base_valuation.lower_bound(c)
-                    if v is infinity or v >= lowest_valuation:
-                        yield infinity
-                        continue
-            ret = self._base_valuation(c)
-            if call_error:
-                if ret is not infinity and (lowest_valuation is infinity or ret < lowest_valuation):
-                    lowest_valuation = ret
+        for ret in self._base_valuation._call_batch(coefficients or f.coefficients(sparse=False), call_error=call_error):
             yield ret
 
     @cached_method
@@ -317,7 +311,8 @@ class GaussValuation_generic(NonFinalInductiveValuation):
 
         INPUT:
 
-        - ``f`` -- an integral element of the domain of this valuation
+        - ``f`` -- an integral element of the domain of this valuation or its
+          :meth:`expansion`
 
         - ``check`` -- whether or not to check whether ``f`` has non-negative
           valuation (default: ``True``)
@@ -359,7 +354,7 @@ class GaussValuation_generic(NonFinalInductiveValuation):
             :meth: `lift`
 
         """
-        f = self.domain().coerce(f)
+        f, _, _ = self._unpack_expansion(f)
 
         if degree_bound is not None:
             f = f.truncate(degree_bound + 1)
@@ -371,6 +366,38 @@ class GaussValuation_generic(NonFinalInductiveValuation):
                 raise ValueError("reduction not defined for non-integral elements and %r is not integral over %r"%(f, self))
             raise
 
+    def valuation_and_reduction(self, f):
+        r"""
+        Return the valuation of ``f`` and the reduction of ``f`` multiplied
+        by a constant of valuation `-v(f)`.
+
+        Each coefficient of ``f`` is only evaluated once by the base
+        valuation, which computes its valuation and reduction together.
+
+        INPUT:
+
+        - ``f`` -- an element of the domain of this valuation or its
+          :meth:`expansion`
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: v.valuation_and_reduction(4*x^2 + 12*x + 32)
+            (2, x^2 + x)
+            sage: v.valuation_and_reduction(R.zero())
+            (+Infinity, 0)
+
+        """
+        from sage.rings.all import infinity
+        f, _, _ = self._unpack_expansion(f)
+        results = [self._base_valuation.valuation_and_reduction(c) for c in f.coefficients(sparse=False)]
+        v = min([w for w, _ in results] + [infinity])
+        if v is infinity:
+            return v, self.residue_ring().zero()
+        return v, self.residue_ring()([r if w == v else 0 for w, r in results])
+
     def lift(self, F):
         """
         Return a lift of ``F``.
@@ -638,12 +665,21 @@ class GaussValuation_generic(NonFinalInductiveValuation):
         """
         return self._base_valuation.is_trivial()
 
+    @cached_method
     def monic_integral_model(self, G):
         r"""
         Return a monic integral irreducible polynomial which defines the same
         extension of the base ring of the domain as the irreducible polynomial
         ``G`` together with maps between the old and the new polynomial.
 
+        ALGORITHM:
+
+        Write `G=\sum_{i=0}^n a_i x^i` with `a_n = 1` and let `\pi` be the
+        :meth:`uniformizer` of the base valuation. Then `\pi^{kn}G(x/\pi^k)`
+        has coefficients `\pi^{k(n-i)}a_i`. So the smallest `k` which makes it
+        integral is the ceiling of the maximum of `-v(a_i)/((n-i)v(\pi))`
+        which we compute directly from the valuations of the `a_i`.
+
         EXAMPLES::
 
             sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
@@ -656,22 +692,39 @@ class GaussValuation_generic(NonFinalInductiveValuation):
                Defn: (1 + O(2^5))*x |--> (2 + O(2^6))*x,
             (1 + O(2^5))*x^2 + (1 + 2^2 + 2^3 + O(2^5))*x + (1 + 2^2 + 2^3 + O(2^5)))
 
+        The model is computed only once for each polynomial::
+
+            sage: G = x^3 + x/8 + 1
+            sage: v.monic_integral_model(G) is v.monic_integral_model(G)
+            True
+            sage: v.monic_integral_model(G)[2]
+            (1 + O(2^5))*x^3 + (2 + O(2^6))*x + (2^6 + O(2^11))
+
         """
         if not G.is_monic():
             # this might fail if the base ring is not a field
             G = G / G.leading_coefficient()
 
+        from sage.rings.all import infinity, ZZ
         x = G.parent().gen()
+        n = G.degree()
         u = self._base_valuation.uniformizer()
+        vu = self._base_valuation(u)
 
-        factor = 1
-        substitution = x
-        H = G
-        while self(H) < 0:
+        coefficients = G.list()
+        k = ZZ(0)
+        for i, v in enumerate(self._base_valuation._call_batch(coefficients[:n])):
+            if v is not infinity and v < 0:
+                k = max(k, (-v / ((n - i) * vu)).ceil())
+
+        if k == 0:
+            substitution = x
+            H = G
+        else:
             # this might fail if the base ring is not a field
-            factor *= u
+            factor = u ** k
             substitution = x/factor
-            H = G(substitution) * (factor ** G.degree())
+            H = G.parent()([c * factor ** (n - i) for i, c in enumerate(coefficients)])
 
         assert H.is_monic()
         return H.parent().hom(substitution, G.parent()), G.parent().hom(x / substitution[1], H.parent()), H
@@ -747,10 +800,23 @@ class GaussValuation_generic(NonFinalInductiveValuation):
             sage: v._relative_size(1024*x + 1)
             1
 
+        Unless the current :class:`SimplificationPolicy` asks for all
+        coefficients to be considered::
+
+            sage: old = set_simplification_policy(SimplificationPolicy(all_coefficients=True))
+            sage: v._relative_size(1024*x + 1)
+            11
+            sage: v._relative_size(R.zero())
+            0
+            sage: _ = set_simplification_policy(old)
+
         """
+        f, _, _ = self._unpack_expansion(f)
+        if simplification_policy().all_coefficients():
+            return max([self._base_valuation._relative_size(c) for c in f.list()] or [0])
         return self._base_valuation._relative_size(f[0])
 
-    def simplify(self, f, error=None, force=False, size_heuristic_bound=32, effective_degree=None):
+    def simplify(self, f, error=None, force=False, size_heuristic_bound=None, effective_degree=None):
         r"""
         Return a simplified version of ``f``.
 
@@ -760,7 +826,8 @@ class GaussValuation_generic(NonFinalInductiveValuation):
 
         INPUT:
 
-        - ``f`` -- an element in the domain of this valuation
+        - ``f`` -- an element in the domain of this valuation or its
+          :meth:`expansion`
 
         - ``error`` -- a rational, infinity, or ``None`` (default: ``None``),
           the error allowed to introduce through the simplification
@@ -774,7 +841,8 @@ class GaussValuation_generic(NonFinalInductiveValuation):
 
         - ``size_heuristic_bound` -- when ``force`` is not set, the expected
           factor by which the coefficients need to shrink to perform an actual
-          simplification (default: 32)
+          simplification (default: ``None``, i.e., the bound of the current
+          :func:`simplification_policy`)
 
         EXAMPLES::
 
@@ -787,19 +855,31 @@ class GaussValuation_generic(NonFinalInductiveValuation):
             (2^-1 + O(2^4))*x^10 + 1 + O(2^5)
 
         """
-        f = self.domain().coerce(f)
+        f, _, _ = self._unpack_expansion(f)
 
         if effective_degree is not None:
             if effective_degree < f.degree():
                 f = f.truncate(effective_degree + 1)
 
-        if not force and self._relative_size(f) < size_heuristic_bound:
-            return f
+        policy = simplification_policy()
+        if size_heuristic_bound is None:
+            size_heuristic_bound = policy.bound()
+
+        if not force:
+            size = self._relative_size(f)
+            policy.observe(size)
+            if size < size_heuristic_bound:
+                return f
 
         if error is None:
             error = self.upper_bound(f)
 
-        return f.map_coefficients(lambda c: self._base_valuation.simplify(c, error=error, force=force))
+        from time import time
+        start = time()
+        ret = f.parent()(self._base_valuation._simplify_batch(f.list(), error=error, force=force))
+        if not force:
+            policy.observe_simplification(size, self._relative_size(ret), time() - start)
+        return ret
 
     def lower_bound(self, f):
         r"""
@@ -821,6 +901,7 @@ class GaussValuation_generic(NonFinalInductiveValuation):
 
         """
         from sage.rings.all import infinity, QQ
+        f, _, _ = self._unpack_expansion(f)
         coefficients = f.coefficients(sparse=True)
         coefficients.reverse()
         ret = infinity
@@ -849,7 +930,7 @@ class GaussValuation_generic(NonFinalInductiveValuation):
             0
 
         """
-        f = self.domain().coerce(f)  
+        f, _, _ = self._unpack_expansion(f)
         coefficients = f.coefficients(sparse=True)
         if not coefficients:
             from sage.rings.all import infinity
@@ -27,8 +27,8 @@ polynomial rings. Transactions of the American Mathematical Society, 40(3),
 #  the License, or (at your option) any later version.
 #                  http://www.gnu.org/licenses/
 #*****************************************************************************
-from valuation import DiscreteValuation, InfiniteDiscretePseudoValuation
-from developing_valuation import DevelopingValuation
+from valuation import DiscreteValuation, InfiniteDiscretePseudoValuation, _checks, _check_cancellation
+from developing_valuation import DevelopingValuation, PhiAdicExpansion
 
 from sage.misc.cachefunc import cached_method
 from sage.misc.abstract_method import abstract_method
@@ -49,6 +49,10 @@ class InductiveValuation(DevelopingValuation):
         sage: TestSuite(v).run() # long time
 
     """
+    # whether augmentations represent finite residue fields as absolute
+    # fields; overridden by augmented valuations, see AugmentedValuation
+    _flatten_residue_field = False
+
     def is_equivalence_unit(self, f, valuations=None):
         r"""
         Return whether ``f`` is an equivalence unit, i.e., an element of
@@ -56,7 +60,8 @@ class InductiveValuation(DevelopingValuation):
 
         INPUT:
 
-        - ``f`` -- a polynomial in the domain of this valuation
+        - ``f`` -- a polynomial in the domain of this valuation or its
+          :meth:`expansion`
 
         EXAMPLES::
 
@@ -72,11 +77,11 @@ class InductiveValuation(DevelopingValuation):
             True
 
         """
-        f = self.domain().coerce(f)
+        f = self.expansion(f, valuations=valuations)
 
-        if f.is_zero():
+        if f.polynomial().is_zero():
             return False
-        return self.effective_degree(f, valuations=valuations) == 0
+        return f.effective_degree() == 0
 
     def equivalence_reciprocal(self, f, coefficients=None, valuations=None, check=True):
         r"""
@@ -88,7 +93,7 @@ class InductiveValuation(DevelopingValuation):
         INPUT:
 
         - ``f`` -- a polynomial in the domain of this valuation which is an
-          :meth:`equivalence_unit`
+          :meth:`equivalence_unit`, or its :meth:`expansion`
 
         - ``coefficients`` -- the coefficients of ``f`` in the :meth:`phi`-adic
           expansion if known (default: ``None``)
@@ -152,7 +157,7 @@ class InductiveValuation(DevelopingValuation):
             1
 
         """
-        f = self.domain().coerce(f)
+        f = self.expansion(f, coefficients=coefficients, valuations=valuations)
 
         from sage.categories.fields import Fields
         if not self.domain().base_ring() in Fields():
@@ -160,23 +165,16 @@ class InductiveValuation(DevelopingValuation):
             raise NotImplementedError("only implemented for polynomial rings over fields")
 
         if check:
-            if coefficients is None:
-                coefficients = list(self.coefficients(f))
-            if valuations is None:
-                valuations = list(self.valuations(f, coefficients=coefficients))
-            if not self.is_equivalence_unit(f, valuations=valuations):
-                raise ValueError("f must be an equivalence unit but %r is not"%(f,))
+            if not self.is_equivalence_unit(f):
+                raise ValueError("f must be an equivalence unit but %r is not"%(f.polynomial(),))
 
-        if coefficients is None:
-            e0 = self.coefficients(f).next()
-        else:
-            e0 = coefficients[0]
+        e0 = f.constant_coefficient()
         
         # f is an equivalence unit, its valuation is given by the constant coefficient
-        if valuations is None:
+        if f._valuations is None:
             vf = self(e0)
         else:
-            vf = valuations[0]
+            vf = f._valuations[0]
 
         e0 = self.simplify(e0, error=vf)
         s_ = self.equivalence_unit(-vf)
@@ -218,6 +216,70 @@ class InductiveValuation(DevelopingValuation):
         """
         return self(self.phi())
 
+    def augmentation_data(self):
+        r"""
+        Return a compact description of this valuation which does not refer
+        to other valuations on the :meth:`domain`.
+
+        OUTPUT:
+
+        A triple ``(domain, base_valuation, steps)`` where ``domain`` is the
+        :meth:`domain` of this valuation, ``base_valuation`` is the valuation
+        that the underlying Gauss valuation is induced by, and ``steps`` is a
+        tuple of triples ``(coefficients, mu, flatten_residue_field)``, one
+        for each valuation in the :meth:`augmentation_chain` but the Gauss
+        valuation, consisting of the coefficients of the key polynomial, its
+        valuation, and whether the residue field is flattened (see
+        :meth:`augmentation`.)
+
+        This is used when pickling inductive valuations. Unpickling goes
+        through :meth:`augmentation` (and ultimately the factories) without
+        checking the key polynomials again.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: v.augmentation_data()
+            (Univariate Polynomial Ring in x over Rational Field, 2-adic valuation, ())
+            sage: w = v.augmentation(x, 1/2).augmentation(x^2 + 2, 3/2)
+            sage: w.augmentation_data()
+            (Univariate Polynomial Ring in x over Rational Field,
+             2-adic valuation,
+             (((0, 1), 1/2, False), ((2, 0, 1), 3/2, False)))
+
+        TESTS::
+
+            sage: loads(dumps(w)) is w
+            True
+            sage: u = w.augmentation(x^2 + 2, infinity)
+            sage: loads(dumps(u)) is u
+            True
+            sage: u = w.augmentation(x^2 + 2, infinity, flatten_residue_field=True)
+            sage: loads(dumps(u)) is u
+            True
+
+        """
+        chain = self.augmentation_chain()[::-1]
+        steps = tuple((tuple(v.phi().list()), v.mu(), v._flatten_residue_field) for v in chain[1:])
+        return self.domain(), chain[0]._base_valuation, steps
+
+    def __reduce__(self):
+        r"""
+        Return a compact representation of this valuation for pickling.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2)).augmentation(x, 1)
+            sage: loads(dumps(v)) is v # indirect doctest
+            True
+
+        """
+        return _inductive_valuation_from_augmentation_data, self.augmentation_data()
+
     @abstract_method
     def equivalence_unit(self, s, reciprocal=False):
         """
@@ -620,7 +682,7 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
         FiniteInductiveValuation.__init__(self, parent, phi)
         DiscreteValuation.__init__(self, parent)
 
-    def augmentation(self, phi, mu, check=True):
+    def augmentation(self, phi, mu, check=True, flatten_residue_field=None):
         r"""
         Return the inductive valuation which extends this valuation by mapping
         ``phi`` to ``mu``.
@@ -637,6 +699,13 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
         - ``check`` -- a boolean (default: ``True``), whether or not to check
           the correctness of the parameters
 
+        - ``flatten_residue_field`` -- a boolean or ``None`` (default:
+          ``None``), whether the residue field of the augmentation should be
+          an absolute field if it is a non-prime finite field; if ``None``,
+          the setting of this valuation is used, so that the augmentations
+          created by :meth:`mac_lane_step` inherit it, see
+          :meth:`AugmentedValuation_base._residue_field_extension`
+
         EXAMPLES::
 
             sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
@@ -671,8 +740,10 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
             :meth:`AugmentedValuation`
 
         """
+        if flatten_residue_field is None:
+            flatten_residue_field = self._flatten_residue_field
         from augmented_valuation import AugmentedValuation
-        return AugmentedValuation(self, phi, mu, check)
+        return AugmentedValuation(self, phi, mu, check, flatten_residue_field)
 
     def mac_lane_step(self, G, principal_part_bound=None, assume_squarefree=False, assume_equivalence_irreducible=False, report_degree_bounds_and_caches=False, coefficients=None, valuations=None, check=True):
         r"""
@@ -685,7 +756,7 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
         INPUT:
 
         - ``G`` -- a sqaurefree monic non-constant integral polynomial ``G``
-          which is not an :meth:`equivalence_unit`
+          which is not an :meth:`equivalence_unit`, or its :meth:`expansion`
 
         - ``principal_part_bound`` -- an integer or ``None`` (default:
           ``None``), a bound on the length of the principal part, i.e., the
@@ -725,6 +796,15 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
             [ Gauss valuation induced by Valuation on rational function field induced by [ Gauss valuation induced by 3-adic valuation, v(x) = 1/3 ], v(y + x) = 2/3 ]
 
         """
+        _check_cancellation([self])
+
+        if isinstance(G, PhiAdicExpansion):
+            if G.valuation() is self:
+                if coefficients is None:
+                    coefficients = G._coefficients
+                if valuations is None:
+                    valuations = G._valuations
+            G = G.polynomial()
         G = self.domain().coerce(G)
 
         if G.is_constant():
@@ -748,24 +828,30 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
                 valuations = islice(valuations, 0, principal_part_bound + 1, 1)
             valuations = list(valuations)
 
+        # the (possibly truncated) expansion of G which is shared by the
+        # checks and the equivalence decomposition below
+        expansion = self.expansion(G, coefficients=coefficients, valuations=valuations, truncation=principal_part_bound or None)
+
         if check and min(valuations) < 0:
             raise ValueError("G must be integral")
 
-        if check and self.is_equivalence_unit(G, valuations=valuations):
+        if check and self.is_equivalence_unit(expansion):
             raise ValueError("G must not be an equivalence-unit")
 
         if check and not assume_squarefree and not G.is_squarefree():
             raise ValueError("G must be squarefree")
 
         from sage.rings.all import infinity
-        assert self(G) is not infinity # this is a valuation and G is non-zero
+        if _checks('paranoid'):
+            assert self(G) is not infinity # this is a valuation and G is non-zero
 
         ret = []
 
-        F = self.equivalence_decomposition(G, assume_not_equivalence_unit=True, coefficients=coefficients, valuations=valuations, compute_unit=False, degree_bound=principal_part_bound)
+        F = self.equivalence_decomposition(expansion, assume_not_equivalence_unit=True, compute_unit=False, degree_bound=principal_part_bound)
         assert len(F), "%s equivalence-decomposes as an equivalence-unit %s"%(G, F)
         if len(F) == 1 and F[0][1] == 1 and F[0][0].degree() == G.degree():
-            assert self.is_key(G, assume_equivalence_irreducible=assume_equivalence_irreducible)
+            if _checks('paranoid'):
+                assert self.is_key(G, assume_equivalence_irreducible=assume_equivalence_irreducible)
             ret.append((self.augmentation(G, infinity, check=False), G.degree(), principal_part_bound, None, None))
         else:
             for phi,e in F:
@@ -778,7 +864,8 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
                     assert not G.base_ring().is_exact()
                     prec = min([c.precision_absolute() for c in phi.list()])
                     g = G.map_coefficients(lambda c:c.add_bigoh(prec))
-                    assert self.is_key(g)
+                    if _checks('paranoid'):
+                        assert self.is_key(g)
                     ret.append((self.augmentation(g, infinity, check=False), g.degree(), principal_part_bound, None, None))
                     assert len(F) == 1
                     break
@@ -817,11 +904,12 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
                     w_valuations = islice(w_valuations, 0, principal_part_bound + 1, 1)
                 w_valuations = list(w_valuations)
 
-                NP = w.newton_polygon(G, valuations=w_valuations).principal_part()
+                NP = w.expansion(G, coefficients=w_coefficients, valuations=w_valuations, truncation=principal_part_bound or None).lower_convex_hull().principal_part()
 
                 verbose("Newton-Polygon for v(phi)=%s : %s"%(self(phi), NP), level=11)
-                slopes = NP.slopes(repetition=True)
-                multiplicities = {slope : len([s for s in slopes if s == slope]) for slope in slopes}
+                # the slopes of the sides are distinct, their multiplicities
+                # are the lengths of the sides
+                multiplicities = dict(NP.sides())
                 slopes = multiplicities.keys()
                 if NP.vertices()[0][0] != 0:
                     slopes = [-infinity] + slopes
@@ -846,7 +934,7 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
                             phi[i-best] = phi[i-best].add_bigoh(w(c)-w(q[best]))
 
                     phi = G.parent()(phi)
-                    w = self._base_valuation.augmentation(phi, infinity, check=False)
+                    w = self._base_valuation.augmentation(phi, infinity, check=False, flatten_residue_field=self._flatten_residue_field)
                     ret.append((w, phi.degree(), principal_part_bound, None, None))
                     continue
 
@@ -857,11 +945,13 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
                     new_valuations = [val - (j*slope if slope is not -infinity else (0 if j == 0 else -infinity)) for j,val in enumerate(w_valuations)]
                     base = self
                     if phi.degree() == base.phi().degree():
-                        assert new_mu > self(phi)
+                        if _checks('cheap'):
+                            assert new_mu > self(phi)
                         if not base.is_gauss_valuation():
                             base = base._base_valuation
-                    w = base.augmentation(phi, new_mu, check=False)
-                    assert slope is -infinity or 0 in w.newton_polygon(G).slopes(repetition=False)
+                    w = base.augmentation(phi, new_mu, check=False, flatten_residue_field=self._flatten_residue_field)
+                    if _checks('paranoid'):
+                        assert slope is -infinity or 0 in w.expansion(G).lower_convex_hull().slopes(repetition=False)
 
                     from sage.rings.all import ZZ
                     assert (phi.degree() / self.phi().degree()) in ZZ 
@@ -966,12 +1056,13 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
             False
 
         """
-        f = self.domain().coerce(f)
+        f = self.expansion(f)
+        expansion, f = f, f.polynomial()
 
         if f.is_constant():
             return False
     
-        if not assume_equivalence_irreducible and not self.is_equivalence_irreducible(f):
+        if not assume_equivalence_irreducible and not self.is_equivalence_irreducible(expansion):
             # any factor divides f with respect to this valuation
             return False
 
@@ -985,12 +1076,13 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
             return v.is_minimal(f / f.leading_coefficient())
         
         if self.is_gauss_valuation():
-            if self(f) == 0:
-                F = self.reduce(f, check=False)
+            if min(expansion.valuations()) == 0:
+                F = self.reduce(expansion, check=False)
                 assert not F.is_constant()
                 return F.is_irreducible()
             else:
-                assert(self(f) <= 0) # f is monic
+                if _checks('cheap'):
+                    assert(self(f) <= 0) # f is monic
                 # f is not minimal:
                 # Let g be f stripped of its leading term, i.e., g = f - x^n.
                 # Then g and f are equivalent with respect to this valuation
@@ -1007,10 +1099,13 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
         else:
             tau = self.value_group().index(self._base_valuation.value_group())
             # see Theorem 9.4 of [ML1936']
-            return list(self.valuations(f))[-1] == self(f) and \
-                   list(self.coefficients(f))[-1].is_constant() and \
-                   list(self.valuations(f))[0] == self(f) and \
-                   tau.divides(len(list(self.coefficients(f))) - 1)
+            valuations = expansion.valuations()
+            coefficients = expansion.coefficients()
+            vf = min(valuations)
+            return valuations[-1] == vf and \
+                   coefficients[-1].is_constant() and \
+                   valuations[0] == vf and \
+                   tau.divides(len(coefficients) - 1)
 
     def _equivalence_reduction(self, f, coefficients=None, valuations=None, degree_bound=None):
         r"""
@@ -1032,7 +1127,7 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
             (1, 4, x^2 + 1)
 
         """
-        f = self.domain().coerce(f)
+        f = self.expansion(f, coefficients=coefficients, valuations=valuations)
 
         # base change from R[x] to K[x], so divisions work and sufficient
         # elements of negative valuation exist
@@ -1040,12 +1135,11 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
             domain = self.domain().change_ring(self.domain().base_ring().fraction_field())
             v = self.extension(domain)
             assert self.residue_ring() is v.residue_ring()
-            return v._equivalence_reduction(f)
+            return v._equivalence_reduction(f.polynomial())
 
-        if coefficients is None:
-            coefficients = list(self.coefficients(f))
-        if valuations is None:
-            valuations = list(self.valuations(f, coefficients=coefficients))
+        coefficients = f.coefficients()
+        valuations = f.valuations()
+        f = f.polynomial()
         valuation = min(valuations)
         for phi_divides in range(len(valuations)):
             # count how many times phi divides f
@@ -1053,9 +1147,7 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
                 break
 
         if phi_divides:
-            from sage.rings.all import PolynomialRing
-            R = PolynomialRing(f.parent(), 'phi')
-            f = R(coefficients[phi_divides:])(self.phi())
+            f = self._recompose(coefficients[phi_divides:])
         valuations = [v-self.mu()*phi_divides for v in valuations[phi_divides:]]
         coefficients = coefficients[phi_divides:]
         valuation = min(valuations)
@@ -1081,6 +1173,7 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
         INPUT:
 
         - ``f`` -- a non-constant polynomial in the domain of this valuation
+          or its :meth:`expansion`
 
         EXAMPLES::
 
@@ -1096,17 +1189,17 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
             False
 
         """
-        f = self.domain().coerce(f)
+        f = self.expansion(f, coefficients=coefficients, valuations=valuations)
 
         if not self.domain().base_ring().is_field():
             domain = self.domain().change_ring(self.domain().base_ring().fraction_field())
             v = self.extension(domain)
-            return v.is_equivalence_irreducible(v.domain()(f))
+            return v.is_equivalence_irreducible(v.domain()(f.polynomial()))
 
-        if f.is_constant():
+        if f.polynomial().is_constant():
             raise ValueError("f must not be constant")
 
-        _, phi_divides, F = self._equivalence_reduction(f, coefficients=coefficients, valuations=valuations)
+        _, phi_divides, F = self._equivalence_reduction(f)
         if phi_divides == 0:
             return F.is_constant() or F.is_irreducible()
         if phi_divides == 1:
@@ -1123,7 +1216,8 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
 
         INPUT:
 
-        - ``f`` -- a non-zero polynomial in the domain of this valuation
+        - ``f`` -- a non-zero polynomial in the domain of this valuation or
+          its :meth:`expansion`
 
         - ``assume_not_equivalence_unit`` -- whether or not to assume that
           ``f`` is not an :meth:`equivalence_unit` (default: ``False``)
@@ -1224,13 +1318,14 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
         363-395.
 
         """
-        f = self.domain().coerce(f)
+        expansion = self.expansion(f, coefficients=coefficients, valuations=valuations)
+        f = expansion.polynomial()
 
         if f.is_zero():
             raise ValueError("equivalence decomposition of zero is not defined")
 
         from sage.structure.factorization import Factorization
-        if not assume_not_equivalence_unit and self.is_equivalence_unit(f):
+        if not assume_not_equivalence_unit and self.is_equivalence_unit(expansion):
             return Factorization([], unit=f, sort=False)
 
         if not self.domain().base_ring().is_field():
@@ -1239,7 +1334,7 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
             ret = v.equivalence_decomposition(v.domain()(f))
             return Factorization([(g.change_ring(self.domain().base_ring()),e) for g,e in ret], unit=ret.unit().change_ring(self.domain().base_ring()), sort=False)
 
-        valuation, phi_divides, F = self._equivalence_reduction(f, coefficients=coefficients, valuations=valuations, degree_bound=degree_bound)
+        valuation, phi_divides, F = self._equivalence_reduction(expansion, degree_bound=degree_bound)
         F = F.factor()
         from sage.misc.misc import verbose
         verbose("%s factors as %s = %s in reduction"%(f, F.prod(), F), level=20)
@@ -1278,7 +1373,7 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
 
         ret = Factorization(F, unit=unit, sort=False)
 
-        if compute_unit:
+        if compute_unit and _checks('paranoid'):
             assert self.is_equivalent(ret.prod(), f) # this might fail because of leading zeros in inexact rings
             assert self.is_equivalence_unit(ret.unit())
 
@@ -1292,7 +1387,8 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
 
         INPUT:
 
-        - ``f`` -- a non-zero polynomial which is not an equivalence unit
+        - ``f`` -- a non-zero polynomial which is not an equivalence unit, or
+          its :meth:`expansion`
 
         OUTPUT:
 
@@ -1327,7 +1423,8 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
             True
 
         """
-        f = self.domain().coerce(f)
+        expansion = self.expansion(f)
+        f = expansion.polynomial()
 
         from sage.categories.fields import Fields
         if not self.domain().base_ring() in Fields():
@@ -1336,27 +1433,30 @@ class NonFinalInductiveValuation(FiniteInductiveValuation, DiscreteValuation):
         if f.is_zero():
             raise ValueError("zero has no minimal representative")
 
-        degree = self.effective_degree(f)
+        degree = expansion.effective_degree()
         if degree == 0:
             raise ValueError("equivalence units can not have a minimal representative")
 
-        e = list(self.coefficients(f))[degree]
+        e = expansion.coefficients()[degree]
         h = self.equivalence_reciprocal(e).map_coefficients(lambda c:_lift_to_maximal_precision(c))
-        g = h*f
-        vg = self(g)
+        g = self.expansion(h*f)
+        vg = min(g.valuations())
 
-        coeffs = [c if v == vg else c.parent().zero() for v,c in zip(self.valuations(g), self.coefficients(g))]
+        coeffs = [c if v == vg else c.parent().zero() for v,c in zip(g.valuations(), g.coefficients())]
         coeffs[degree] = self.domain().base_ring().one()
-        ret = sum([c*self._phi**i for i,c in enumerate(coeffs)])
+        ret = self._recompose(coeffs)
 
-        assert self.effective_degree(ret) == degree
         assert ret.is_monic()
-        assert self.is_minimal(ret)
+        if _checks('cheap'):
+            assert self.effective_degree(ret) == degree
+        if _checks('paranoid'):
+            assert self.is_minimal(ret)
 
         from sage.structure.factorization import Factorization
         ret = Factorization([(ret, 1)], unit=e, sort=False)
 
-        assert self.is_equivalent(ret.prod(), f) # this might fail because of leading zeros
+        if _checks('paranoid'):
+            assert self.is_equivalent(ret.prod(), f) # this might fail because of leading zeros
         return ret
 
     @abstract_method
@@ -1559,3 +1659,27 @@ def _lift_to_maximal_precision(c):
     """
     return c if c.parent().is_exact() else c.lift_to_precision()
 
+
+def _inductive_valuation_from_augmentation_data(domain, base_valuation, steps):
+    r"""
+    Return the inductive valuation described by ``domain``,
+    ``base_valuation``, and ``steps`` as produced by
+    :meth:`InductiveValuation.augmentation_data`.
+
+    The key polynomials in ``steps`` are not checked.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: from mac_lane.inductive_valuation import _inductive_valuation_from_augmentation_data # optional: standalone
+        sage: R.<x> = QQ[]
+        sage: v = GaussValuation(R, pAdicValuation(QQ, 2)).augmentation(x, 1)
+        sage: _inductive_valuation_from_augmentation_data(*v.augmentation_data()) is v
+        True
+
+    """
+    from gauss_valuation import GaussValuation
+    ret = GaussValuation(domain, base_valuation)
+    for coefficients, mu, flatten_residue_field in steps:
+        ret = ret.augmentation(domain(list(coefficients)), mu, check=False, flatten_residue_field=flatten_residue_field)
+    return ret
@@ -77,7 +77,8 @@ AUTHORS:
 #                  http://www.gnu.org/licenses/
 #*****************************************************************************
 from sage.misc.abstract_method import abstract_method
-from valuation import DiscretePseudoValuation, InfiniteDiscretePseudoValuation, DiscreteValuation
+from valuation import DiscretePseudoValuation, InfiniteDiscretePseudoValuation, DiscreteValuation, _check_cancellation
+from developing_valuation import LowerConvexHull
 from sage.structure.factory import UniqueFactory
 
 class LimitValuationFactory(UniqueFactory):
@@ -229,6 +230,34 @@ class LimitValuation_generic(DiscretePseudoValuation):
         F = self._approximation.reduce(f, check=check)
         return self.residue_ring()(F)
 
+    def valuation_and_reduction(self, f):
+        r"""
+        Return the valuation of ``f`` and the reduction of ``f`` multiplied
+        by an element of valuation `-v(f)`.
+
+        The approximation is improved once so that it determines the
+        valuation of ``f``; it then also determines the reduction, so both
+        values are computed by the approximation in a single pass.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: K = QQ
+            sage: R.<t> = K[]
+            sage: L.<t> = K.extension(t^2 + 1)
+            sage: v = pAdicValuation(QQ, 29)
+            sage: w = v.extensions(L)[0]
+            sage: u = w._base_valuation
+            sage: val, F = u.valuation_and_reduction(29*t + 29)
+            sage: val == u(29*t + 29), F == u.reduce(t + 1)
+            (True, True)
+
+        """
+        f = self.domain().coerce(f)
+        self._improve_approximation_for_call(f)
+        v, F = self._approximation.valuation_and_reduction(f)
+        return v, self.residue_ring()(F)
+
     def _call_(self, f):
         r"""
         Return the valuation of ``f``.
@@ -399,6 +428,136 @@ class MacLaneLimitValuation(LimitValuation_generic, InfiniteDiscretePseudoValuat
         self._next_coefficients = None
         self._next_valuations = None
 
+        self._refinement_jumps = False
+        self._max_refinement_jump = 8
+        self._max_refinement_steps = None
+        self._mu_increment = None
+        self._refinement_statistics = {'steps': 0, 'precision reached': 0}
+        self._certified_refinement = False
+        self._precision_targets = {}
+
+    def set_refinement_policy(self, jumps=None, max_jump=None, max_steps=None, certified=None):
+        r"""
+        Configure how the approximation of this valuation is improved when it
+        is not precise enough to evaluate an element.
+
+        Only the settings which are passed are changed, the others keep their
+        current values.
+
+        .. WARNING::
+
+            Limit valuations are unique objects, so this setting applies to
+            every user of this valuation and not only to the caller.
+
+        INPUT:
+
+        - ``jumps`` -- a boolean or ``None`` (initially: ``False``); whether to
+          perform several steps of the Mac Lane algorithm at once when the
+          number of necessary steps can be predicted
+
+        - ``max_jump`` -- a positive integer or ``None`` (initially: 8); the
+          maximal number of steps performed at once when ``jumps`` is set
+
+        - ``max_steps`` -- a non-negative integer, ``infinity``, or ``None``
+          (initially: ``infinity``); the total number of steps that the
+          approximation may be improved by, a ``ValueError`` is raised when
+          more steps would be needed
+
+        - ``certified`` -- a boolean or ``None`` (initially: ``False``); whether to refine
+          the approximation directly to a precision which is guaranteed to be
+          sufficient to evaluate an element (see
+          :meth:`_certified_precision`) instead of checking after every step
+          whether the approximation is sufficient; the required precision is
+          cached for elements of similar size, so evaluating many such
+          elements requires no further checks
+
+        EXAMPLES:
+
+        We evaluate a limit valuation at an element of high valuation. Since
+        limit valuations are unique, we use a prime which no other example in
+        this file uses, so that the approximation has not been improved yet::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<t> = QQ[]
+            sage: L.<t> = QQ.extension(t^2 + 1)
+            sage: v = pAdicValuation(QQ, 41)
+            sage: w = v.extensions(L)[0]
+            sage: u = w._base_valuation
+            sage: u.refinement_statistics()['steps']
+            0
+            sage: a = -u._approximation.phi()[0]
+            sage: r = Zp(41, 10)(-1).sqrt()
+            sage: r = r if r.residue() == GF(41)(a) else -r
+            sage: f = t - r.lift()
+
+        We can limit the number of steps that are used to improve the
+        approximation::
+
+            sage: u.set_refinement_policy(max_steps=1)
+            sage: w(f)
+            Traceback (most recent call last):
+            ...
+            ValueError: [ Gauss valuation induced by 41-adic valuation, v(t + ...) = 2 ] can not be improved further since it has already been improved by 1 steps
+
+        Predicting the number of necessary steps reduces the number of times
+        that we need to check whether the approximation is sufficient::
+
+            sage: u.set_refinement_policy(jumps=True, max_steps=infinity)
+            sage: w(f) >= 10
+            True
+
+        With a certified refinement policy, elements of similar size are
+        evaluated without further checks once the approximation is
+        sufficiently precise for one of them::
+
+            sage: u.set_refinement_policy(certified=True)
+            sage: w(17*t + 3), w(17*t + 5)
+            (0, 0)
+
+        The settings which were not passed are kept::
+
+            sage: u._refinement_jumps, u._certified_refinement
+            (True, True)
+            sage: u.set_refinement_policy(jumps=False, certified=False)
+
+        """
+        from sage.rings.all import ZZ, infinity
+        if max_jump is not None and max_jump <= 0:
+            raise ValueError("max_jump must be positive")
+        if max_steps is not None and max_steps < 0:
+            raise ValueError("max_steps must be non-negative")
+        if jumps is not None:
+            self._refinement_jumps = jumps
+        if max_jump is not None:
+            self._max_refinement_jump = ZZ(max_jump)
+        if max_steps is not None:
+            self._max_refinement_steps = None if max_steps is infinity else max_steps
+        if certified is not None:
+            self._certified_refinement = certified
+
+    def refinement_statistics(self):
+        r"""
+        Return the number of steps the approximation of this valuation has
+        been improved by and the number of times that the approximation was
+        found to be precise enough to evaluate an element.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<t> = QQ[]
+            sage: L.<t> = QQ.extension(t^2 + 1)
+            sage: v = pAdicValuation(QQ, 17)
+            sage: w = v.extensions(L)[0]
+            sage: u = w._base_valuation
+            sage: w(t); w(t)
+            0
+            0
+            sage: u.refinement_statistics() # random, depends on the history of u
+            {'precision reached': 2, 'steps': 0}
+
+        """
+        return dict(self._refinement_statistics)
+
     def extensions(self, ring):
         r"""
         Return the extensions of this valuation to ``ring``.
@@ -500,9 +659,56 @@ class MacLaneLimitValuation(LimitValuation_generic, InfiniteDiscretePseudoValuat
             return infinity
         return self._approximation(f)
 
-    def _improve_approximation(self):
+    def valuation_and_reduction(self, f):
         r"""
-        Perform one step of the Mac Lane algorithm to improve our approximation.
+        Return the valuation of ``f`` and the reduction of ``f`` multiplied
+        by an element of valuation `-v(f)`.
+
+        As in :meth:`_call_`, multiples of the polynomial which defines this
+        limit have infinite valuation even though the approximation assigns
+        a finite valuation to them.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: K = QQ
+            sage: R.<t> = K[]
+            sage: L.<t> = K.extension(t^2 + 1)
+            sage: v = pAdicValuation(QQ, 29)
+            sage: u = v.extensions(L)[0]._base_valuation
+            sage: T = u.domain().gen()
+            sage: u.valuation_and_reduction((T^2 + 1)*(T + 3))
+            (+Infinity, 0)
+
+        TESTS:
+
+        Multiples of a factor of the polynomial which defines this limit,
+        which the approximation sends to infinity::
+
+            sage: R.<x> = K[]
+            sage: vK = pAdicValuation(K, 2)
+            sage: f = (x^2 + 7) * (x^2 + 9)
+            sage: V = sorted(vK.mac_lane_approximants(f, require_incomparability=True), key=str)
+            sage: w = LimitValuation(V[1], f)
+            sage: w.valuation_and_reduction((x^2 + 7) * (x + 3))
+            (+Infinity, 0)
+            sage: w = LimitValuation(V[0], f)
+            sage: val, F = w.valuation_and_reduction((x^2 + 7) * (x + 3)); val
+            3/2
+
+        """
+        f = self.domain().coerce(f)
+        self._improve_approximation_for_call(f)
+        if self._G.divides(f):
+            from sage.rings.all import infinity
+            return infinity, self.residue_ring().zero()
+        v, F = self._approximation.valuation_and_reduction(f)
+        return v, self.residue_ring()(F)
+
+    def _improve_approximation(self, steps=1):
+        r"""
+        Perform ``steps`` steps of the Mac Lane algorithm to improve our
+        approximation.
 
         EXAMPLES::
 
@@ -526,15 +732,225 @@ class MacLaneLimitValuation(LimitValuation_generic, InfiniteDiscretePseudoValuat
             sage: u._approximation
             [ Gauss valuation induced by 2-adic valuation, v(t + 1) = 1/2, v(t^2 + 1) = +Infinity ]
 
+        Several steps can be performed at once::
+
+            sage: u = pAdicValuation(QQ, 17).extensions(L)[0]._base_valuation
+            sage: u._improve_approximation(steps=2)
+            sage: u._approximation.mu() >= 3
+            True
+
         """
         from sage.rings.all import infinity
-        if self._approximation(self._G) is infinity:
-            # an infinite valuation can not be improved further
-            return
+        for i in range(steps):
+            if self._approximation(self._G) is infinity:
+                # an infinite valuation can not be improved further
+                return
+
+            _check_cancellation(self._approximation)
+
+            if self._max_refinement_steps is not None and self._refinement_statistics['steps'] >= self._max_refinement_steps:
+                raise ValueError("%r can not be improved further since it has already been improved by %s steps"%(self._approximation, self._refinement_statistics['steps']))
+
+            final_EF = self._approximation.E()*self._approximation.F() == self._approximation.phi().degree()
+            mu = self._approximation.mu()
+            approximations = self._approximation.mac_lane_step(self._G, assume_squarefree=True, assume_equivalence_irreducible=True, check=False, principal_part_bound=1 if final_EF else None, report_degree_bounds_and_caches=True)
+            assert(len(approximations)==1)
+            self._approximation, _, _, self._next_coefficients, self._next_valuations = approximations[0]
+            self._refinement_statistics['steps'] += 1
+
+            if final_EF and self._approximation.mu() is not infinity:
+                self._mu_increment = self._approximation.mu() - mu
+            else:
+                self._mu_increment = None
+
+    def _resultant_valuation(self, f):
+        r"""
+        Return the valuation of the resultant of `G` and ``f`` as needed by
+        :meth:`_predict_refinement_steps`, or ``None`` if no prediction is
+        possible for ``f``.
+
+        This does not depend on the current approximation, so it only needs
+        to be computed once while the approximation is improved for ``f``.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<t> = QQ[]
+            sage: L.<t> = QQ.extension(t^2 + 1)
+            sage: u = pAdicValuation(QQ, 17).extensions(L)[0]._base_valuation
+            sage: u._resultant_valuation(R.gen() + 17^10)
+            0
+            sage: u._resultant_valuation(R.gen()^2 + 1) is None
+            True
+
+        """
+        if not self.domain().base_ring().is_exact() or f.degree() >= self._G.degree():
+            return None
+        resultant = self._G.resultant(f)
+        if resultant.is_zero():
+            return None
+        return self._approximation.restriction(self.domain().base_ring())(resultant)
+
+    def _predict_refinement_steps(self, f, resultant_valuation=None):
+        r"""
+        Return the number of steps of the Mac Lane algorithm that are going to
+        be necessary until ``f`` is an equivalence-unit for our approximation.
+
+        This is only a prediction and it might be too small or too large. It
+        is always between 1 and the ``max_jump`` set by
+        :meth:`set_refinement_policy`.
+
+        INPUT:
+
+        - ``f`` -- a polynomial in the domain of this valuation
+
+        - ``resultant_valuation`` -- the result of
+          :meth:`_resultant_valuation` for ``f`` or ``None`` (default:
+          ``None``); if ``None``, it is computed
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<t> = QQ[]
+            sage: L.<t> = QQ.extension(t^2 + 1)
+            sage: u = pAdicValuation(QQ, 17).extensions(L)[0]._base_valuation
+            sage: u.set_refinement_policy(jumps=True)
+            sage: u._improve_approximation()
+            sage: 1 <= u._predict_refinement_steps(R.gen() + 17^10) <= 8
+            True
+            sage: u._predict_refinement_steps(R.gen() + 17^10, u._resultant_valuation(R.gen() + 17^10)) == u._predict_refinement_steps(R.gen() + 17^10)
+            True
+
+        ALGORITHM:
+
+            Let `v` be our approximation and `\phi` its last key polynomial.
+            Write `f=\sum_i a_i\phi^i` and let `w` be the limit valuation.
+            Let `g` be the value of the Gauss valuation at `f`. Since the roots
+            `\theta_j` of `G` are integral, `f(\theta_j)` has valuation at
+            least `g` and there are at least `\deg\phi` roots at which `f`
+            takes the value `w(f)`. Hence, the resultant of `G` and `f` bounds
+            `w(f)` from above by
+            `U=(v(\mathrm{Res}(G,f)) - (\deg G - \deg\phi)g)/\deg\phi`. Once
+            the valuation of the key polynomial exceeds `(U - v(a_i))/i` for
+            all `i\ge 1`, `f` is an equivalence-unit. The maximum of these
+            bounds is attained at a vertex of the lower convex hull of the
+            points `(i, v(a_i\phi^i))` with `i\ge 1`, so only these vertices
+            need to be considered. We estimate the number of steps to reach
+            this valuation from the growth of the valuation of the key
+            polynomial in the last step.
+
+        """
+        from sage.rings.all import infinity, QQ
+        from itertools import islice
+        v = self._approximation
+        if not self._refinement_jumps or self._mu_increment is None or self._mu_increment <= 0:
+            return 1
+        if resultant_valuation is None:
+            resultant_valuation = self._resultant_valuation(f)
+            if resultant_valuation is None:
+                return 1
+
+        g = v.augmentation_chain()[-1](f)
+        if g is infinity:
+            return 1
+        d = v.phi().degree()
+        U = (resultant_valuation - (self._G.degree() - d)*g)/d
+
+        mu = v.mu()
+        target = mu
+        for i, val in LowerConvexHull(islice(enumerate(v.valuations(f)), 1, None)).vertices():
+            target = max(target, (U - val + i*mu)/i)
+
+        steps = QQ((target - mu) / self._mu_increment).ceil()
+        return max(1, min(steps, self._max_refinement_jump))
+
+    def _certified_precision(self, f):
+        r"""
+        Return a rational `\mu` such that ``f`` is an equivalence-unit for
+        every approximation of this valuation whose key polynomial has
+        valuation greater than `\mu`, or ``None`` if we can not bound this
+        cheaply.
+
+        The polynomial ``f`` must be coprime to `G`.
+
+        The bound only depends on the degree of ``f``, the size of its
+        coefficients, and the valuation of its content. It is cached for each
+        such height class.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<t> = QQ[]
+            sage: L.<t> = QQ.extension(t^2 + 1)
+            sage: u = pAdicValuation(QQ, 17).extensions(L)[0]._base_valuation
+            sage: u._certified_precision(R.gen() + 1)
+            0
+            sage: u._certified_precision(R.gen() + 2^20)
+            10
+
+        ALGORITHM:
+
+            We use the notation of :meth:`_predict_refinement_steps` and
+            assume that `G` is monic and integral and that `f` has integral
+            coefficients. Write `d` for the degree of the factor of `G`
+            which corresponds to the limit valuation. As explained there,
+            `w(f)\le U=(v(\mathrm{Res}(G,f)) - (\deg G - d)g)/d`. The
+            coefficients `a_i` of the `\phi`-adic expansion of `f` satisfy
+            `v(a_i)\ge g` and `w(a_0)=v(a_0)` as `\deg a_0 < \deg\phi`. So,
+            once `g + v(\phi) > U`, we have `w(f - a_0) > w(f)`, i.e., `f` is
+            an equivalence-unit. Since `\mathrm{Res}(G,f)` is a non-zero
+            integer, Hadamard's inequality bounds its valuation by
+            `\log_p(\|G\|^{\deg f}\|f\|^{\deg G})`. Replacing `d` by its
+            lower bound `\deg\phi` only increases the bound `U - g`.
 
-        approximations = self._approximation.mac_lane_step(self._G, assume_squarefree=True, assume_equivalence_irreducible=True, check=False, principal_part_bound=1 if self._approximation.E()*self._approximation.F() == self._approximation.phi().degree() else None, report_degree_bounds_and_caches=True)
-        assert(len(approximations)==1)
-        self._approximation, _, _, self._next_coefficients, self._next_valuations = approximations[0]
+        """
+        from sage.rings.all import QQ, ZZ
+        from padic_valuation import pAdicValuation_base
+        if self.domain().base_ring() is not QQ:
+            return None
+        vK = self._approximation.restriction(QQ)
+        if not isinstance(vK, pAdicValuation_base):
+            return None
+        if not self._G.is_monic() or any(vK(c) < 0 for c in self._G.coefficients()):
+            return None
+
+        f = f * f.denominator()
+        g = self._approximation.augmentation_chain()[-1].lower_bound(f).floor()
+        key = (f.degree(), ZZ(sum(c**2 for c in f.coefficients())).nbits(), g)
+        if key not in self._precision_targets:
+            m, bits, g = key
+            G = self._G * self._G.denominator()
+            n = G.degree()
+            p = vK.p()
+            # an upper bound for the valuation of Res(G, f)
+            res = (m * ZZ(sum(c**2 for c in G.coefficients())).nbits() + n * bits) // (2 * (p.nbits() - 1))
+            self._precision_targets[key] = QQ(res - n*g) / self._approximation.phi().degree()
+        return self._precision_targets[key]
+
+    def _improve_approximation_to(self, mu):
+        r"""
+        Improve our approximation until the valuation of its key polynomial
+        exceeds ``mu``.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<t> = QQ[]
+            sage: L.<t> = QQ.extension(t^2 + 1)
+            sage: u = pAdicValuation(QQ, 17).extensions(L)[0]._base_valuation
+            sage: u._improve_approximation_to(3)
+            sage: u._approximation.mu() > 3
+            True
+
+        """
+        from sage.rings.all import infinity
+        if self._approximation.mu() > mu:
+            self._refinement_statistics['precision reached'] += 1
+            return
+        while self._approximation.mu() <= mu:
+            if self._approximation(self._G) is infinity:
+                return
+            self._improve_approximation()
 
     def _improve_approximation_for_call(self, f):
         r"""
@@ -600,25 +1016,50 @@ class MacLaneLimitValuation(LimitValuation_generic, InfiniteDiscretePseudoValuat
             # zero coefficients.)
             return
 
-        while not self._approximation.is_equivalence_unit(f):
-            # TODO: I doubt that this really works over inexact fields
+        # TODO: I doubt that this really works over inexact fields
+        s = None
+        if self._certified_refinement:
             s = self._G.gcd(f)
             if s.is_constant():
-                self._improve_approximation()
-            else:
-                t = self._G // s
+                target = self._certified_precision(f)
+                if target is not None:
+                    self._improve_approximation_to(target)
+                    return
 
-                while True:
-                    if self._approximation.is_equivalence_unit(s):
-                        # t has infinite valuation
-                        self._G = t
-                        return self._improve_approximation_for_call(f // s)
-                    if self._approximation.is_equivalence_unit(t):
-                        # s has infinite valuation
-                        self._G = s
-                        return
+        if self._approximation.is_equivalence_unit(f):
+            self._refinement_statistics['precision reached'] += 1
+            return
 
-                    self._improve_approximation()
+        if s is None:
+            # G does not change while we improve the approximation for an f
+            # which is coprime to G, so the gcd needs to be computed only once
+            s = self._G.gcd(f)
+
+        if s.is_constant():
+            # neither does the resultant of G and f
+            resultant_valuation = None
+            if self._refinement_jumps:
+                resultant_valuation = self._resultant_valuation(f)
+            while True:
+                self._improve_approximation(steps=self._predict_refinement_steps(f, resultant_valuation) if resultant_valuation is not None else 1)
+                if self._approximation.is_equivalence_unit(f):
+                    return
+        else:
+            t = self._G // s
+
+            while True:
+                if self._approximation.is_equivalence_unit(s):
+                    # t has infinite valuation
+                    self._G = t
+                    self._precision_targets = {}
+                    return self._improve_approximation_for_call(f // s)
+                if self._approximation.is_equivalence_unit(t):
+                    # s has infinite valuation
+                    self._G = s
+                    self._precision_targets = {}
+                    return
+
+                self._improve_approximation()
 
     def _improve_approximation_for_reduce(self, f):
         r"""
@@ -648,6 +1089,7 @@ class MacLaneLimitValuation(LimitValuation_generic, InfiniteDiscretePseudoValuat
 
         """
         if self._approximation(f) > 0:
+            self._refinement_statistics['precision reached'] += 1
             return
         self._improve_approximation_for_call(f)
 
@@ -204,6 +204,26 @@ class MappedValuation_base(DiscretePseudoValuation):
         """
         return self._base_valuation.reduce(self._to_base_domain(f))
 
+    def valuation_and_reduction(self, f):
+        r"""
+        Return the valuation of ``f`` and the reduction of ``f`` multiplied
+        by an element of valuation `-v(f)`.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: K.<x> = FunctionField(QQ)
+            sage: R.<y> = K[]
+            sage: L.<y> = K.extension(y^2 - (x - 2))
+
+            sage: v = FunctionFieldValuation(K, 0)
+            sage: w = v.extension(L)
+            sage: w.valuation_and_reduction(x*y)
+            (1, u1)
+
+        """
+        return self._base_valuation.valuation_and_reduction(self._to_base_domain(f))
+
     def lift(self, F):
         r"""
         Lift ``F`` from the :meth;`residue_field` of this valuation into its
@@ -524,6 +544,16 @@ class FiniteExtensionFromLimitValuation(FiniteExtensionFromInfiniteValuation):
         sage: TestSuite(w[0]).run() # long time
         sage: TestSuite(w[1]).run() # long time
 
+    The approximants which are kept to print this valuation are pickled as
+    their compact :meth:`InductiveValuation.augmentation_data`::
+
+        sage: loads(dumps(w[0])) is w[0]
+        True
+        sage: all(loads(dumps(a)) is a for a in w[0]._approximants)
+        True
+        sage: all(a.__reduce__()[1] == a.augmentation_data() for a in w[0]._approximants)
+        True
+
     """
     def __init__(self, parent, approximant, G, approximants):
         r"""
@@ -18,9 +18,11 @@ AUTHORS:
 from valuation import DiscreteValuation
 from value_group import DiscreteValueSemigroup
 from mapped_valuation import FiniteExtensionFromLimitValuation
+from valuation import simplification_policy, _check_cancellation
 from sage.structure.factory import UniqueFactory
 from sage.misc.cachefunc import cached_method
 from sage.misc.fast_methods import WithEqualityById
+from sage.categories.morphism import Morphism
 
 from sage.rings.all import infinity
 
@@ -602,6 +604,7 @@ class pAdicValuation_base(DiscreteValuation):
         steps = [ GaussValuation(R, self) ]
         while True:
             v = steps[-1]
+            _check_cancellation(steps)
             if v.E() > 1:
                 ret = False
                 break
@@ -682,6 +685,7 @@ class pAdicValuation_base(DiscreteValuation):
         steps = [ GaussValuation(R, self) ]
         while True:
             v = steps[-1]
+            _check_cancellation(steps)
             if v.F() > 1:
                 ret = False
                 break
@@ -705,6 +709,445 @@ class pAdicValuation_base(DiscreteValuation):
         else:
             return ret
 
+    def _okutsu_frames(self, G):
+        r"""
+        Return, for each extension of this valuation to `K[x]/(G)`, its
+        limit valuation on `K[x]` and the list of key polynomials of its
+        final approximant.
+
+        The key polynomials have strictly increasing degrees, start with a
+        polynomial of degree one, and the last one approximates the
+        irreducible factor of ``G`` over the completion which corresponds to
+        the extension (an Okutsu frame of that factor.)
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = pAdicValuation(QQ, 2)
+            sage: [[phi.degree() for phi in keys] for w, keys in v._okutsu_frames(x^2 + 3)]
+            [[1, 2]]
+
+        """
+        from limit_valuation import LimitValuation
+        R = G.parent()
+        ret = []
+        for approximant in self.mac_lane_approximants(G, require_maximal_degree=True, assume_squarefree=True):
+            keys = [R.gen()]
+            for augmentation in approximant.augmentation_chain()[-2::-1]:
+                phi = augmentation.phi()
+                if phi.degree() == keys[-1].degree():
+                    keys[-1] = phi
+                else:
+                    keys.append(phi)
+            ret.append((LimitValuation(approximant, G), keys))
+        return ret
+
+    def p_integral_basis(self, G):
+        r"""
+        Return a basis of the integral closure of the localization of `\ZZ`
+        at `p` in `\QQ[x]/(G)`.
+
+        INPUT:
+
+        - ``G`` -- a monic squarefree polynomial with integral coefficients
+          over the rationals
+
+        OUTPUT:
+
+        A list of polynomials `g_j/p^{k_j}`, `j=0,\dots,\deg G - 1`, with
+        monic `g_j\in\ZZ[x]` of degree `j`. The classes of these polynomials
+        generate the `p`-maximal order, which agrees with the equation order
+        at all primes other than `p`.
+
+        ALGORITHM:
+
+        An element `g/p^k` is integral iff `w(g)\ge k` for all extensions
+        `w` of this valuation. The integral closure therefore has a basis of
+        this triangular form where `g_j` maximizes `\min_w w(g_j)` among the
+        monic polynomials of degree `j`. By the theorem of Okutsu, for a
+        single extension, `g_j` can be taken as a product of powers of the
+        key polynomials of its final approximant. For several extensions,
+        `g_j` can be chosen as a product of such polynomials for each
+        extension [GMN2015]. We find the best distribution of the degree
+        `j` among the extensions by dynamic programming, using that
+        valuations are additive on products.
+
+        This does not need to compute any orders, just the approximants of
+        ``G`` and the valuations of their key polynomials.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = pAdicValuation(QQ, 2)
+            sage: v.p_integral_basis(x^2 + 3)
+            [1, 1/2*x + 1/2]
+            sage: v.p_integral_basis(x^2 + 1)
+            [1, x + 1]
+
+        The result agrees with Sage's maximal orders::
+
+            sage: G = x^4 + 2*x^2 + 4
+            sage: K.<a> = NumberField(G)
+            sage: K.order([b(a) for b in v.p_integral_basis(G)]).index_in(K.maximal_order()).valuation(2)
+            0
+
+        The basis elements have no denominators other than powers of `p`,
+        even though the key polynomials they are built from might::
+
+            sage: all(c.denominator().is_power_of(2) for b in v.p_integral_basis(G) for c in b.list())
+            True
+
+        TESTS::
+
+            sage: v.p_integral_basis(x^2/2 + 1)
+            Traceback (most recent call last):
+            ...
+            ValueError: G must be monic and integral
+
+        REFERENCES:
+
+        .. [GMN2015] Jordi Guàrdia, Jesús Montes, Enric Nart (2015). Higher
+        Newton polygons and integral bases. Journal of Number Theory 147,
+        549-589.
+
+        """
+        from sage.rings.all import QQ, infinity
+        if self.domain() is not QQ:
+            raise NotImplementedError("p-integral bases are only implemented over the rationals")
+        if G.parent().base_ring() is not QQ:
+            raise ValueError("G must be defined over the rationals")
+        if not G.is_monic() or not all(self(c) >= 0 for c in G.coefficients()):
+            raise ValueError("G must be monic and integral")
+        if not G.is_squarefree():
+            raise ValueError("G must be squarefree")
+
+        R = G.parent()
+        n = G.degree()
+        frames = self._okutsu_frames(G)
+        valuations = [w for w, _ in frames]
+
+        def divisor_polynomial(keys, j):
+            # the product of powers of keys of degree j with exponents
+            # bounded by the ratios of consecutive degrees
+            ret = R.one()
+            for phi in reversed(keys):
+                a, j = divmod(j, phi.degree())
+                ret *= phi**a
+            assert j == 0
+            return ret
+
+        # For each extension, the candidate factors of degree 0,...,deg F_i
+        # and the vector of their valuations with respect to all extensions.
+        candidates = []
+        for _, keys in frames:
+            factors = [divisor_polynomial(keys, j) for j in range(keys[-1].degree() + 1)]
+            candidates.append([(g, tuple(w(g) for w in valuations)) for g in factors])
+
+        # fronts[d] contains the pairs (polynomial, valuations) of degree d
+        # which are not dominated by another such pair
+        def dominates(a, b):
+            return all(x >= y for x,y in zip(a, b))
+        fronts = {0: [(R.one(), tuple(0 for w in valuations))]}
+        for factors in candidates:
+            new_fronts = {}
+            for d, front in fronts.items():
+                for g, values in front:
+                    for h, h_values in factors:
+                        degree = d + h.degree()
+                        if degree >= n:
+                            continue
+                        entry = (g*h, tuple(x+y for x,y in zip(values, h_values)))
+                        target = new_fronts.setdefault(degree, [])
+                        if any(dominates(other, entry[1]) for _, other in target):
+                            continue
+                        target[:] = [e for e in target if not dominates(entry[1], e[1])] + [entry]
+            fronts = new_fronts
+
+        from sage.rings.all import Zmod
+        p = self.p()
+        ret = []
+        for j in range(n):
+            g, values = max(fronts[j], key=lambda entry: min(entry[1]))
+            k = min(values)
+            assert k is not infinity
+            k = QQ(k).floor()
+            # The key polynomials come out of simplify() and can have
+            # denominators prime to p. Changing g by multiples of p^(k+1)
+            # does not affect the integrality of g/p^k, so we can replace the
+            # coefficients by integers which make the basis element integral
+            # at the other primes as well.
+            g = R([Zmod(p**(k+1))(c).lift() for c in g.list()])
+            ret.append(g / p**k)
+        return ret
+
+    def p_maximal_order(self, G, names=None):
+        r"""
+        Return the order in the number field defined by ``G`` which is
+        maximal at `p` and agrees with the equation order at all other
+        primes.
+
+        INPUT:
+
+        - ``G`` -- a monic irreducible polynomial with integral coefficients
+          over the rationals
+
+        - ``names`` -- the name of the generator of the number field
+          (default: the name of the variable of ``G``)
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = pAdicValuation(QQ, 2)
+            sage: O = v.p_maximal_order(x^2 + 3); O
+            Order in Number Field in x with defining polynomial x^2 + 3
+            sage: O.is_maximal()
+            True
+
+        """
+        if names is None:
+            names = (G.parent().variable_name(),)
+        from sage.rings.number_field.number_field import NumberField
+        K = NumberField(G, names=names)
+        basis = [b(K.gen()) for b in self.p_integral_basis(G)]
+        from sage.rings.number_field.order import absolute_order_from_module_generators
+        return absolute_order_from_module_generators(basis, check_rank=False)
+
+    def index_valuation(self, G):
+        r"""
+        Return the valuation of the index of the equation order `R[x]/(G)`
+        in its integral closure, where `R` is the ring of integers of the
+        completion of the domain of this valuation.
+
+        INPUT:
+
+        - ``G`` -- a monic squarefree integral polynomial over the domain of
+          this valuation
+
+        OUTPUT:
+
+        A non-negative integer, the length of the quotient of the integral
+        closure by the equation order, i.e., `v_p(\mathrm{ind}(G))` when
+        this valuation is `p`-adic on the rationals.
+
+        ALGORITHM:
+
+        By the theorem of the index of Ore and Montes [GMN2012], the index is
+        the sum of contributions of the nodes of the tree of approximants of
+        ``G``. At a node `v` and for each key polynomial `\phi` that appears
+        in the equivalence decomposition of ``G`` with multiplicity `\ell`,
+        consider the principal part of the Newton polygon of the points
+        `(i, v(a_i\phi^i))`, `i=0,\dots,\ell`, where the `a_i` are the
+        coefficients of the `\phi`-adic expansion of ``G``, in the
+        normalization where the value group of `v` is `\ZZ`. The
+        contribution of `\phi` is the number of points with integral
+        coordinates on or below this polygon, strictly above the horizontal
+        line through its last vertex, and with first coordinate positive,
+        multiplied by `\deg\phi/e(v)`.
+
+        The polygons are those that :meth:`mac_lane_step` computes anyway, so
+        this does not need to build any orders. A branch of the tree does not
+        contribute anymore once its approximant is final, i.e., once its
+        ramification index and residue degree account for the degree of the
+        corresponding factor of ``G``.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = pAdicValuation(QQ, 2)
+            sage: v.index_valuation(x^2 + 1)
+            0
+            sage: v.index_valuation(x^2 + 3)
+            1
+            sage: v.index_valuation(x^2 - 16)
+            3
+
+        The result agrees with Sage's maximal orders::
+
+            sage: G = x^4 + 2*x^2 + 4
+            sage: K.<a> = NumberField(G)
+            sage: v.index_valuation(G) == K.order(a).index_in(K.maximal_order()).valuation(2)
+            True
+
+        TESTS::
+
+            sage: v.index_valuation(x^2/2 + 1)
+            Traceback (most recent call last):
+            ...
+            ValueError: G must be monic and integral
+
+        REFERENCES:
+
+        .. [GMN2012] Jordi Guàrdia, Jesús Montes, Enric Nart (2012). Newton
+        polygons of higher order in algebraic number theory. Transactions of
+        the American Mathematical Society 364(1), 361-416.
+
+        """
+        from sage.rings.all import ZZ, QQ, infinity
+        from sage.rings.polynomial.polynomial_ring import is_PolynomialRing
+        R = G.parent()
+        if not is_PolynomialRing(R) or R.base_ring() is not self.domain() or not len(R.gens()) == 1:
+            raise ValueError("G must be a univariate polynomial over the domain of this valuation")
+        if not G.is_monic() or not all(self(c) >= 0 for c in G.coefficients()):
+            raise ValueError("G must be monic and integral")
+        if not G.is_squarefree():
+            raise ValueError("G must be squarefree")
+
+        from gauss_valuation import GaussValuation
+        from developing_valuation import LowerConvexHull
+
+        ret = ZZ(0)
+        # the nodes of the tree which are not final yet, together with the
+        # degree of the factor of G that they approximate
+        frontier = [(GaussValuation(R, self), G.degree())]
+        while frontier:
+            v, bound = frontier.pop()
+            if v.E() * v.F() == bound:
+                continue
+
+            # group the augmentations by their key polynomial; they all share
+            # the same Newton polygon
+            augmentations = {}
+            for w, w_bound, multiplicity, coefficients, valuations in v.mac_lane_step(G, assume_squarefree=True, check=False, report_degree_bounds_and_caches=True):
+                if w(w.phi()) is not infinity:
+                    frontier.append((w, w_bound))
+                if coefficients is not None:
+                    augmentations.setdefault(w.phi(), []).append((w, multiplicity, valuations))
+
+            for phi, sides in augmentations.items():
+                # the length of the principal part
+                length = sum(multiplicity for _, multiplicity, _ in sides)
+                finite = [(w, valuations) for w, _, valuations in sides if w(phi) is not infinity]
+                if not finite:
+                    assert length == 1
+                    continue
+                # recover the valuations v(a_i phi^i) from the valuations
+                # that the augmentation w reported for its own slope
+                w, valuations = finite[0]
+                slope = v(phi) - w(phi)
+                scale = 1 / v.value_group().gen()
+                NP = LowerConvexHull([(i, scale * (val + i*slope) if val is not infinity else infinity) for i, val in enumerate(valuations[:length + 1])])
+                vertices = NP.vertices()
+                assert vertices[-1][0] == length
+                last = vertices[-1][1]
+                # if phi divides G, the polygon starts at (1, v(a_1 phi))
+                points = sum(QQ(v0 - last).floor() for i0, v0 in vertices[:1] if i0 > 0)
+                for (i0, v0), (i1, v1) in zip(vertices, vertices[1:]):
+                    for i in range(i0 + 1, i1 + 1):
+                        points += QQ(v0 + (v1 - v0) * (i - i0) / (i1 - i0) - last).floor()
+                ret += points * phi.degree() / v.E()
+
+        return ZZ(ret)
+
+    def discriminant_valuation(self, G):
+        r"""
+        Return the valuation of the discriminant of the integral closure of
+        the equation order `R[x]/(G)`, where `R` is the ring of integers of
+        the completion of the domain of this valuation.
+
+        INPUT:
+
+        - ``G`` -- a monic squarefree integral polynomial over the domain of
+          this valuation
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = pAdicValuation(QQ, 3)
+            sage: v.discriminant_valuation(x^2 + 3)
+            1
+            sage: v.discriminant_valuation(x^2 - 18)
+            0
+
+        """
+        return self(G.discriminant()) - 2 * self.index_valuation(G)
+
+    def valuation_vector(self, f, extensions=None):
+        r"""
+        Return the valuations of ``f`` with respect to all the extensions of
+        this valuation to the parent of ``f``.
+
+        INPUT:
+
+        - ``f`` -- an element of a number field over the domain of this
+          valuation
+
+        - ``extensions`` -- a list of extensions of this valuation to the
+          parent of ``f`` or ``None`` (default: ``None``); if ``None``, all
+          of :meth:`extensions` are used
+
+        OUTPUT:
+
+        A list with the valuations of ``f`` in the order of ``extensions``.
+
+        ALGORITHM:
+
+        The extensions are limits of chains of augmentations which share
+        their initial segments. We walk the tree formed by these chains
+        from the Gauss valuation and expand ``f`` only once at each node.
+        As soon as ``f`` is an equivalence unit at a node, its valuation
+        there is the valuation of ``f`` for all extensions below that node.
+        Only branches which do not reach such a node need to refine their
+        limit valuation.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: K.<i> = NumberField(x^2 + 1)
+            sage: v = pAdicValuation(QQ, 5)
+            sage: v.valuation_vector(2 + i) == [w(2 + i) for w in v.extensions(K)]
+            True
+            sage: v.valuation_vector(K.zero())
+            [+Infinity, +Infinity]
+
+        """
+        from sage.rings.all import infinity
+        L = f.parent()
+        if extensions is None:
+            extensions = self.extensions(L)
+        if len(extensions) == 1 or any(not isinstance(w, pAdicFromLimitValuation) for w in extensions):
+            return [w(f) for w in extensions]
+        if f.is_zero():
+            return [infinity for w in extensions]
+
+        g = extensions[0]._to_base_domain(f)
+        # the augmentation chains of the current approximations, starting
+        # from the Gauss valuation
+        chains = [w._base_valuation._approximation.augmentation_chain()[::-1] for w in extensions]
+        ret = [None] * len(extensions)
+
+        def walk(depth, indices):
+            # the chains of indices agree up to depth
+            u = chains[indices[0]][depth]
+            expansion = u.expansion(g)
+            if u.is_equivalence_unit(expansion):
+                value = min(expansion.valuations())
+                for i in indices:
+                    ret[i] = value
+                return
+            branches = {}
+            for i in indices:
+                if depth + 1 < len(chains[i]):
+                    branches.setdefault(chains[i][depth + 1], []).append(i)
+                else:
+                    # the approximation is not precise enough to determine
+                    # the valuation of f
+                    ret[i] = extensions[i](f)
+            for branch in branches.values():
+                walk(depth + 1, branch)
+
+        roots = {}
+        for i, chain in enumerate(chains):
+            roots.setdefault(chain[0], []).append(i)
+        for indices in roots.values():
+            walk(0, indices)
+        return ret
+
     def change_domain(self, ring):
         r"""
         Change the domain of this valuation to ``ring`` if possible.
@@ -892,6 +1335,23 @@ class pAdicValuation_padic(pAdicValuation_base):
         x = self.domain().coerce(x)
         return self.residue_field()(x.residue())
 
+    def valuation_and_reduction(self, x):
+        r"""
+        Return the valuation of ``x`` and the reduction of its unit part.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R = Zp(3)
+            sage: pAdicValuation(R).valuation_and_reduction(R(18))
+            (2, 2)
+
+        """
+        x = self.domain().coerce(x)
+        if x.is_zero():
+            return infinity, self.residue_field().zero()
+        return x.ordp(), self.residue_field()(x.unit_part().residue())
+
     def lift(self, x):
         """
         Lift ``x`` from the :meth:`residue_field` to the :meth:`domain` of this
@@ -981,6 +1441,36 @@ class pAdicValuation_padic(pAdicValuation_base):
         """
         return x.ordp()
 
+    def _call_batch(self, xs, call_error=False):
+        r"""
+        Return the valuations of the elements of ``xs``.
+
+        This avoids the overhead of calling this valuation for every element
+        separately.
+
+        INPUT:
+
+        - ``xs`` -- an iterable of elements which convert into the domain of
+          this valuation
+
+        - ``call_error`` -- ignored; all valuations are computed since
+          :meth:`lower_bound` is not cheaper than the valuation itself
+
+        OUTPUT:
+
+        An iterator over the valuations of ``xs``.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(Qp(3))
+            sage: list(v._call_batch([1, 3, 18]))
+            [0, 1, 2]
+
+        """
+        domain = self.domain()
+        return (domain(x).ordp() for x in xs)
+
     def residue_ring(self):
         r"""
         Return the residue field of this valuation.
@@ -1112,6 +1602,217 @@ class pAdicValuation_int(pAdicValuation_base):
             return infinity
         return x.valuation(self._p)
 
+    def valuation_and_reduction(self, x):
+        r"""
+        Return the valuation of ``x`` and the reduction of `xp^{-v(x)}`.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(QQ, 3)
+            sage: v.valuation_and_reduction(18/5)
+            (2, 1)
+
+        """
+        x = self.domain().coerce(x)
+        if x.is_zero():
+            return infinity, self.residue_field().zero()
+        v, u = x.val_unit(self._p)
+        return v, self.residue_field()(u)
+
+    def _power_series_digits(self, x, n, block_size, lifts):
+        r"""
+        Return the first ``n`` digits of the `p`-adic expansion of ``x``, see
+        :meth:`DiscreteValuation.power_series`.
+
+        Since the lifts of the digits are the integers `0,\dots,p-1`, we
+        reduce ``x`` modulo `p^n` once and read the digits off the base `p`
+        representation of the result.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(QQ, 3)
+            sage: v._power_series_digits(-1/5, 6, 8, {})
+            [1, 2, 1, 0, 1, 2]
+            sage: from mac_lane.valuation import DiscreteValuation
+            sage: DiscreteValuation._power_series_digits(v, -1/5, 6, 2, {})
+            [1, 2, 1, 0, 1, 2]
+
+        """
+        from sage.rings.all import Zmod
+        k = self.residue_field()
+        return [k(d) for d in Zmod(self._p**n)(x).lift().digits(self._p, padto=n)]
+
+    def valuations_array(self, xs, infinity_sentinel=None):
+        r"""
+        Return the valuations of the elements of ``xs`` as a NumPy array.
+
+        Besides being available to callers which work with NumPy arrays, this
+        backs :meth:`_call_batch`, i.e., the evaluation of Gauss valuations
+        over this valuation and :meth:`_simplify_batch`.
+
+        INPUT:
+
+        - ``xs`` -- a NumPy array of ``int64`` or of objects, or a list of
+          elements of the domain of this valuation
+
+        - ``infinity_sentinel`` -- an integer or ``None`` (default: ``None``),
+          the entry used for the valuation of zero; if ``None``, the largest
+          ``int64`` is used
+
+        OUTPUT:
+
+        A NumPy array of ``int64`` of the same length as ``xs``.
+
+        ALGORITHM:
+
+        When all numerators and denominators fit into an ``int64``, the
+        valuations are computed by array operations, namely by counting
+        trailing zeros for `p=2` and by repeated divisibility checks for odd
+        `p`. Otherwise, we fall back to computing the valuations one by one.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(ZZ, 2)
+            sage: v.valuations_array([0, 1, 2, 12, -8, -2^63]).tolist()
+            [9223372036854775807, 0, 1, 2, 3, 63]
+
+            sage: v = pAdicValuation(QQ, 3)
+            sage: v.valuations_array([1/3, 9/2, 0, 2^100*27], infinity_sentinel=100).tolist()
+            [-1, 2, 100, 3]
+
+        TESTS::
+
+            sage: import numpy
+            sage: v = pAdicValuation(ZZ, 5)
+            sage: xs = numpy.array(range(-100, 100), dtype=numpy.int64)
+            sage: all(v(x) == w for x,w in zip(xs, v.valuations_array(xs)) if x)
+            True
+
+        The sentinel does not get confused with actual valuations::
+
+            sage: v = pAdicValuation(QQ, 3)
+            sage: v.valuations_array([1/3, 0, 2/9], infinity_sentinel=0).tolist()
+            [-1, 0, -2]
+
+        Large primes are not supported::
+
+            sage: pAdicValuation(ZZ, next_prime(2^63)).valuations_array([1])
+            Traceback (most recent call last):
+            ...
+            NotImplementedError: array valuations are only implemented for primes which fit into an int64
+
+        """
+        import numpy
+        if self._p >= 2**63:
+            raise NotImplementedError("array valuations are only implemented for primes which fit into an int64")
+        if infinity_sentinel is None:
+            infinity_sentinel = numpy.iinfo(numpy.int64).max
+
+        if isinstance(xs, numpy.ndarray) and xs.dtype == numpy.int64:
+            return self._valuations_int64(xs, infinity_sentinel)
+
+        xs = [self.domain().coerce(x) for x in xs]
+        bound = 2**63
+        if all(-bound <= x.numerator() < bound and x.denominator() < bound for x in xs):
+            numerators = numpy.array([int(x.numerator()) for x in xs], dtype=numpy.int64)
+            ret = self._valuations_int64(numerators, infinity_sentinel)
+            denominators = numpy.array([int(x.denominator()) for x in xs], dtype=numpy.int64)
+            if (denominators != 1).any():
+                # numerators and denominators are coprime, so at most one of
+                # them is divisible by p
+                ret = numpy.where(numerators == 0, infinity_sentinel, ret - self._valuations_int64(denominators, infinity_sentinel))
+            return ret
+
+        return numpy.array([infinity_sentinel if x.is_zero() else x.valuation(self._p) for x in xs], dtype=numpy.int64)
+
+    def _call_batch(self, xs, call_error=False):
+        r"""
+        Return the valuations of the elements of ``xs``.
+
+        The valuations are computed with :meth:`valuations_array`, which is
+        what Gauss valuations use to evaluate all coefficients of a
+        polynomial at once.
+
+        INPUT:
+
+        - ``xs`` -- an iterable of elements which convert into the domain of
+          this valuation
+
+        - ``call_error`` -- ignored; computing all valuations in one batch is
+          cheaper than computing lower bounds for some of them
+
+        OUTPUT:
+
+        A list of integers or infinity.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(QQ, 2)
+            sage: v._call_batch([0, 1/2, 12])
+            [+Infinity, -1, 2]
+
+        The coefficients of a polynomial are evaluated in one batch::
+
+            sage: R.<x> = QQ[]
+            sage: w = GaussValuation(R, v)
+            sage: f = sum(2^i*x^i for i in range(500))
+            sage: list(w.valuations(f)) == list(range(500))
+            True
+            sage: w(f/4)
+            -2
+
+        Primes which do not fit into an ``int64`` are evaluated one by one::
+
+            sage: pAdicValuation(ZZ, next_prime(2^63))._call_batch([0, 1])
+            [+Infinity, 0]
+
+        """
+        domain = self.domain()
+        xs = [domain(x) for x in xs]
+        if self._p >= 2**63:
+            return [self(x) for x in xs]
+        import numpy
+        from sage.rings.all import ZZ
+        sentinel = numpy.iinfo(numpy.int64).max
+        return [infinity if w == sentinel else ZZ(w) for w in self.valuations_array(xs, infinity_sentinel=sentinel).tolist()]
+
+    def _valuations_int64(self, xs, infinity_sentinel):
+        r"""
+        Return the valuations of the entries of the ``int64`` array ``xs``.
+
+        This is a helper method for :meth:`valuations_array`.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: import numpy
+            sage: v = pAdicValuation(ZZ, 3)
+            sage: v._valuations_int64(numpy.array([0, 3, 18, -81], dtype=numpy.int64), -1).tolist()
+            [-1, 1, 2, 4]
+
+        """
+        import numpy
+        zero = xs == 0
+        xs = numpy.where(zero, 1, xs)
+        p = int(self.p())
+        if p == 2:
+            # the lowest set bit of x is 2^v(x) which is exactly representable
+            # as a double; casting to unsigned handles x = -2^63
+            ret = numpy.log2((xs & -xs).astype(numpy.uint64)).astype(numpy.int64)
+        else:
+            ret = numpy.zeros(xs.shape, dtype=numpy.int64)
+            divisible = xs % p == 0
+            while divisible.any():
+                ret += divisible
+                xs = numpy.where(divisible, xs // p, xs)
+                divisible = xs % p == 0
+        ret[zero] = infinity_sentinel
+        return ret
+
     def uniformizer(self):
         """
         Return a uniformizer of this `p`-adic valuation, i.e., `p` as an
@@ -1187,7 +1888,28 @@ class pAdicValuation_int(pAdicValuation_base):
         x = self.domain().coerce(x)
         return x.numerator().nbits() + x.denominator().nbits() - 1
 
-    def simplify(self, x, error=None, force=False, size_heuristic_bound=32):
+    @cached_method
+    def _p_power(self, k):
+        r"""
+        Return `p^k`.
+
+        :meth:`simplify` is usually called with only a few different
+        precisions, so we cache these powers.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(ZZ, 2)
+            sage: v._p_power(10)
+            1024
+            sage: v._p_power(-1)
+            1/2
+
+        """
+        from sage.rings.all import ZZ
+        return ZZ(self.p())**k
+
+    def simplify(self, x, error=None, force=False, size_heuristic_bound=None):
         r"""
         Return a simplified version of ``x``.
 
@@ -1206,7 +1928,8 @@ class pAdicValuation_int(pAdicValuation_base):
 
         - ``size_heuristic_bound` -- when ``force`` is not set, the expected
           factor by which the ``x`` need to shrink to perform an actual
-          simplification (default: 32)
+          simplification (default: ``None``, i.e., the bound of the current
+          :func:`simplification_policy`)
 
         EXAMPLES::
 
@@ -1217,37 +1940,97 @@ class pAdicValuation_int(pAdicValuation_base):
             sage: v.simplify(6, error=0, force=True)
             0
 
+        A rational number is approximated by a rational number with small
+        numerator and denominator if possible::
+
+            sage: v = pAdicValuation(QQ, 3)
+            sage: v.simplify(1/7 + 3^20, error=10, force=True)
+            1/7
+
         """
+        if size_heuristic_bound is None:
+            size_heuristic_bound = simplification_policy().bound()
         if not force and self._relative_size(x) <= size_heuristic_bound:
             return x
 
         x = self.domain().coerce(x)
+        return self._simplify(x, self(x), error)
+
+    def _simplify(self, x, v, error):
+        r"""
+        Return a simplified version of ``x`` which has valuation ``v``, see
+        :meth:`simplify`.
+
+        ALGORITHM:
 
-        v = self(x)
+        Write `x=p^v u` and let `k` be the relative precision that we need to
+        keep. We reduce `u` modulo `p^k` and try to find a fraction `a/b` with
+        small `a` and `b` that is congruent to it modulo `p^k`. This is what
+        :meth:`sage.rings.padics.padic_generic_element.pAdicGenericElement.rational_reconstruction`
+        does but we avoid creating a `p`-adic ring of precision `k` and its
+        elements.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(ZZ, 2)
+            sage: v._simplify(6, 1, 3)
+            6
+
+        """
+        from sage.rings.all import infinity, QQ
         if error is None:
             error = v
-        from sage.rings.all import infinity
         if error is infinity:
             return x
         if error < v:
             return self.domain().zero()
-        from sage.rings.all import QQ
         error = QQ(error).ceil()
-        
-        from sage.rings.all import Qp
-        precision_ring = Qp(self.p(), error + 1 - v)
-        reduced = precision_ring(x)
+
+        precision = error + 1 - v
+        modulus = self._p_power(precision)
+        scale = self._p_power(v)
+        u = QQ(x) / scale
+        reduced = (u.numerator() * u.denominator().inverse_mod(modulus)) % modulus
         if error - v >= 5:
             # If there is not much relative precision left, it is better to
             # just go with the integer/rational lift. The rational
             # reconstruction is likely not smaller.
+            from sage.arith.all import rational_reconstruction
             try:
-                reconstruction = reduced.rational_reconstruction()
+                reconstruction = rational_reconstruction(reduced, modulus) * scale
                 if reconstruction in self.domain():
                     return self.domain()(reconstruction)
             except ArithmeticError:pass
-        
-        return self.domain()(reduced.lift())
+
+        return self.domain()(reduced * scale)
+
+    def _simplify_batch(self, xs, error=None, force=False, size_heuristic_bound=None):
+        r"""
+        Return simplified versions of the elements of ``xs``, see
+        :meth:`simplify`.
+
+        The valuations of the elements which need to be simplified are
+        computed in one batch.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(ZZ, 2)
+            sage: v._simplify_batch([6, 2^40 + 2^10, 0], error=5)
+            [6, 0, 0]
+            sage: v._simplify_batch([6, 2^40 + 2^10], error=5, force=True)
+            [6, 0]
+
+        """
+        if size_heuristic_bound is None:
+            size_heuristic_bound = simplification_policy().bound()
+        xs = [self.domain().coerce(x) for x in xs]
+        simplify = [i for i,x in enumerate(xs) if force or self._relative_size(x) > size_heuristic_bound]
+        ret = list(xs)
+        for i, v in zip(simplify, self._call_batch([xs[i] for i in simplify])):
+            ret[i] = self._simplify(xs[i], v, error)
+        return ret
 
 
 class pAdicFromLimitValuation(FiniteExtensionFromLimitValuation, pAdicValuation_base):
@@ -1332,6 +2115,210 @@ class pAdicFromLimitValuation(FiniteExtensionFromLimitValuation, pAdicValuation_
                 return [pAdicValuation(ring, approximant)]
         return super(pAdicFromLimitValuation, self).extensions(ring)
 
+    def completion(self, precision=20, names=None):
+        r"""
+        Return an embedding of the number field of this valuation into its
+        completion, an extension of `\QQ_p` with ``precision`` digits of
+        relative precision.
+
+        INPUT:
+
+        - ``precision`` -- a positive integer (default: ``20``), the
+          precision of the `p`-adic field
+
+        - ``names`` -- the name of the generator of the completion (default:
+          the name of the generator of the number field followed by ``bar``)
+
+        OUTPUT:
+
+        A :class:`CompletionEmbedding` into `\QQ_p[x]/(g)` where `g` is the
+        factor of the defining polynomial of the number field over `\QQ_p`
+        which corresponds to this valuation.
+
+        ALGORITHM:
+
+        We factor the defining polynomial over `\QQ_p` with
+        :meth:`montes_factorization`. The current approximant of the limit
+        valuation underlying this valuation already separates the extensions
+        of the `p`-adic valuation, so the factor which belongs to this
+        valuation is the only one which is not an equivalence unit for that
+        approximant, i.e., whose reduction is divisible by the reduction of
+        the key polynomial of the approximant. This does not refine the
+        approximant to the precision of the factors.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: K.<i> = NumberField(x^2 + 1)
+            sage: v, w = pAdicValuation(QQ, 5).extensions(K)
+            sage: phi = v.completion(10)
+            sage: phi(i)^2 + 1 == 0
+            True
+
+        The embedding belongs to ``v`` and not to ``w``::
+
+            sage: s = v.separating_element([w])
+            sage: phi(s).lift()[0].valuation() == v(s)
+            True
+
+        The factor is chosen without refining the approximant of ``v``::
+
+            sage: approximant = v._base_valuation._approximation
+            sage: phi = v.completion(30)
+            sage: v._base_valuation._approximation is approximant
+            True
+
+        """
+        from sage.rings.all import QQ, ZZ, Qp
+        from sage.rings.number_field.number_field import is_NumberField
+        K = self.domain().fraction_field()
+        if not is_NumberField(K) or K.base_field() is not QQ:
+            raise NotImplementedError("completions are only implemented for absolute number fields")
+        G = K.relative_polynomial()
+        if not G.is_monic() or not all(c in ZZ for c in G.coefficients()):
+            raise NotImplementedError("completions are only implemented for number fields with a monic integral defining polynomial")
+        if names is None:
+            names = (K.variable_name() + "bar",)
+
+        k = Qp(self.p(), precision)
+        factors = [g for g, _ in pAdicValuation(k).montes_factorization(G.change_ring(k), assume_squarefree=True, required_precision=precision)]
+        approximant = self._base_valuation._approximation
+        R = approximant.domain()
+        factors = [g for g in factors if not approximant.is_equivalence_unit(R([c.lift() for c in g.list()]))]
+        if len(factors) != 1:
+            raise ValueError("the factors of %r over %r can not be told apart at this precision"%(G, k))
+        g = factors[0]
+        return CompletionEmbedding(K, g.parent().quotient(g, names=names))
+
+class CompletionEmbedding(Morphism):
+    r"""
+    An embedding of an absolute number field into an extension of `\QQ_p`
+    given as `\QQ_p[x]/(g)` which sends the generator of the number field to
+    the class of `x`.
+
+    Such embeddings are created by
+    :meth:`pAdicFromLimitValuation.completion`. Besides single elements,
+    they map whole lists of elements with :meth:`images`.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: R.<x> = QQ[]
+        sage: K.<a> = NumberField(x^2 - 5)
+        sage: v = pAdicValuation(K, 3)
+        sage: phi = v.completion(5)
+        sage: phi.codomain().base_ring()
+        3-adic Field with capped relative precision 5
+        sage: phi.codomain().modulus().degree()
+        2
+
+    """
+    def __init__(self, domain, codomain):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: K.<a> = NumberField(x^2 - 11)
+            sage: phi = pAdicValuation(K, 3).completion(5)
+            sage: isinstance(phi, CompletionEmbedding)
+            True
+
+        """
+        from sage.categories.homset import Hom
+        from sage.categories.rings import Rings
+        Morphism.__init__(self, Hom(domain, codomain, Rings()))
+
+    def _repr_(self):
+        r"""
+        Return a printable representation of this embedding.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: K.<a> = NumberField(x^2 - 14)
+            sage: phi = pAdicValuation(K, 3).completion(2)
+            sage: repr(phi).startswith("Completion embedding of Number Field in a with defining polynomial x^2 - 14 into Univariate Quotient Polynomial Ring in abar over 3-adic Field") # indirect doctest
+            True
+
+        """
+        return "Completion embedding of %r into %r"%(self.domain(), self.codomain())
+
+    @cached_method
+    def _power_basis_images(self):
+        r"""
+        Return the matrix whose rows are the coordinates of the images of the
+        powers of the generator of the domain.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: K.<a> = NumberField(x^2 - 17)
+            sage: phi = pAdicValuation(QQ, 2).extensions(K)[0].completion(3)
+            sage: phi._power_basis_images().dimensions()
+            (2, 1)
+
+        """
+        from sage.matrix.constructor import matrix
+        L = self.codomain()
+        d = L.modulus().degree()
+        n = self.domain().degree()
+        powers = [L.one()]
+        for i in range(1, n):
+            powers.append(powers[-1] * L.gen())
+        return matrix(L.base_ring(), n, d, [c.lift().padded_list(d) for c in powers])
+
+    def images(self, xs):
+        r"""
+        Return the images of the elements of ``xs``.
+
+        The coordinates of the elements with respect to the power basis are
+        transferred in a single matrix product.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: K.<a> = NumberField(x^3 - 5)
+            sage: phi = pAdicValuation(K, 7).completion(6)
+            sage: b, c = phi.images([a, a^2 + 1/7])
+            sage: c - b^2 == 1/7
+            True
+            sage: phi.images([])
+            []
+
+        """
+        from sage.matrix.constructor import matrix
+        xs = [self.domain().coerce(x) for x in xs]
+        if not xs:
+            return []
+        L = self.codomain()
+        k = L.base_ring()
+        n = self.domain().degree()
+        coordinates = matrix(k, len(xs), n, [list(x.vector()) for x in xs])
+        images = coordinates * self._power_basis_images()
+        return [L(list(row)) for row in images.rows()]
+
+    def _call_(self, x):
+        r"""
+        Return the image of ``x``.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: K.<a> = NumberField(x^2 - 23)
+            sage: phi = pAdicValuation(K, 3).completion(5)
+            sage: phi(a)^2 == 23
+            True
+
+        """
+        return self.images([x])[0]
+
+
 def _fraction_field(ring):
     r"""
     Return a fraction field of ``ring``.
@@ -1360,3 +2347,167 @@ def _fraction_field(ring):
         if ring in IntegralDomains():
             return ring.base().change_ring(ring.base_ring().fraction_field()).quo(ring.modulus())
     return ring.fraction_field()
+
+
+def integral_basis(G):
+    r"""
+    Return a basis of the ring of integers of the number field defined by
+    ``G``.
+
+    The bases at the primes `p` whose square divides the discriminant of
+    ``G`` are computed with :meth:`pAdicValuation_base.p_integral_basis`,
+    i.e., from the Mac Lane approximants of ``G``, and then combined.
+
+    INPUT:
+
+    - ``G`` -- a monic irreducible polynomial with integral coefficients
+      over the rationals
+
+    OUTPUT:
+
+    A list of polynomials of degree less than the degree of ``G`` whose
+    classes form a basis of the ring of integers.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: R.<x> = QQ[]
+        sage: integral_basis(x^2 - 5)
+        [1/2*x + 1/2, x]
+        sage: integral_basis(x^3 - 2)
+        [1, x, x^2]
+
+    """
+    from sage.rings.all import QQ, ZZ
+    from sage.modules.free_module_element import vector
+    n = G.degree()
+    generators = [G.parent().gen()**i for i in range(n)]
+    for p, e in ZZ(G.discriminant()).factor():
+        if e >= 2:
+            generators.extend(pAdicValuation(QQ, p).p_integral_basis(G))
+    V = QQ**n
+    M = V.span([vector(QQ, g.padded_list(n)) for g in generators], ZZ)
+    return [G.parent()(list(b)) for b in M.basis()]
+
+def prime_decomposition(K, primes):
+    r"""
+    Return the decomposition of the rational ``primes`` in the number field
+    ``K``.
+
+    For each prime `p`, the Mac Lane approximants of the defining polynomial
+    of ``K`` are computed once; they determine the primes above `p`, their
+    ramification indices and residue degrees, and the corresponding
+    valuations.
+
+    INPUT:
+
+    - ``K`` -- an absolute number field whose defining polynomial is monic
+      and integral
+
+    - ``primes`` -- an iterable of rational primes
+
+    OUTPUT:
+
+    A dictionary which maps each prime `p` to a list of tuples ``(e, f,
+    (p, alpha), w)``, one for each prime ideal `P` above `p`, where ``e``
+    and ``f`` are the ramification index and the residue degree of `P`,
+    `P=(p,\alpha)`, and ``w`` is the valuation of ``K`` which corresponds
+    to `P` (as returned by :func:`pAdicValuation`.)
+
+    ALGORITHM:
+
+    The generator `\alpha` is built from the uniformizer of the final
+    approximant of `P`, a product of powers of its key polynomials and of
+    `p`. Such an element has valuation `1/e` at `P` but may not be a unit at
+    the other primes above `p`. In that case, let `s` be an element with
+    positive valuation at `P` and negative valuation at the other primes
+    above `p`. For `N` large enough, `(\pi + s^N)/(1 + s^N)` has the
+    valuation of `\pi` at `P` and is a unit at the other primes. Finally,
+    denominators prime to `p` are cleared.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: R.<x> = QQ[]
+        sage: K.<i> = NumberField(x^2 + 1)
+        sage: D = prime_decomposition(K, [2, 3, 5])
+        sage: [(e, f) for e, f, _, _ in D[2]]
+        [(2, 1)]
+        sage: [(e, f) for e, f, _, _ in D[3]]
+        [(1, 2)]
+        sage: [(e, f) for e, f, _, _ in D[5]]
+        [(1, 1), (1, 1)]
+
+    The generators agree with Sage's prime ideals::
+
+        sage: set(K.ideal(list(gens)) for _, _, gens, _ in D[5]) == set(K.primes_above(5))
+        True
+        sage: L.<a> = NumberField(x^3 - x^2 - 2*x - 8)
+        sage: D = prime_decomposition(L, [2])
+        sage: set(L.ideal(list(gens)) for _, _, gens, _ in D[2]) == set(L.primes_above(2))
+        True
+
+    TESTS::
+
+        sage: M.<b> = NumberField(x^2/2 + 1)
+        sage: prime_decomposition(M, [2])
+        Traceback (most recent call last):
+        ...
+        ValueError: the defining polynomial of K must be monic and integral
+
+    """
+    from sage.rings.all import ZZ, QQ
+    from sage.rings.number_field.number_field import is_NumberField
+    if not is_NumberField(K) or K.base_field() is not QQ:
+        raise ValueError("K must be an absolute number field")
+    G = K.relative_polynomial()
+    if not G.is_monic() or not all(c in ZZ for c in G.coefficients()):
+        raise ValueError("the defining polynomial of K must be monic and integral")
+
+    ret = {}
+    for p in primes:
+        p = ZZ(p)
+        if not p.is_prime():
+            raise ValueError("%r is not a prime"%(p,))
+        approximants = pAdicValuation(QQ, p).mac_lane_approximants(G, assume_squarefree=True)
+        valuations = [pAdicValuation(K, approximant, approximants) for approximant in approximants]
+        decomposition = []
+        for i, (approximant, w) in enumerate(zip(approximants, valuations)):
+            others = valuations[:i] + valuations[i+1:]
+            alpha = _two_element_generator(w, others, 1 / approximant.E(), p)
+            decomposition.append((approximant.E(), approximant.F(), (K(p), alpha), w))
+        ret[p] = decomposition
+    return ret
+
+def _two_element_generator(w, others, value, p):
+    r"""
+    Return an integral element `\alpha` such that `w(\alpha)` is ``value``,
+    the valuation of a uniformizer of ``w``, and which is a unit with
+    respect to the valuations in ``others``.
+
+    This is a helper method for :func:`prime_decomposition`.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: R.<x> = QQ[]
+        sage: K.<i> = NumberField(x^2 + 1)
+        sage: v, w = pAdicValuation(QQ, 13).extensions(K)
+        sage: from mac_lane.padic_valuation import _two_element_generator
+        sage: alpha = _two_element_generator(v, [w], 1, 13)
+        sage: v(alpha), w(alpha)
+        (1, 0)
+
+    """
+    from sage.rings.all import ZZ
+    alpha = w.uniformizer()
+    assert w(alpha) == value
+    if any(other(alpha) != 0 for other in others):
+        s = w.separating_element(others)
+        # N*w(s) must exceed w(alpha) and N*other(s) must be less than
+        # other(alpha) for all other valuations
+        N = max([w(alpha) / w(s)] + [other(alpha) / other(s) for other in others])
+        N = ZZ(N.floor() + 1)
+        alpha = (alpha + s**N) / (1 + s**N)
+        assert w(alpha) == value and all(other(alpha) == 0 for other in others)
+    return ZZ(alpha.denominator()).prime_to_m_part(p) * alpha
@@ -188,6 +188,22 @@ class ScaledValuation_generic(DiscreteValuation):
         """
         return self._base_valuation.reduce(f)
 
+    def valuation_and_reduction(self, f):
+        r"""
+        Return the valuation of ``f`` and the reduction of ``f`` multiplied
+        by an element of valuation `-v(f)`.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = 3*pAdicValuation(ZZ, 2)
+            sage: v.valuation_and_reduction(12)
+            (6, 1)
+
+        """
+        v, F = self._base_valuation.valuation_and_reduction(f)
+        return self._scale * v, F
+
     def lift(self, F):
         r"""
         Lift ``F`` from the :meth;`residue_field` of this valuation into its
@@ -20,6 +20,9 @@ AUTHORS:
 from sage.categories.morphism import Morphism
 
 from sage.misc.cachefunc import cached_method
+from sage.structure.sage_object import SageObject
+
+import threading
 
 class DiscretePseudoValuation(Morphism):
     r"""
@@ -425,7 +428,7 @@ class DiscreteValuation(DiscretePseudoValuation):
         """
         return True
 
-    def mac_lane_approximants(self, G, assume_squarefree=False, require_final_EF=True, required_precision=-1, require_incomparability=False, require_maximal_degree=False, algorithm="serial"):
+    def mac_lane_approximants(self, G, assume_squarefree=False, require_final_EF=True, required_precision=-1, require_incomparability=False, require_maximal_degree=False, algorithm="serial", cache=None, policy=None):
         r"""
         Return approximants on `K[x]` for the extensions of this valuation to
         `L=K[x]/(G)`.
@@ -466,7 +469,26 @@ class DiscreteValuation(DiscretePseudoValuation):
           factor.
 
         - ``algorithm`` -- one of ``"serial"`` or ``"parallel"`` (default:
-          ``"serial"``); whether or not to parallelize the algorithm
+          ``"serial"``); whether or not to parallelize the algorithm. The
+          parallel algorithm expands the tree of approximants in worker
+          processes, so it can not be interrupted by a
+          :class:`CancellationToken`.
+
+        - ``cache`` -- a dictionary or ``None`` (default: ``None``); if set,
+          the augmentations found for a vertex of the tree of approximants are
+          stored in this dictionary, keyed by the vertex and the truncated
+          `\phi`-adic expansion of ``G`` that determined them. Passing the same
+          dictionary when computing approximants of a polynomial that is
+          close to a previous ``G``, e.g., a perturbation of ``G`` by a high
+          power of a uniformizer, reuses these augmentations instead of
+          computing equivalence decompositions again.
+
+        - ``policy`` -- a :class:`SimplificationPolicy` or ``None`` (default:
+          ``None``); if set, this policy decides when to simplify coefficients
+          during this computation and collects metrics on their sizes,
+          otherwise the global :func:`simplification_policy` is used; not
+          supported by the parallel algorithm since its worker processes do
+          not report back to the policy
 
         EXAMPLES::
 
@@ -660,6 +682,33 @@ class DiscreteValuation(DiscretePseudoValuation):
              [ Gauss valuation induced by 2-adic valuation, v(x + 1) = 1/4, v(x^4 + 2*x^2 + 3/2*theta^4 + theta^3 + 5*theta + 1) = 5/3 ],
              [ Gauss valuation induced by 2-adic valuation, v(x + 1) = 1/4, v(x^4 + 2*x^2 + theta^4 + theta^3 + 1) = 5/3 ]]
 
+        Approximants of a family of polynomials which agree to high precision
+        can share a cache::
+
+            sage: v = pAdicValuation(QQ, 2)
+            sage: R.<x> = QQ[]
+            sage: cache = {}
+            sage: v.mac_lane_approximants(x^2 + 1, cache=cache)
+            [[ Gauss valuation induced by 2-adic valuation, v(x + 1) = 1/2 ]]
+            sage: len(cache)
+            1
+            sage: v.mac_lane_approximants(x^2 + 2^10*x + 1, cache=cache)
+            [[ Gauss valuation induced by 2-adic valuation, v(x + 1) = 1/2 ]]
+            sage: len(cache)
+            1
+
+        The sizes of the coefficients can be monitored::
+
+            sage: policy = SimplificationPolicy()
+            sage: v.mac_lane_approximants(x^2 + 1, policy=policy)
+            [[ Gauss valuation induced by 2-adic valuation, v(x + 1) = 1/2 ]]
+            sage: policy.metrics()['inspected'] > 0
+            True
+            sage: v.mac_lane_approximants(x^2 + 1, algorithm="parallel", policy=policy)
+            Traceback (most recent call last):
+            ...
+            NotImplementedError: simplification policies are not supported with the parallel algorithm
+
         An easy case that produced the wrong error at some point::
 
             sage: R.<x> = QQ[]
@@ -670,9 +719,27 @@ class DiscreteValuation(DiscretePseudoValuation):
             ValueError: G must be integral
 
         """
+        if policy is not None:
+            if algorithm == 'parallel':
+                raise NotImplementedError("simplification policies are not supported with the parallel algorithm")
+            if not isinstance(policy, SimplificationPolicy):
+                raise TypeError("policy must be a SimplificationPolicy")
+            # the policy only applies to this thread so that concurrent
+            # computations keep their own policy
+            _simplification_policies.active.append(policy)
+            try:
+                return self.mac_lane_approximants(G, assume_squarefree=assume_squarefree, require_final_EF=require_final_EF, required_precision=required_precision, require_incomparability=require_incomparability, require_maximal_degree=require_maximal_degree, algorithm=algorithm, cache=cache)
+            finally:
+                _simplification_policies.active.pop()
+
         R = G.parent()
         if R.base_ring() is not self.domain():
             raise ValueError("G must be defined over the domain of this valuation")
+        if algorithm == 'parallel' and _cancellation_tokens.active:
+            # the children of the vertices are created in worker processes
+            # which neither check the tokens of this thread nor report the
+            # vertices they expanded
+            raise NotImplementedError("cancellation tokens are not supported with the parallel algorithm")
 
         from sage.misc.misc import verbose
         verbose("Approximants of %r on %r towards %r"%(self, self.domain(), G), level=3)
@@ -715,35 +782,137 @@ class DiscreteValuation(DiscretePseudoValuation):
         # coeffs and vals are cached values. (Only v and ef are relevant,
         # everything else are caches/debug info.)
         # The boolean ef denotes whether v already has the final ramification
-        # index E and residue degree F of this approximant.
+        # index E and residue degree F of this approximant, i.e., whether E*F
+        # equals the degree bound, the degree of the factors of G that v
+        # accounts for.
         # An edge V -- P represents the relation P.v ≤ V.v (pointwise on the
         # polynomial ring K[x]) between the valuations.
         class Node(object):
-            def __init__(self, valuation, parent, ef, principal_part_bound, coefficients, valuations):
+            def __init__(self, valuation, parent, degree_bound, principal_part_bound, coefficients, valuations):
                 self.valuation = valuation
                 self.parent = parent
-                self.ef = ef
+                self.degree_bound = degree_bound
+                self.ef = degree_bound == valuation.E()*valuation.F()
                 self.principal_part_bound = principal_part_bound
                 self.coefficients = coefficients
                 self.valuations = valuations
                 self.forced_leaf = False
+            def merge(self, degree_bound, principal_part_bound):
+                # another branch produced the same valuation; it accounts for
+                # further roots of G
+                self.degree_bound += degree_bound
+                self.ef = self.degree_bound == self.valuation.E()*self.valuation.F()
+                if self.principal_part_bound and principal_part_bound:
+                    self.principal_part_bound += principal_part_bound
+                else:
+                    self.principal_part_bound = None
+                # the cached expansion was truncated to the old bound
+                self.coefficients = None
+                self.valuations = None
         import mac_lane
         mac_lane.valuation.Node = Node
 
-        seed = Node(GaussValuation(R,self), None, G.degree() == 1, G.degree(), None, None)
+        seed = Node(GaussValuation(R,self), None, G.degree(), G.degree(), None, None)
         seed.forced_leaf = is_sufficient(seed, [])
 
+        # The nodes whose children have not been computed yet; reported as
+        # the partial result if the computation gets cancelled.
+        frontier = [seed]
+
+        # Different branches of the tree can produce augmentations which
+        # define the same valuation, e.g., when precision drops over p-adic
+        # rings. Such a duplicate is merged into the node that was created
+        # first, as long as that node has not been expanded yet; the merged
+        # node then accounts for the roots of G of both branches. This
+        # requires that all nodes are created in this process, i.e., the
+        # serial algorithm.
+        deduplicate = algorithm == 'serial'
+        index = _ApproximantIndex()
+        index.add(seed.valuation, seed)
+        # valuations whose children have been computed (but possibly
+        # merged into other nodes)
+        expanded = set()
+
+        from itertools import islice
+        def truncate(iterable, principal_part_bound):
+            if principal_part_bound:
+                iterable = islice(iterable, 0, principal_part_bound + 1, 1)
+            return list(iterable)
+
+        # The augmentations that mac_lane_step() produces for a vertex only
+        # depend on the principal part of the phi-adic expansion of G. The
+        # equivalence decomposition of G is determined by this truncated
+        # expansion up to terms of valuation exceeding v(G); the slopes of the
+        # Newton polygons are then determined by the valuations of the
+        # truncated expansions with respect to the new key polynomials. We
+        # only cache results over fields since equivalence_decomposition()
+        # ignores the truncated expansion otherwise.
+        use_cache = cache is not None and R.base_ring().is_field()
+
+        def cached_augmentations(node):
+            v = node.valuation
+            if node.coefficients is None:
+                node.coefficients = truncate(v.coefficients(G), node.principal_part_bound)
+                node.valuations = truncate(v.valuations(G, coefficients=node.coefficients), node.principal_part_bound)
+            bound = min(node.valuations)
+            for coefficients, valuations, children in cache.get((v, node.principal_part_bound), []):
+                if len(coefficients) != len(node.coefficients) or min(valuations) != bound:
+                    continue
+                if not all(v(c - d) + i*v.mu() > bound for i,(c,d) in enumerate(zip(coefficients, node.coefficients))):
+                    continue
+                augmentations = []
+                for w, degree_bound, principal_part_bound, w_valuations in children:
+                    w_coefficients = truncate(w.coefficients(G), node.principal_part_bound)
+                    if truncate(w.valuations(G, coefficients=w_coefficients), node.principal_part_bound) != w_valuations:
+                        break
+                    augmentations.append((w, degree_bound, principal_part_bound, w_coefficients, w_valuations))
+                else:
+                    return augmentations
+            return None
+
+        def cache_augmentations(node, augmentations):
+            # augmentations to infinity, i.e., actual factors of G, can not be
+            # shared with other polynomials
+            if any(coefficients is None or w.mu() is infinity for w,_,_,coefficients,_ in augmentations):
+                return
+            children = [(w, degree_bound, principal_part_bound, valuations) for w, degree_bound, principal_part_bound, _, valuations in augmentations]
+            cache.setdefault((node.valuation, node.principal_part_bound), []).append((node.coefficients, node.valuations, children))
+
         def create_children(node):
             new_leafs = []
             if node.forced_leaf:
                 return new_leafs
-            augmentations = node.valuation.mac_lane_step(G, report_degree_bounds_and_caches=True, coefficients=node.coefficients, valuations=node.valuations, check=False, principal_part_bound=node.principal_part_bound)
+            _check_cancellation()
+            augmentations = None
+            if use_cache:
+                augmentations = cached_augmentations(node)
+            if augmentations is None:
+                augmentations = node.valuation.mac_lane_step(G, report_degree_bounds_and_caches=True, coefficients=node.coefficients, valuations=node.valuations, check=False, principal_part_bound=node.principal_part_bound)
+                if use_cache:
+                    cache_augmentations(node, augmentations)
+            expanded.add(node.valuation)
+            merged = []
             for w, bound, principal_part_bound, coefficients, valuations in augmentations:
-                ef = bound == w.E()*w.F()
-                new_leafs.append(Node(w, node, ef, principal_part_bound, coefficients, valuations))
+                if deduplicate:
+                    survivor = index.find(w)
+                    if survivor is not None and survivor.valuation not in expanded:
+                        survivor.merge(bound, principal_part_bound)
+                        if survivor not in new_leafs and survivor not in merged:
+                            merged.append(survivor)
+                        continue
+                leaf = Node(w, node, bound, principal_part_bound, coefficients, valuations)
+                if deduplicate:
+                    index.add(w, leaf)
+                new_leafs.append(leaf)
             for leaf in new_leafs:
                 if is_sufficient(leaf, [l for l in new_leafs if l is not leaf]):
                     leaf.forced_leaf = True
+            frontier.remove(node)
+            # nodes of earlier branches which absorbed a duplicate might now
+            # be sufficient
+            for leaf in merged:
+                leaf.forced_leaf = is_sufficient(leaf, [l for l in frontier + new_leafs if l is not leaf])
+            frontier.extend(new_leafs)
             return new_leafs
 
         def reduce_tree(v, w):
@@ -755,18 +924,22 @@ class DiscreteValuation(DiscretePseudoValuation):
             structure = 'forest',
             enumeration = 'breadth')
         # this is a tad faster but annoying for profiling / debugging
-        if algorithm == 'parallel':
-            nodes = tree.map_reduce(
-                map_function = lambda x: [x],
-                reduce_init = [])
-        elif algorithm == 'serial':
-            from sage.parallel.map_reduce import RESetMapReduce
-            nodes = RESetMapReduce(
-                   forest = tree,
-                   map_function = lambda x: [x],
-                   reduce_init = []).run_serial()
-        else:
-            raise NotImplementedError(algorithm)
+        try:
+            if algorithm == 'parallel':
+                nodes = tree.map_reduce(
+                    map_function = lambda x: [x],
+                    reduce_init = [])
+            elif algorithm == 'serial':
+                from sage.parallel.map_reduce import RESetMapReduce
+                nodes = RESetMapReduce(
+                       forest = tree,
+                       map_function = lambda x: [x],
+                       reduce_init = []).run_serial()
+            else:
+                raise NotImplementedError(algorithm)
+        except ComputationCancelled as e:
+            e.partial = [node.valuation for node in frontier]
+            raise
         leafs = set([node.valuation for node in nodes])
         for node in nodes:
             if node.parent is None:
@@ -774,6 +947,8 @@ class DiscreteValuation(DiscretePseudoValuation):
             v = node.parent.valuation
             if v in leafs:
                 leafs.remove(v)
+        # nodes whose children were all duplicates are not leafs either
+        leafs.difference_update(expanded)
 
 
         return list(leafs)
@@ -901,6 +1076,62 @@ class DiscreteValuation(DiscretePseudoValuation):
         assert len(smaller_approximants) == 1
         return smaller_approximants[0]
 
+    def mac_lane_approximants_async(self, G, pool=None, timeout=None, **kwds):
+        r"""
+        Compute :meth:`mac_lane_approximants` for ``G`` in a worker process.
+
+        INPUT:
+
+        - ``G`` -- a polynomial, see :meth:`mac_lane_approximants`
+
+        - ``pool`` -- a :class:`ValuationPool` or ``None`` (default:
+          ``None``); if ``None``, the :func:`default_pool` is used
+
+        - ``timeout`` -- a number of seconds or ``None`` (default: ``None``),
+          after which the computation is interrupted
+
+        All further arguments are passed on to :meth:`mac_lane_approximants`.
+
+        OUTPUT:
+
+        An :class:`AsyncComputation`. Concurrent requests for the same
+        approximants without a ``timeout`` share one computation.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = pAdicValuation(QQ, 2)
+            sage: v.mac_lane_approximants_async(x^2 + 1).result()
+            [[ Gauss valuation induced by 2-adic valuation, v(x + 1) = 1/2 ]]
+
+        """
+        if pool is None:
+            from valuation_pool import default_pool
+            pool = default_pool()
+        return pool.submit(self, 'mac_lane_approximants', G, timeout=timeout, **kwds)
+
+    def montes_factorization_async(self, G, pool=None, timeout=None, **kwds):
+        r"""
+        Compute :meth:`montes_factorization` of ``G`` in a worker process.
+
+        See :meth:`mac_lane_approximants_async` for a description of the
+        parameters.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = pAdicValuation(QQ, 2)
+            sage: v.montes_factorization_async(x^2 - 1).result()
+            (x - 1) * (x + 1)
+
+        """
+        if pool is None:
+            from valuation_pool import default_pool
+            pool = default_pool()
+        return pool.submit(self, 'montes_factorization', G, timeout=timeout, **kwds)
+
     def montes_factorization(self, G, assume_squarefree=False, required_precision=None):
         """
         Factor ``G`` over the completion of the domain of this valuation.
@@ -972,6 +1203,160 @@ class DiscreteValuation(DiscretePseudoValuation):
         from sage.structure.factorization import Factorization
         return Factorization([ (g,1) for g in ret ], simplify=False)
 
+    def power_series(self, f, precision, names='t', block_size=8):
+        r"""
+        Return the expansion of ``f`` as a power series in the
+        :meth:`uniformizer` of this valuation, i.e., the image of ``f`` in
+        the completion of the domain.
+
+        This is not called ``expansion`` since inductive valuations use that
+        name for `\phi`-adic expansions.
+
+        INPUT:
+
+        - ``f`` -- an element of the domain of this valuation
+
+        - ``precision`` -- an integer, the absolute precision of the result
+          in powers of the uniformizer
+
+        - ``names`` -- the name of the variable of the result (default:
+          ``'t'``) which stands for the uniformizer
+
+        - ``block_size`` -- a positive integer (default: ``8``), the number
+          of terms below which they are computed one by one, see
+          :meth:`_power_series_digits`
+
+        OUTPUT:
+
+        A Laurent series `\sum_i a_i t^i` over the :meth:`residue_field`
+        such that `f-\sum_i\mathrm{lift}(a_i)\pi^i` has valuation at least
+        ``precision`` times the valuation of the uniformizer `\pi`, where
+        `\mathrm{lift}` is :meth:`lift`.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(QQ, 3)
+            sage: v.power_series(10, 4)
+            1 + t^2 + O(t^4)
+            sage: v.power_series(-1/3, 3)
+            2*t^-1 + 2 + 2*t + 2*t^2 + O(t^3)
+
+        The Laurent series of a rational function at a place::
+
+            sage: K.<x> = FunctionField(QQ)
+            sage: v = FunctionFieldValuation(K, x)
+            sage: v.power_series(1/(x - x^2), 3)
+            t^-1 + 1 + t + t^2 + O(t^3)
+            sage: v.power_series(1/(x - x^2), 40, block_size=2) == v.power_series(1/(x - x^2), 40, block_size=40)
+            True
+
+        The `\pi`-adic digits of `i` for an extension of the `5`-adic
+        valuation to `\QQ(i)` are the `5`-adic digits of a square root of
+        `-1`::
+
+            sage: R.<x> = QQ[]
+            sage: K.<i> = NumberField(x^2 + 1)
+            sage: w = pAdicValuation(QQ, 5).extensions(K)[0]
+            sage: s = w.power_series(i, 6)
+            sage: r = ZZ(Qp(5, 6)(-1).sqrt().lift())
+            sage: r = r if w(i - r) >= 6 else 5^6 - r
+            sage: [ZZ(c) for c in s.list()] == r.digits(5, padto=6)
+            True
+
+        """
+        from sage.rings.all import ZZ, infinity, LaurentSeriesRing
+        precision = ZZ(precision)
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+
+        f = self.domain().coerce(f)
+        R = LaurentSeriesRing(self.residue_field(), names=names)
+        unit = self.value_group().gen()
+
+        v = self(f)
+        if v is infinity or v >= precision * unit:
+            return R.zero().add_bigoh(precision)
+        start = ZZ(v / unit)
+
+        digits = self._power_series_digits(self.shift(f, -v), precision - start, block_size, {})
+        return (R.gen()**start * R(digits)).add_bigoh(precision)
+
+    def _power_series_digits(self, x, n, block_size, lifts):
+        r"""
+        Return the first ``n`` digits of the expansion of ``x``, an element
+        of non-negative valuation, in powers of the :meth:`uniformizer`, see
+        :meth:`power_series`.
+
+        INPUT:
+
+        - ``x`` -- an element of the domain of non-negative valuation
+
+        - ``n`` -- a non-negative integer
+
+        - ``block_size`` -- a positive integer, the number of digits below
+          which they are computed one by one
+
+        - ``lifts`` -- a dictionary which caches the :meth:`lift` of the
+          digits
+
+        ALGORITHM:
+
+        Computing the digits one by one, i.e., reducing, subtracting the
+        lift of the reduction, and shifting, operates on elements of the size
+        of ``x`` for every digit. Instead, we compute the lower half of the
+        digits from ``x`` simplified modulo `\pi^{n/2}`, subtract their lifts
+        from ``x`` in one step and compute the upper half from the result
+        simplified modulo `\pi^{n/2}`. Recursively, the digits are only
+        computed one by one on elements which have been simplified modulo
+        `\pi^{\text{block_size}}`. This is the usual divide and conquer
+        approach to radix conversion.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: K.<x> = FunctionField(QQ)
+            sage: v = FunctionFieldValuation(K, x - 1)
+            sage: v._power_series_digits(x^3, 5, 2, {})
+            [1, 3, 3, 1, 0]
+
+        """
+        from sage.rings.all import ZZ, infinity
+        unit = self.value_group().gen()
+        zero = self.residue_field().zero()
+
+        if n <= block_size:
+            digits = []
+            while len(digits) < n:
+                v = self(x)
+                if v is infinity or v >= (n - len(digits)) * unit:
+                    # all remaining digits are zero
+                    break
+                # skip the digits which are zero
+                zeros = ZZ(v / unit)
+                digits.extend([zero] * zeros)
+                x = self.shift(x, -v)
+                a = self.residue_field()(self.reduce(x))
+                digits.append(a)
+                if a not in lifts:
+                    lifts[a] = self.domain()(self.lift(a))
+                x = self.shift(x - lifts[a], -unit)
+            return digits + [zero] * (n - len(digits))
+
+        h = n // 2
+        low = self._power_series_digits(self.simplify(x, error=(h-1)*unit, force=True), h, block_size, lifts)
+
+        # subtract the lifts of the lower digits by Horner's rule
+        recomposed = self.domain().zero()
+        for a in reversed(low):
+            if a not in lifts:
+                lifts[a] = self.domain()(self.lift(a))
+            recomposed = self.shift(recomposed, unit) + lifts[a]
+        x = self.shift(x - recomposed, -h*unit)
+
+        high = self._power_series_digits(self.simplify(x, error=(n-h-1)*unit, force=True), n - h, block_size, lifts)
+        return low + high
+
     def _ge_(self, other):
         r"""
         Return whether this valuation is greater than or equal to ``other``
@@ -989,3 +1374,741 @@ class DiscreteValuation(DiscretePseudoValuation):
         if other.is_trivial():
             return other.is_discrete_valuation()
         return super(DiscreteValuation, self)._ge_(other)
+
+
+class _ApproximantIndex(object):
+    r"""
+    An index of the vertices in the tree of approximants of
+    :meth:`DiscreteValuation.mac_lane_approximants` which finds vertices that
+    define the same valuation.
+
+    Vertices are indexed by the degrees and values of the key polynomials in
+    the augmentation chain of their valuations.
+
+    EXAMPLES:
+
+    Over a `p`-adic ring, key polynomials which differ by less than the
+    precision can lead to equal valuations::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: from mac_lane.valuation import _ApproximantIndex
+        sage: R.<x> = Qp(2, 5)[]
+        sage: v = GaussValuation(R)
+        sage: index = _ApproximantIndex()
+        sage: index.add(v.augmentation(x + 1, 1), 'vertex')
+        sage: index.find(v.augmentation(x + 9, 1))
+        'vertex'
+        sage: index.find(v.augmentation(x + 1, 2)) is None
+        True
+
+    """
+    def __init__(self):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation import _ApproximantIndex
+            sage: _ApproximantIndex()._vertices
+            {}
+
+        """
+        self._vertices = {}
+
+    def _key(self, v):
+        r"""
+        Return the key under which ``v`` is indexed.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation import _ApproximantIndex
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: _ApproximantIndex()._key(v.augmentation(x + 1, 1))
+            ((1, 1),)
+
+        """
+        return tuple((w.phi().degree(), w.mu()) for w in v.augmentation_chain()[:-1])
+
+    def find(self, v):
+        r"""
+        Return the vertex which has been added for a valuation that is equal
+        to ``v``, or ``None`` if there is no such vertex.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation import _ApproximantIndex
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: _ApproximantIndex().find(v) is None
+            True
+
+        """
+        for w, vertex in self._vertices.get(self._key(v), []):
+            if v is w or (v >= w and v <= w):
+                return vertex
+        return None
+
+    def add(self, v, vertex):
+        r"""
+        Record that ``vertex`` has been created for the valuation ``v``.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation import _ApproximantIndex
+            sage: R.<x> = QQ[]
+            sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+            sage: index = _ApproximantIndex()
+            sage: index.add(v, 'seed')
+            sage: index.find(v)
+            'seed'
+
+        """
+        self._vertices.setdefault(self._key(v), []).append((v, vertex))
+
+
+_CHECK_LEVELS = ('off', 'cheap', 'paranoid')
+_check_level = 'paranoid'
+
+def check_level():
+    r"""
+    Return the current level of internal consistency checks, see
+    :func:`set_check_level`.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: check_level()
+        'paranoid'
+
+    """
+    return _check_level
+
+def set_check_level(level):
+    r"""
+    Set the level of internal consistency checks performed by the valuations
+    in this package and return the previous level.
+
+    Many algorithms verify their results with assertions that can be as
+    expensive as the computation itself, e.g., that a lifted polynomial is
+    a key polynomial or that an equivalence decomposition is correct.
+
+    INPUT:
+
+    - ``level`` -- one of ``'off'``, ``'cheap'``, and ``'paranoid'`` (the
+      default); with ``'off'`` none of these checks is performed, with
+      ``'cheap'`` only checks whose cost is negligible compared to the
+      computation they verify are performed
+
+    Note that this does not affect the validation of user input, i.e., the
+    ``check`` parameter of methods such as
+    :meth:`InductiveValuation.mac_lane_step`.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: old = set_check_level('off'); old
+        'paranoid'
+        sage: R.<x> = QQ[]
+        sage: v = pAdicValuation(QQ, 2)
+        sage: v.mac_lane_approximants(x^2 + 1)
+        [[ Gauss valuation induced by 2-adic valuation, v(x + 1) = 1/2 ]]
+        sage: set_check_level(old)
+        'off'
+
+    TESTS::
+
+        sage: set_check_level('none')
+        Traceback (most recent call last):
+        ...
+        ValueError: level must be one of ('off', 'cheap', 'paranoid') but 'none' is not
+
+    """
+    global _check_level
+    if level not in _CHECK_LEVELS:
+        raise ValueError("level must be one of %r but %r is not"%(_CHECK_LEVELS, level))
+    old, _check_level = _check_level, level
+    return old
+
+def _checks(level):
+    r"""
+    Return whether consistency checks of ``level`` should be performed at
+    the current :func:`check_level`.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: from mac_lane.valuation import _checks
+        sage: _checks('cheap')
+        True
+
+    """
+    return _CHECK_LEVELS.index(_check_level) >= _CHECK_LEVELS.index(level)
+
+
+class SimplificationPolicy(SageObject):
+    r"""
+    A policy that decides when the coefficients of polynomials should be
+    simplified, i.e., replaced by smaller elements which are congruent up to
+    sufficient precision (see
+    :meth:`DiscretePseudoValuationSpace.ElementMethods.simplify`.)
+
+    Valuations estimate how much the coefficients of an element could shrink
+    through simplification, see ``_relative_size``. Simplification is only
+    performed when this estimate reaches the :meth:`bound` of the policy.
+
+    An adaptive policy adjusts this bound from the effect of the
+    simplifications it observes: if simplification shrinks the coefficients
+    only a little, it is performed less often; if the coefficients shrink
+    drastically, they had grown too much and simplification is performed
+    earlier.
+
+    INPUT:
+
+    - ``bound`` -- a positive integer (default: 32), the initial bound
+
+    - ``adaptive`` -- a boolean (default: ``True``), whether to adjust the
+      bound
+
+    - ``minimum``, ``maximum`` -- positive integers (default: 4 and 4096), the
+      range in which an adaptive policy keeps its bound
+
+    - ``all_coefficients`` -- a boolean (default: ``False``), whether to
+      estimate the size of a polynomial from all its coefficients and not
+      only from its constant coefficient; this is more expensive but catches
+      coefficient growth in the higher coefficients
+
+    - ``collect_metrics`` -- a boolean (default: ``True``), whether to count
+      the inspected and simplified elements, see :meth:`metrics`; an adaptive
+      policy that does not collect metrics can not take the time spent on
+      simplifications into account
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: policy = SimplificationPolicy(); policy
+        Adaptive simplification policy with bound 32
+        sage: R.<x> = QQ[]
+        sage: v = GaussValuation(R, pAdicValuation(QQ, 2))
+        sage: old = set_simplification_policy(policy)
+        sage: v.simplify(2^100*x + 1 + 2^100)
+        1
+        sage: policy.metrics()
+        {'bound': 16, 'inspected': 1, 'maximal size': 101, 'seconds': ..., 'simplified': 1}
+        sage: set_simplification_policy(old)
+        Adaptive simplification policy with bound 16
+
+    """
+    def __init__(self, bound=32, adaptive=True, minimum=4, maximum=4096, all_coefficients=False, collect_metrics=True):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: SimplificationPolicy(bound=1)
+            Traceback (most recent call last):
+            ...
+            ValueError: bound must be between 4 and 4096
+
+        """
+        if not minimum <= bound <= maximum:
+            raise ValueError("bound must be between %s and %s"%(minimum, maximum))
+        self._bound = bound
+        self._adaptive = adaptive
+        self._minimum = minimum
+        self._maximum = maximum
+        self._all_coefficients = all_coefficients
+        self._collect_metrics = collect_metrics
+        self._inspected = 0
+        self._simplified = 0
+        self._maximal_size = 0
+        self._seconds = 0
+
+    def _repr_(self):
+        r"""
+        Return a printable representation of this policy.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: SimplificationPolicy(adaptive=False) # indirect doctest
+            Simplification policy with bound 32
+
+        """
+        return "%simplification policy with bound %s"%("Adaptive s" if self._adaptive else "S", self._bound)
+
+    def bound(self):
+        r"""
+        Return the current bound on the estimated relative size of an element
+        from which on it gets simplified.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: SimplificationPolicy().bound()
+            32
+
+        """
+        return self._bound
+
+    def all_coefficients(self):
+        r"""
+        Return whether the size of a polynomial should be estimated from all
+        its coefficients.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: SimplificationPolicy().all_coefficients()
+            False
+
+        """
+        return self._all_coefficients
+
+    def observe(self, size):
+        r"""
+        Record that an element of estimated relative ``size`` has been
+        inspected.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: policy = SimplificationPolicy()
+            sage: policy.observe(10)
+            sage: policy.metrics()['maximal size']
+            10
+
+        """
+        if not self._collect_metrics:
+            return
+        self._inspected += 1
+        if size > self._maximal_size:
+            self._maximal_size = size
+
+    def observe_simplification(self, size, simplified_size, seconds):
+        r"""
+        Record that an element of estimated relative ``size`` has been
+        simplified to an element of estimated relative ``simplified_size`` in
+        ``seconds``, and adjust the :meth:`bound` if this policy is adaptive.
+
+        An adaptive policy simplifies less often when a simplification did
+        not shrink the coefficients much, or when it took more than twice as
+        long as the simplifications observed so far without shrinking the
+        coefficients drastically. It simplifies earlier when the coefficients
+        shrank drastically.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: policy = SimplificationPolicy()
+            sage: policy.observe_simplification(40, 30, 0.1)
+            sage: policy.bound()
+            64
+            sage: policy.observe_simplification(1000, 1, 0.1)
+            sage: policy.bound()
+            32
+
+        A simplification that shrinks the coefficients noticeably but is
+        unusually expensive also makes the policy simplify less often::
+
+            sage: policy.observe_simplification(40, 15, 0.1)
+            sage: policy.bound()
+            32
+            sage: policy.observe_simplification(40, 15, 1.0)
+            sage: policy.bound()
+            64
+
+        """
+        expensive = False
+        if self._collect_metrics:
+            expensive = self._simplified > 0 and seconds > 2 * self._seconds / self._simplified
+            self._simplified += 1
+            self._seconds += seconds
+        if not self._adaptive:
+            return
+        if 8 * simplified_size <= size:
+            # the coefficients had grown a lot, simplify earlier
+            self._bound = max(self._minimum, self._bound // 2)
+        elif 2 * simplified_size > size or expensive:
+            # simplification did not pay off, do it less often
+            self._bound = min(self._maximum, 2 * self._bound)
+
+    def metrics(self):
+        r"""
+        Return the number of elements that have been inspected and
+        simplified, the maximal estimated relative size that has been
+        observed, the time spent on simplifications, and the current bound.
+
+        The counters remain zero if this policy does not collect metrics.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: SimplificationPolicy().metrics()
+            {'bound': 32, 'inspected': 0, 'maximal size': 0, 'seconds': 0, 'simplified': 0}
+
+        """
+        return {'bound': self._bound, 'inspected': self._inspected, 'simplified': self._simplified, 'maximal size': self._maximal_size, 'seconds': self._seconds}
+
+# the default policy is shared by all computations, so it does not collect
+# metrics which would otherwise grow for the lifetime of the session
+_simplification_policy = SimplificationPolicy(adaptive=False, collect_metrics=False)
+
+class _SimplificationPolicies(threading.local):
+    r"""
+    The stack of :class:`SimplificationPolicy` which have been passed to
+    computations that are running in the current thread, see
+    :meth:`DiscreteValuation.mac_lane_approximants`.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: from mac_lane.valuation import _simplification_policies
+        sage: _simplification_policies.active
+        []
+
+    """
+    def __init__(self):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation import _SimplificationPolicies
+            sage: _SimplificationPolicies().active
+            []
+
+        """
+        self.active = []
+
+_simplification_policies = _SimplificationPolicies()
+
+def simplification_policy():
+    r"""
+    Return the :class:`SimplificationPolicy` that is currently used by the
+    valuations in this package.
+
+    This is the policy of the innermost computation in the current thread
+    that has been given a policy explicitly, and otherwise the policy set
+    with :func:`set_simplification_policy`.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: simplification_policy()
+        Simplification policy with bound 32
+
+    """
+    if _simplification_policies.active:
+        return _simplification_policies.active[-1]
+    return _simplification_policy
+
+def set_simplification_policy(policy):
+    r"""
+    Set the :class:`SimplificationPolicy` used by the valuations in this
+    package and return the previous policy.
+
+    This changes the policy for all threads, except for computations which
+    have been given a policy explicitly.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: old = set_simplification_policy(SimplificationPolicy(bound=64))
+        sage: simplification_policy()
+        Adaptive simplification policy with bound 64
+        sage: set_simplification_policy(old)
+        Adaptive simplification policy with bound 64
+
+    """
+    global _simplification_policy
+    if not isinstance(policy, SimplificationPolicy):
+        raise TypeError("policy must be a SimplificationPolicy")
+    old, _simplification_policy = _simplification_policy, policy
+    return old
+
+class ComputationCancelled(Exception):
+    r"""
+    Raised when a computation is interrupted because its
+    :class:`CancellationToken` has been cancelled or its deadline has passed.
+
+    The attribute ``partial`` holds the state that the computation had
+    reached when it was interrupted (or ``None``), e.g., the approximants
+    that :meth:`DiscreteValuation.mac_lane_approximants` had not refined
+    yet.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: e = ComputationCancelled("deadline exceeded", partial=[1]); e
+        ComputationCancelled('deadline exceeded',)
+        sage: e.partial
+        [1]
+
+    """
+    def __init__(self, message, partial=None):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: ComputationCancelled("cancelled").partial is None
+            True
+
+        """
+        super(ComputationCancelled, self).__init__(message)
+        self.partial = partial
+
+    def __reduce__(self):
+        r"""
+        Return a picklable representation of this exception, so that it can
+        be passed on from worker processes.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: e = loads(dumps(ComputationCancelled("cancelled", partial=[1])))
+            sage: e.partial
+            [1]
+
+        """
+        return ComputationCancelled, (self.args[0], self.partial)
+
+
+class CancellationToken(SageObject):
+    r"""
+    A token to cooperatively interrupt long running computations.
+
+    While a token is active, i.e., inside a ``with`` block, the Mac Lane
+    algorithm checks it before every :meth:`InductiveValuation.mac_lane_step`,
+    every expansion of the tree of approximants, and every refinement of a
+    limit valuation. If the token has been :meth:`cancel`ed, possibly from
+    another thread, or if its deadline has passed, a
+    :class:`ComputationCancelled` is raised.
+
+    Tokens are only active in the thread which entered the ``with`` block;
+    computations in other threads are not affected by them.
+
+    INPUT:
+
+    - ``timeout`` -- a number of seconds or ``None`` (default: ``None``),
+      the time after which the computation should be interrupted; the clock
+      starts when the token is created
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: R.<x> = QQ[]
+        sage: v = pAdicValuation(QQ, 2)
+        sage: token = CancellationToken(timeout=0)
+        sage: with token:
+        ....:     v.mac_lane_approximants(x^4 + 2*x^2 + 4)
+        Traceback (most recent call last):
+        ...
+        ComputationCancelled: deadline exceeded
+
+    The exception carries the approximants that had not been refined
+    further::
+
+        sage: try:
+        ....:     with token:
+        ....:         v.mac_lane_approximants(x^4 + 2*x^2 + 4)
+        ....: except ComputationCancelled as e:
+        ....:     e.partial
+        [Gauss valuation induced by 2-adic valuation]
+
+    The parallel algorithm can not be interrupted::
+
+        sage: with CancellationToken():
+        ....:     v.mac_lane_approximants(x^4 + 2*x^2 + 4, algorithm="parallel")
+        Traceback (most recent call last):
+        ...
+        NotImplementedError: cancellation tokens are not supported with the parallel algorithm
+
+    """
+    def __init__(self, timeout=None):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: CancellationToken(timeout=-1)
+            Traceback (most recent call last):
+            ...
+            ValueError: timeout must be non-negative
+
+        """
+        from time import time
+        if timeout is not None and timeout < 0:
+            raise ValueError("timeout must be non-negative")
+        self._deadline = None if timeout is None else time() + timeout
+        self._cancelled = False
+
+    def _repr_(self):
+        r"""
+        Return a printable representation of this token.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: CancellationToken() # indirect doctest
+            Cancellation token
+
+        """
+        return "Cancellation token"
+
+    def cancel(self):
+        r"""
+        Request that the computations which use this token are interrupted.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: token = CancellationToken()
+            sage: token.cancel()
+            sage: token.is_cancelled()
+            True
+
+        """
+        self._cancelled = True
+
+    def is_cancelled(self):
+        r"""
+        Return whether computations using this token should be interrupted,
+        i.e., whether it has been cancelled or its deadline has passed.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: CancellationToken().is_cancelled()
+            False
+            sage: CancellationToken(timeout=0).is_cancelled()
+            True
+
+        """
+        return self._cancelled or self.remaining() == 0
+
+    def remaining(self):
+        r"""
+        Return the number of seconds until the deadline of this token, or
+        ``None`` if it has no deadline.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: CancellationToken().remaining() is None
+            True
+            sage: 0 < CancellationToken(timeout=60).remaining() <= 60
+            True
+
+        """
+        if self._deadline is None:
+            return None
+        from time import time
+        return max(0, self._deadline - time())
+
+    def check(self, partial=None):
+        r"""
+        Raise a :class:`ComputationCancelled` carrying ``partial`` if
+        computations should be interrupted.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: token = CancellationToken()
+            sage: token.check()
+            sage: token.cancel()
+            sage: token.check()
+            Traceback (most recent call last):
+            ...
+            ComputationCancelled: cancelled
+
+        """
+        if self._cancelled:
+            raise ComputationCancelled("cancelled", partial=partial)
+        if self._deadline is not None and self.remaining() == 0:
+            raise ComputationCancelled("deadline exceeded", partial=partial)
+
+    def __enter__(self):
+        r"""
+        Activate this token.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: with CancellationToken() as token:
+            ....:     token
+            Cancellation token
+
+        """
+        _cancellation_tokens.active.append(self)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        r"""
+        Deactivate this token.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation import _cancellation_tokens
+            sage: with CancellationToken():
+            ....:     len(_cancellation_tokens.active)
+            1
+            sage: len(_cancellation_tokens.active)
+            0
+
+        Other threads do not see the token::
+
+            sage: import threading
+            sage: seen = []
+            sage: with CancellationToken(timeout=0):
+            ....:     thread = threading.Thread(target=lambda: seen.append(len(_cancellation_tokens.active)))
+            ....:     thread.start()
+            ....:     thread.join()
+            sage: seen
+            [0]
+
+        """
+        _cancellation_tokens.active.remove(self)
+        return False
+
+class _CancellationTokens(threading.local):
+    r"""
+    The stack of :class:`CancellationToken` which are active in the current
+    thread.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: from mac_lane.valuation import _cancellation_tokens
+        sage: _cancellation_tokens.active
+        []
+
+    """
+    def __init__(self):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation import _CancellationTokens
+            sage: _CancellationTokens().active
+            []
+
+        """
+        self.active = []
+
+_cancellation_tokens = _CancellationTokens()
+
+def _check_cancellation(partial=None):
+    r"""
+    Raise a :class:`ComputationCancelled` carrying ``partial`` if any of the
+    active :class:`CancellationToken` requests an interruption.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: from mac_lane.valuation import _check_cancellation
+        sage: _check_cancellation()
+
+    """
+    for token in _cancellation_tokens.active:
+        token.check(partial)
@@ -0,0 +1,652 @@
+# -*- coding: utf-8 -*-
+r"""
+Computations of approximants and extensions in a pool of worker processes.
+
+The computations of :meth:`DiscreteValuation.mac_lane_approximants` and of
+extensions of valuations can take a long time. The methods
+``extensions_async``, ``mac_lane_approximants_async``, and
+``montes_factorization_async`` run them in worker processes and return an
+:class:`AsyncComputation` immediately. Since valuations are created by
+factories, the valuations returned to the calling process are the unique
+objects of that process.
+
+Concurrent requests for the same computation are coalesced, i.e., they share
+a single computation in the pool.
+
+EXAMPLES::
+
+    sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+    sage: R.<x> = QQ[]
+    sage: v = pAdicValuation(QQ, 2)
+    sage: computation = v.mac_lane_approximants_async(x^2 + 1)
+    sage: computation.result()
+    [[ Gauss valuation induced by 2-adic valuation, v(x + 1) = 1/2 ]]
+    sage: computation.result()[0] is v.mac_lane_approximants(x^2 + 1)[0]
+    True
+
+Computations that have a ``timeout`` are never shared since their deadlines
+start when they are submitted.
+
+An :class:`AsyncComputation` is a ``concurrent.futures.Future``, so it can be
+used with ``concurrent.futures.wait``, or awaited in an event loop after
+wrapping it with ``asyncio.wrap_future``::
+
+    sage: from concurrent.futures import wait
+    sage: done, _ = wait([v.mac_lane_approximants_async(x^2 + 3)])
+    sage: len(done)
+    1
+
+"""
+import threading
+
+from sage.structure.sage_object import SageObject
+
+from concurrent.futures import Future
+
+from valuation import CancellationToken, ComputationCancelled
+
+class _EventCancellationToken(CancellationToken):
+    r"""
+    A :class:`CancellationToken` in a worker process which is cancelled
+    when the calling process sets ``event``.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: from mac_lane.valuation_pool import _EventCancellationToken
+        sage: from threading import Event
+        sage: event = Event()
+        sage: token = _EventCancellationToken(event)
+        sage: token.is_cancelled()
+        False
+        sage: event.set()
+        sage: token.is_cancelled()
+        True
+
+    """
+    def __init__(self, event, timeout=None):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation_pool import _EventCancellationToken
+            sage: from threading import Event
+            sage: isinstance(_EventCancellationToken(Event()), CancellationToken)
+            True
+
+        """
+        CancellationToken.__init__(self, timeout=timeout)
+        self._event = event
+
+    def is_cancelled(self):
+        r"""
+        Return whether the computation should be interrupted.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation_pool import _EventCancellationToken
+            sage: from threading import Event
+            sage: _EventCancellationToken(Event(), timeout=0).is_cancelled()
+            True
+
+        """
+        self._update()
+        return CancellationToken.is_cancelled(self)
+
+    def check(self, partial=None):
+        r"""
+        Raise a :class:`ComputationCancelled` if the computation should be
+        interrupted.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation_pool import _EventCancellationToken
+            sage: from threading import Event
+            sage: event = Event(); event.set()
+            sage: _EventCancellationToken(event).check()
+            Traceback (most recent call last):
+            ...
+            ComputationCancelled: cancelled
+
+        """
+        self._update()
+        CancellationToken.check(self, partial)
+
+    def _update(self):
+        r"""
+        Cancel this token if the calling process asked for it.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation_pool import _EventCancellationToken
+            sage: from threading import Event
+            sage: _EventCancellationToken(Event())._update()
+
+        """
+        if self._event.is_set():
+            self.cancel()
+
+def _run(valuation, method, args, kwds, event, deadline):
+    r"""
+    Run ``method`` of ``valuation`` on ``args`` and ``kwds`` in a worker
+    process until ``event`` is set or the time ``deadline`` (as returned by
+    ``time.time()``) has passed.
+
+    OUTPUT:
+
+    A pair ``(True, result)`` or, if the method raised an exception, a pair
+    ``(False, exception)``. The pool of Python 2 does not report exceptions
+    to callbacks, so they are passed on like results.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: from mac_lane.valuation_pool import _run
+        sage: from threading import Event
+        sage: _run(pAdicValuation(ZZ, 2), 'extensions', (QQ,), {}, Event(), None)
+        (True, [2-adic valuation])
+
+    The deadline is absolute, so time spent waiting for a worker counts::
+
+        sage: R.<x> = QQ[]
+        sage: _run(pAdicValuation(QQ, 2), 'mac_lane_approximants', (x^2 + 1,), {}, Event(), 0)
+        (False, ComputationCancelled('deadline exceeded',))
+
+    """
+    from time import time
+    timeout = None if deadline is None else max(0, deadline - time())
+    try:
+        with _EventCancellationToken(event, timeout=timeout):
+            return True, getattr(valuation, method)(*args, **kwds)
+    except Exception as e:
+        return False, e
+
+
+class ValuationPool(SageObject):
+    r"""
+    A pool of worker processes which compute approximants and extensions of
+    valuations.
+
+    INPUT:
+
+    - ``processes`` -- a positive integer or ``None`` (default: ``None``),
+      the number of worker processes; if ``None``, one process per CPU is
+      used
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: pool = ValuationPool(processes=1); pool
+        Pool of 1 worker processes for valuations
+        sage: R.<x> = QQ[]
+        sage: K.<a> = NumberField(x^2 + 1)
+        sage: v = pAdicValuation(QQ, 5)
+        sage: computation = v.extensions_async(K, pool=pool)
+        sage: len(computation.result())
+        2
+        sage: pool.close()
+
+    """
+    def __init__(self, processes=None):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: ValuationPool(processes=0)
+            Traceback (most recent call last):
+            ...
+            ValueError: processes must be positive
+
+        """
+        if processes is not None and processes <= 0:
+            raise ValueError("processes must be positive")
+        from multiprocessing import cpu_count
+        self._processes = processes or cpu_count()
+        self._pool = None
+        self._manager = None
+        # the computations which are currently running, and those of them
+        # which can be shared, indexed by their key; requests might come from
+        # several threads, so these and the pool are only accessed while
+        # holding _lock
+        self._running = set()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _repr_(self):
+        r"""
+        Return a printable representation of this pool.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: ValuationPool(processes=2) # indirect doctest
+            Pool of 2 worker processes for valuations
+
+        """
+        return "Pool of %s worker processes for valuations"%(self._processes,)
+
+    def _start(self):
+        r"""
+        Start the worker processes if they are not running yet.
+
+        The caller must hold the lock of this pool.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: pool = ValuationPool(processes=1)
+            sage: pool._start()
+            sage: pool.close()
+
+        """
+        if self._pool is None:
+            from multiprocessing import Pool, Manager
+            self._manager = Manager()
+            self._pool = Pool(self._processes)
+
+    def close(self):
+        r"""
+        Stop the worker processes of this pool.
+
+        Running computations are interrupted with a
+        :class:`ComputationCancelled`. The pool restarts its workers when
+        new computations are submitted.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: pool = ValuationPool(processes=1)
+            sage: pool.close()
+
+        """
+        # terminate() waits for the thread that runs the callbacks of the
+        # pool, and these callbacks acquire our lock; so we must not hold it
+        # while shutting down the workers
+        with self._lock:
+            pool, self._pool = self._pool, None
+            manager, self._manager = self._manager, None
+            running, self._running, self._pending = self._running, set(), {}
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+            manager.shutdown()
+        for computation in running:
+            computation._finished((False, ComputationCancelled("the pool has been closed")))
+
+    def _forget(self, key, computation):
+        r"""
+        Stop sharing ``computation`` with new requests for ``key`` since it
+        finished or has been cancelled.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: pool = ValuationPool(processes=1)
+            sage: computation = pool.submit(pAdicValuation(ZZ, 2), 'extensions', QQ)
+            sage: _ = computation.result()
+            sage: pool._pending
+            {}
+            sage: pool.close()
+
+        """
+        with self._lock:
+            self._running.discard(computation)
+            if key is not None and self._pending.get(key, None) is computation:
+                del self._pending[key]
+
+    def submit(self, valuation, method, *args, **kwds):
+        r"""
+        Compute ``method`` of ``valuation`` on ``args`` and ``kwds`` in a
+        worker process.
+
+        INPUT:
+
+        - ``valuation`` -- a valuation
+
+        - ``method`` -- a string, the name of a method of ``valuation``
+
+        - ``timeout`` -- a number of seconds or ``None`` (default: ``None``);
+          if set, the computation is interrupted when that time has passed
+          since this call, see :class:`CancellationToken`
+
+        All further arguments are passed on to the method.
+
+        OUTPUT:
+
+        An :class:`AsyncComputation`. If the same computation is already
+        running and neither request has a ``timeout``, the new request
+        shares it.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: pool = ValuationPool(processes=1)
+            sage: R.<x> = QQ[]
+            sage: v = pAdicValuation(QQ, 3)
+            sage: a = pool.submit(v, 'mac_lane_approximants', x^2 + 1)
+            sage: b = pool.submit(v, 'mac_lane_approximants', x^2 + 1)
+            sage: a._computation is b._computation
+            True
+            sage: b.result()
+            [[ Gauss valuation induced by 3-adic valuation, v(x^2 + 1) = +Infinity ]]
+
+        Once all requests for a computation have been cancelled, new requests
+        start a new computation::
+
+            sage: a = pool.submit(v, 'mac_lane_approximants', x^2 + 7)
+            sage: _ = a.cancel()
+            sage: b = pool.submit(v, 'mac_lane_approximants', x^2 + 7)
+            sage: a._computation is b._computation
+            False
+            sage: len(b.result())
+            1
+            sage: pool.close()
+
+        """
+        timeout = kwds.pop('timeout', None)
+        from time import time
+        deadline = None if timeout is None else time() + timeout
+
+        key = (valuation, method, args, tuple(sorted(kwds.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # some of the arguments are mutable, e.g., a cache; such requests
+            # can not be coalesced
+            key = None
+        if timeout is not None:
+            # the deadline of a shared computation would be the deadline of
+            # the first request
+            key = None
+
+        with self._lock:
+            self._start()
+            computation = None if key is None else self._pending.get(key, None)
+            if computation is not None:
+                ret = AsyncComputation(computation)
+                if not computation._attach(ret):
+                    # the computation finished or has been cancelled in the meantime
+                    computation = None
+            if computation is None:
+                from functools import partial
+                event = self._manager.Event()
+                computation = _PendingComputation(event, partial(self._forget, key))
+                ret = AsyncComputation(computation)
+                computation._attach(ret)
+                self._running.add(computation)
+                if key is not None:
+                    self._pending[key] = computation
+                self._pool.apply_async(_run, (valuation, method, args, kwds, event, deadline), callback=computation._finished)
+        return ret
+
+
+class _PendingComputation(object):
+    r"""
+    A computation running in a :class:`ValuationPool` which might be shared
+    by several :class:`AsyncComputation`.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: pool = ValuationPool(processes=1)
+        sage: computation = pool.submit(pAdicValuation(ZZ, 2), 'extensions', QQ)
+        sage: computation._computation
+        <...valuation_pool._PendingComputation object at 0x...>
+        sage: pool.close()
+
+    """
+    def __init__(self, event, forget):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: pool = ValuationPool(processes=1)
+            sage: from mac_lane.valuation_pool import _PendingComputation
+            sage: from threading import Event
+            sage: _PendingComputation(Event(), lambda computation: None)._waiting
+            []
+
+        """
+        self._event = event
+        self._forget = forget
+        # the handles which wait for the result; once the computation
+        # finished or has been cancelled, no handles can be attached anymore
+        self._waiting = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _attach(self, future):
+        r"""
+        Deliver the result of this computation to ``future``.
+
+        Return whether this was possible, i.e., whether the computation has
+        neither finished nor been cancelled.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation_pool import _PendingComputation
+            sage: from threading import Event
+            sage: computation = _PendingComputation(Event(), lambda computation: None)
+            sage: computation._attach(AsyncComputation(computation))
+            True
+            sage: computation._finished((True, 1))
+            sage: computation._attach(AsyncComputation(computation))
+            False
+
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            self._waiting.append(future)
+            return True
+
+    def _detach(self, future):
+        r"""
+        Stop delivering the result of this computation to ``future``; if no
+        other handle waits for it, interrupt the computation.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation_pool import _PendingComputation
+            sage: from threading import Event
+            sage: computation = _PendingComputation(Event(), lambda computation: None)
+            sage: future = AsyncComputation(computation)
+            sage: computation._attach(future)
+            True
+            sage: computation._detach(future)
+            sage: computation._event.is_set()
+            True
+
+        """
+        with self._lock:
+            if future not in self._waiting:
+                return
+            self._waiting.remove(future)
+            if self._waiting:
+                return
+            self._closed = True
+        self._event.set()
+        self._forget(self)
+
+    def _finished(self, outcome):
+        r"""
+        Deliver ``outcome``, a pair as returned by :func:`_run`, to the
+        handles waiting for this computation.
+
+        This is called by the pool in the calling process when the
+        computation has finished.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from mac_lane.valuation_pool import _PendingComputation
+            sage: from threading import Event
+            sage: computation = _PendingComputation(Event(), lambda computation: None)
+            sage: future = AsyncComputation(computation)
+            sage: computation._attach(future)
+            True
+            sage: computation._finished((False, ValueError("no result")))
+            sage: future.result()
+            Traceback (most recent call last):
+            ...
+            ValueError: no result
+
+        """
+        with self._lock:
+            waiting, self._waiting = self._waiting, []
+            self._closed = True
+        self._forget(self)
+        success, value = outcome
+        for future in waiting:
+            # a handle which has been cancelled concurrently does not take
+            # the result anymore
+            if not future.set_running_or_notify_cancel():
+                continue
+            if success:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+class AsyncComputation(Future):
+    r"""
+    The handle of a computation which runs in a :class:`ValuationPool`.
+
+    This is a ``concurrent.futures.Future`` which is never running from
+    the point of view of the calling process, i.e., it can be cancelled until
+    its result is available.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: v = pAdicValuation(QQ, 2)
+        sage: computation = v.extensions_async(QQ)
+        sage: computation.result()
+        [2-adic valuation]
+
+    """
+    def __init__(self, computation):
+        r"""
+        TESTS::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: from concurrent.futures import Future
+            sage: v = pAdicValuation(QQ, 2)
+            sage: isinstance(v.extensions_async(QQ), Future)
+            True
+
+        """
+        Future.__init__(self)
+        self._computation = computation
+
+    def __repr__(self):
+        r"""
+        Return a printable representation of this computation.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(QQ, 2)
+            sage: computation = v.extensions_async(QQ)
+            sage: _ = computation.result()
+            sage: computation
+            Finished computation
+
+        """
+        if self.cancelled():
+            return "Cancelled computation"
+        if self.done():
+            return "Finished computation"
+        return "Running computation"
+
+    def result(self, timeout=None):
+        r"""
+        Wait for this computation and return its result.
+
+        INPUT:
+
+        - ``timeout`` -- a number of seconds or ``None`` (default: ``None``),
+          how long to wait; this does not interrupt the computation, a
+          ``concurrent.futures.TimeoutError`` is raised if it has not
+          finished in time
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: v = pAdicValuation(QQ, 2)
+            sage: v.extensions_async(QQ).result(timeout=60)
+            [2-adic valuation]
+
+        A computation which has been cancelled has no result::
+
+            sage: R.<x> = QQ[]
+            sage: computation = v.mac_lane_approximants_async(x^2 + 17)
+            sage: computation.cancel()
+            True
+            sage: computation.result()
+            Traceback (most recent call last):
+            ...
+            CancelledError
+
+        A computation which exceeded its ``timeout`` raises a
+        :class:`ComputationCancelled`::
+
+            sage: v.mac_lane_approximants_async(x^4 + 2*x^2 + 4, timeout=0).result()
+            Traceback (most recent call last):
+            ...
+            ComputationCancelled: deadline exceeded
+
+        """
+        return Future.result(self, timeout)
+
+    def cancel(self):
+        r"""
+        Cancel this computation and return whether this was possible, i.e.,
+        whether its result was not available yet.
+
+        The computation in the pool is interrupted when no other request
+        shares it anymore.
+
+        EXAMPLES::
+
+            sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+            sage: R.<x> = QQ[]
+            sage: v = pAdicValuation(QQ, 2)
+            sage: computation = v.mac_lane_approximants_async(x^2 + 41)
+            sage: computation.cancel()
+            True
+            sage: computation.cancelled()
+            True
+
+        """
+        if not Future.cancel(self):
+            return False
+        self._computation._detach(self)
+        return True
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def default_pool():
+    r"""
+    Return the :class:`ValuationPool` that is used by the asynchronous
+    methods of valuations when no pool is specified.
+
+    EXAMPLES::
+
+        sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+        sage: default_pool()
+        Pool of ... worker processes for valuations
+
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ValuationPool()
+        return _default_pool
@@ -572,6 +572,35 @@ class DiscretePseudoValuationSpace(UniqueRepresentation, Homset):
 
             """
 
+        def valuation_and_reduction(self, x):
+            r"""
+            Return the valuation of ``x`` and the reduction of `x\pi^{-v(x)}`
+            in the :meth:`residue_ring` of this valuation, where `\pi` is the
+            :meth:`uniformizer`.
+
+            Subclasses override this to compute both values from a single
+            pass over ``x`` whenever possible. Over domains which are not
+            fields, `\pi^{-v(x)}` might not be defined; implementations
+            then multiply ``x`` with another element of valuation `-v(x)`,
+            which changes the reduction by a unit of the residue ring.
+
+            EXAMPLES::
+
+                sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+                sage: v = pAdicValuation(QQ, 5)
+                sage: v.valuation_and_reduction(50)
+                (2, 2)
+                sage: v.valuation_and_reduction(0)
+                (+Infinity, 0)
+
+            """
+            from sage.rings.all import infinity
+            x = self.domain().coerce(x)
+            v = self(x)
+            if v is infinity:
+                return v, self.residue_ring().zero()
+            return v, self.reduce(self.shift(x, -v))
+
         def extension(self, ring):
             r"""
             Return the unique extension of this valuation to ``ring``.
@@ -607,6 +636,39 @@ class DiscretePseudoValuationSpace(UniqueRepresentation, Homset):
                 return [self]
             raise NotImplementedError("extending %r from %r to %r not implemented"%(self, self.domain(), ring))
 
+        def extensions_async(self, ring, pool=None, timeout=None):
+            r"""
+            Compute the :meth:`extensions` of this valuation to ``ring`` in a
+            worker process.
+
+            INPUT:
+
+            - ``ring`` -- a ring, see :meth:`extensions`
+
+            - ``pool`` -- a :class:`ValuationPool` or ``None`` (default:
+              ``None``); if ``None``, the :func:`default_pool` is used
+
+            - ``timeout`` -- a number of seconds or ``None`` (default:
+              ``None``), after which the computation is interrupted
+
+            OUTPUT:
+
+            An :class:`AsyncComputation`. Concurrent requests for the same
+            extensions without a ``timeout`` share one computation.
+
+            EXAMPLES::
+
+                sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+                sage: v = pAdicValuation(ZZ, 2)
+                sage: v.extensions_async(QQ).result()
+                [2-adic valuation]
+
+            """
+            if pool is None:
+                from valuation_pool import default_pool
+                pool = default_pool()
+            return pool.submit(self, 'extensions', ring, timeout=timeout)
+
         def restriction(self, ring):
             r"""
             Return the restriction of this valuation to ``ring``.
@@ -761,11 +823,13 @@ class DiscretePseudoValuationSpace(UniqueRepresentation, Homset):
                     # construct an element which approximates a unit with respect to others[i]
                     # and has negative valuation with respect to others[:i]
                     from sage.rings.all import NN
+                    from valuation import _check_cancellation
                     for r in iter(NN):
                         # When we enter this loop we are essentially out of
                         # luck.  The size of the coefficients is likely going
                         # through the roof here and this is not going to
                         # terminate in reasonable time.
+                        _check_cancellation(ret)
                         factor = (ret**r)/(1+ret**r)
                         ret = factor * delta
                         if all([other(ret) < 0 for other in others[:i+1]]):
@@ -993,6 +1057,79 @@ class DiscretePseudoValuationSpace(UniqueRepresentation, Homset):
             """
             return self(x)
 
+        def _call_batch(self, xs, call_error=False):
+            r"""
+            Return the valuations of the elements of ``xs``.
+
+            Valuations which can evaluate many elements at once faster than one
+            at a time should override this method. It is used to evaluate
+            Gauss valuations on the coefficients of a polynomial.
+
+            INPUT:
+
+            - ``xs`` -- an iterable of elements in the domain of this valuation
+
+            - ``call_error`` -- whether or not the result is only used to
+              compute the minimum of the valuations (default: ``False``); if
+              set, entries which can not attain the minimum might be reported
+              as infinity
+
+            OUTPUT:
+
+            An iterable of rational numbers or infinity.
+
+            EXAMPLES::
+
+                sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+                sage: v = TrivialValuation(QQ)
+                sage: list(v._call_batch([0, 1, 2]))
+                [+Infinity, 0, 0]
+
+            """
+            from sage.rings.all import infinity
+            lowest_valuation = infinity
+            for x in xs:
+                if call_error and lowest_valuation is not infinity:
+                    v = self.lower_bound(x)
+                    if v is infinity or v >= lowest_valuation:
+                        yield infinity
+                        continue
+                ret = self(x)
+                if call_error and ret is not infinity and (lowest_valuation is infinity or ret < lowest_valuation):
+                    lowest_valuation = ret
+                yield ret
+
+        def _simplify_batch(self, xs, error=None, force=False):
+            r"""
+            Return simplified versions of the elements of ``xs``, see
+            :meth:`simplify`.
+
+            Valuations which can simplify many elements at once faster than
+            one at a time should override this method. It is used to simplify
+            the coefficients of a polynomial with respect to a Gauss valuation.
+
+            INPUT:
+
+            - ``xs`` -- an iterable of elements in the domain of this valuation
+
+            - ``error`` -- a rational, infinity, or ``None`` (default:
+              ``None``), the error allowed to introduce through the
+              simplification of each element
+
+            - ``force`` -- whether or not to simplify even if there is
+              heuristically no change in the size of the elements expected
+              (default: ``False``)
+
+            EXAMPLES::
+
+                sage: sys.path.append(os.getcwd()); from mac_lane import * # optional: standalone
+                sage: v = pAdicValuation(Qp(2))
+                sage: v._simplify_batch([6, 7], error=1)
+                [2 + O(2^21), 1 + 2 + O(2^20)]
+
+            """
+            return [self.simplify(x, error=error, force=force) for x in xs]
+
         def _relative_size(self, x):
             r"""
             Return an estimate on the coefficient size of ``x``.